@@ -0,0 +1,140 @@
+"""
+End-to-end throughput benchmark: complete scraping jobs (Chrome, scrolling,
+place parsing, email lookup and saving) against the local mock Maps server,
+at increasing concurrency levels.
+
+Needs Chrome and the scraper dependencies, but no access to Google.
+
+Usage, from the app directory:
+    python -m benchmarks.bench_e2e --jobs 4 --concurrency 1,2,4 --results 40 --latency-ms 100
+"""
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import install_quiet_frontend, print_table, write_json
+from benchmarks.mock_maps_server import MockMapsServer
+from scraper.improved_scraper import ImprovedBackend
+
+
+def run_job(query, base_url, args):
+    started = time.perf_counter()
+    backend = ImprovedBackend(
+        query,
+        "json",
+        args.headless,
+        base_url=base_url,
+        save_results=not args.no_save,
+        resource_profile=args.resource_profile,
+    )
+    backend.mainscraping()
+    return time.perf_counter() - started, len(backend.results())
+
+
+def run_level(concurrency, server, args):
+    durations = []
+    places = []
+    failures = []
+    lock = threading.Lock()
+
+    def job(number):
+        try:
+            duration, count = run_job(f"dentists {concurrency}-{number}", server.base_url, args)
+            with lock:
+                durations.append(duration)
+                places.append(count)
+        except Exception as e:
+            with lock:
+                failures.append(str(e))
+
+    requests_before = dict(server.config.stats)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(job, range(args.jobs)))
+    elapsed = time.perf_counter() - started
+
+    served = {
+        name: count - requests_before.get(name, 0)
+        for name, count in server.config.stats.items()
+    }
+    durations.sort()
+    return {
+        "concurrency": concurrency,
+        "jobs": args.jobs,
+        "failed_jobs": len(failures),
+        "places": sum(places),
+        "elapsed_seconds": round(elapsed, 1),
+        "jobs_per_minute": round(len(durations) / elapsed * 60, 2),
+        "places_per_minute": round(sum(places) / elapsed * 60, 1),
+        "job_p50_seconds": round(durations[len(durations) // 2], 1) if durations else None,
+        "job_max_seconds": round(durations[-1], 1) if durations else None,
+        "requests": sum(served.values()),
+        "injected_failures": served.get("injected_failures", 0),
+        "errors": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=4, help="jobs run at every concurrency level")
+    parser.add_argument("--concurrency", default="1,2,4", help="comma separated concurrency levels")
+    parser.add_argument("--results", type=int, default=40, help="places returned by every search")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--headless", type=int, default=1)
+    parser.add_argument("--resource-profile", default="maps")
+    parser.add_argument("--no-save", action="store_true", help="skip DataSaver")
+    parser.add_argument("--output", default=None, help="also write the results to this JSON file")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    install_quiet_frontend(verbose=args.verbose)
+
+    server = MockMapsServer(
+        results=args.results,
+        page_size=args.page_size,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        seed=1,
+    )
+    results = []
+    with server:
+        print(f"Mock Maps server on {server.base_url}, {args.results} results per search")
+        for concurrency in levels:
+            print(f"Running {args.jobs} job(s) with concurrency {concurrency}...")
+            results.append(run_level(concurrency, server, args))
+
+    print()
+    print_table(
+        ["concurrency", "jobs", "failed", "places", "elapsed s", "jobs/min", "places/min", "p50 job s", "max job s", "requests", "injected 503"],
+        [
+            [
+                r["concurrency"],
+                r["jobs"],
+                r["failed_jobs"],
+                r["places"],
+                r["elapsed_seconds"],
+                r["jobs_per_minute"],
+                r["places_per_minute"],
+                r["job_p50_seconds"],
+                r["job_max_seconds"],
+                r["requests"],
+                r["injected_failures"],
+            ]
+            for r in results
+        ],
+    )
+
+    if args.output:
+        write_json(args.output, results)
+    return 1 if any(r["failed_jobs"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
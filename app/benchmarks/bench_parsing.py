@@ -0,0 +1,171 @@
+"""
+Offline benchmarks of the CPU side of scraping: link extraction from result
+feeds (ImprovedScroller.extract_links_from_element) and field extraction from
+place panels (Parser.extract_details), run against the HTML fixtures in
+benchmarks/fixtures with a stub driver instead of a browser.
+
+Every feed_*.html and place_*.html file in the fixtures directory is
+benchmarked, so pages saved from a real session (for example the
+/tmp/page_source.html dump of the scroller) can be dropped in there.
+
+Usage, from the app directory:
+    python -m benchmarks.bench_parsing                  # compare with the stored baselines
+    python -m benchmarks.bench_parsing --save-baseline  # record new baselines
+
+The exit code is 1 when a case got slower than its baseline by more than --tolerance.
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from benchmarks.common import install_quiet_frontend, print_table, write_json
+from benchmarks.fixture_builder import FIXTURES_PATH, place_url
+from benchmarks.stub_driver import StubDriver, StubElement
+from scraper.improved_scroller import ImprovedScroller
+from scraper.log import setup_logging
+from scraper.parser import Parser
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+
+class OfflineParser(Parser):
+    """Parser that never leaves the machine: email lookups are skipped"""
+
+    def find_mail(self, url):
+        return ""
+
+
+def link_extraction_case(html):
+    scroller = ImprovedScroller(driver=StubDriver(html))
+    element = StubElement(html)
+
+    def run():
+        links = scroller.extract_links_from_element(element)
+        if not links:
+            raise AssertionError("no links extracted")
+
+    return run
+
+
+def place_parsing_case(html):
+    parser = OfflineParser(driver=StubDriver(html, current_url=place_url(1)), save_results=False)
+
+    def run():
+        parser.finalData = []
+        parser.extract_details()
+        if not parser.finalData or not parser.finalData[0]["Name"]:
+            raise AssertionError("place was not parsed")
+
+    return run
+
+
+def load_cases():
+    cases = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_PATH, "*.html"))):
+        name = os.path.basename(path)
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+
+        if name.startswith("feed_"):
+            cases.append((f"links:{name}", len(html), link_extraction_case(html)))
+        elif name.startswith("place_"):
+            cases.append((f"parse:{name}", len(html), place_parsing_case(html)))
+    return cases
+
+
+def measure(run, iterations, warmup):
+    for _ in range(warmup):
+        run()
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    mean = statistics.mean(timings)
+    return {
+        "mean_ms": round(mean * 1000, 3),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+        "pages_per_second": round(1 / mean, 1) if mean else None,
+        "peak_alloc_kb": round(peak / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--baseline", default=BASELINES_PATH)
+    args = parser.parse_args()
+
+    install_quiet_frontend()
+    # Per-place INFO records would be written by the log listener thread between the table rows
+    setup_logging("WARNING")
+
+    cases = load_cases()
+    if not cases:
+        print(f"No fixtures found in {FIXTURES_PATH}, run python -m benchmarks.fixture_builder")
+        return 1
+
+    baselines = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    results = {}
+    rows = []
+    regressions = []
+    for name, size, run in cases:
+        result = measure(run, args.iterations, args.warmup)
+        results[name] = result
+
+        verdict = ""
+        baseline = baselines.get(name)
+        if baseline:
+            change = result["mean_ms"] / baseline["mean_ms"] - 1
+            verdict = f"{change:+.0%}"
+            if change > args.tolerance:
+                verdict += " REGRESSION"
+                regressions.append(name)
+
+        rows.append([
+            name,
+            size // 1024,
+            result["mean_ms"],
+            result["p50_ms"],
+            result["p95_ms"],
+            result["pages_per_second"],
+            result["peak_alloc_kb"],
+            verdict,
+        ])
+
+    print_table(
+        ["case", "KB", "mean ms", "p50 ms", "p95 ms", "pages/s", "peak alloc KB", "vs baseline"],
+        rows,
+    )
+
+    if args.save_baseline:
+        write_json(args.baseline, results)
+    elif regressions:
+        print(f"\n{len(regressions)} case(s) slower than baseline by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
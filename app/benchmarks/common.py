@@ -0,0 +1,52 @@
+"""
+Helpers shared by the benchmark scripts
+"""
+
+import json
+import os
+import sys
+
+# Benchmarks are run from the app directory: python -m benchmarks.<name>
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.communicator import Communicator
+
+
+class QuietFrontend:
+    """Frontend for Communicator that keeps scraper messages out of the benchmark output"""
+
+    def __init__(self, output_format="json", verbose=False):
+        self.outputFormatValue = output_format
+        self.verbose = verbose
+        self.messages = []
+
+    def messageshowing(self, message):
+        self.messages.append(message)
+        if self.verbose:
+            print(f"  • {message}")
+
+    def end_processing(self):
+        pass
+
+
+def install_quiet_frontend(output_format="json", verbose=False):
+    frontend = QuietFrontend(output_format, verbose)
+    Communicator.set_frontend_object(frontend)
+    return frontend
+
+
+def print_table(headers, rows):
+    widths = [
+        max(len(str(headers[i])), *(len(str(row[i])) for row in rows)) if rows else len(str(headers[i]))
+        for i in range(len(headers))
+    ]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    print(f"Results written to {path}")
@@ -0,0 +1,218 @@
+"""
+Builds Maps-like HTML: result feeds and place panels with the same structure
+and class names the scraper relies on (role=feed, .hfpxzc anchors, the
+.PbZDve end marker, .DUwDvf titles, data-item-id buttons...).
+
+The generated pages are used as the benchmark fixture corpus and by the mock
+Maps server. Run it to regenerate benchmarks/fixtures:
+    python -m benchmarks.fixture_builder
+"""
+
+import html
+import os
+import random
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+CATEGORIES = ["Dentist", "Dental clinic", "Cosmetic dentist", "Orthodontist", "Pediatric dentist"]
+STREETS = ["Tahrir St", "Nile Corniche", "El Gomhoreya St", "Abbas El Akkad", "Makram Ebeid", "Gameat El Dewal"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def place_name(index):
+    return f"Smile Dental Center {index}"
+
+
+def place_id(index):
+    return f"ChIJ{index:08d}Bench{index * 7919 % 100000:05d}"
+
+
+def place_url(index, base_url="https://www.google.com"):
+    lat = 30.0444 + (index % 97) * 0.0011
+    lng = 31.2357 + (index % 89) * 0.0013
+    name = place_name(index).replace(" ", "+")
+    feature = f"0x14583fa{index:09x}:0x{index * 2654435761 % 2**48:012x}"
+    return (
+        f"{base_url}/maps/place/{name}/data=!4m7!3m6!1s{feature}!8m2!3d{lat:.7f}!4d{lng:.7f}"
+        f"!16s%2Fg%2F11bench{index}!19s{place_id(index)}?authuser=0&hl=en&rclk=1"
+    )
+
+
+def place_details(index, website_base=None):
+    """website_base: host the place website points to, the mock server serves them under /site/<index>/"""
+
+    rng = random.Random(index)
+    website = f"https://smile-dental-{index}.example.com/"
+    if website_base is not None:
+        website = f"{website_base}/site/{index}/"
+    return {
+        "name": place_name(index),
+        "category": rng.choice(CATEGORIES),
+        "rating": f"{rng.uniform(3.2, 5.0):.1f}",
+        "reviews": f"{rng.randint(3, 4800):,}",
+        "address": f"{rng.randint(1, 240)} {rng.choice(STREETS)}, Cairo Governorate",
+        "phone": f"010 {rng.randint(1000, 9999)} {rng.randint(1000, 9999)}",
+        "website": website if index % 4 != 3 else None,
+        "status": "Open ⋅ Closes 10 PM" if index % 5 else "Closed ⋅ Opens 9 AM",
+    }
+
+
+def build_card(index, base_url="https://www.google.com"):
+    details = place_details(index)
+    name = html.escape(details["name"])
+    return f"""
+<div jsaction="mouseover:pane.wfvdle42" class="Nv2PK THOPZb CpccDe ">
+  <a class="hfpxzc" aria-label="{name}" href="{html.escape(place_url(index, base_url))}" jsaction="pane.wfvdle43;focus:pane.wfvdle43"></a>
+  <div class="bfdHYd Ppzolf OFBs3e">
+    <div class="rgMPfe"></div>
+    <div class="lI9IFe">
+      <div class="y7PRA">
+        <div class="Lui3Od">
+          <div class="UaQhfb fontBodyMedium">
+            <div class="NrDZNb"><div class="qBF1Pd fontHeadlineSmall">{name}</div></div>
+            <div class="W4Efsd">
+              <div class="AJB7ye">
+                <span class="e4rVHe fontBodyMedium"><span role="img" class="ZkP5Je" aria-label="{details['rating']} stars {details['reviews']} Reviews">
+                  <span class="MW4etd" aria-hidden="true">{details['rating']}</span>
+                  <span class="UY7F9" aria-hidden="true">({details['reviews']})</span></span></span>
+              </div>
+            </div>
+            <div class="W4Efsd">
+              <div class="W4Efsd"><span><span>{html.escape(details['category'])}</span></span>
+                <span><span aria-hidden="true">·</span> <span>{html.escape(details['address'])}</span></span></div>
+              <div class="W4Efsd"><span><span><span style="font-weight: 400; color: rgba(24,128,56,1.00);">{html.escape(details['status'])}</span></span></span>
+                <span><span aria-hidden="true">·</span> <span class="UsdlK">{html.escape(details['phone'])}</span></span></div>
+            </div>
+          </div>
+        </div>
+      </div>
+    </div>
+  </div>
+</div>
+<div class="TFQHme "></div>"""
+
+
+END_MARKER = (
+    '<div class="m6QErb tLjsW eKbjU"><div class="PbZDve "><p class="fontBodyMedium ">'
+    '<span><span class="HlvSq">You\'ve reached the end of the list.</span></span></p></div></div>'
+)
+LOADING_MARKER = '<div class="lXJj5c Hk4XGb "><div class="qjESne veYFef"></div></div>'
+
+
+def build_cards(start, count, base_url="https://www.google.com", first_index=0):
+    """Result cards for feed positions start..start+count, numbered from first_index"""
+    return "".join(build_card(first_index + i, base_url) for i in range(start, start + count))
+
+
+def build_feed_container(start, count, end_marker=True, base_url="https://www.google.com", first_index=0):
+    cards = build_cards(start, count, base_url, first_index)
+    end = END_MARKER if end_marker else LOADING_MARKER
+    return (
+        '<div class="m6QErb DxyBCb kA9KIf dS8AEf XiKgde ecceSd" aria-label="Results for dentists" role="feed" tabindex="-1">'
+        f"{cards}{end}</div>"
+    )
+
+
+def build_feed_page(count, title="dentists - Google Maps", base_url="https://www.google.com", end_marker=True, first_index=0, script=""):
+    return (
+        f"<!DOCTYPE html><html><head><title>{html.escape(title)}</title></head><body>"
+        '<div id="app-container"><div role="main" aria-label="Results for dentists">'
+        f"{build_feed_container(0, count, end_marker, base_url, first_index)}"
+        f"</div></div>{script}</body></html>"
+    )
+
+
+def build_reviews(index, count):
+    rng = random.Random(index * 31)
+    blocks = []
+    for i in range(count):
+        stars = rng.randint(1, 5)
+        blocks.append(
+            f'<div class="jftiEf fontBodyMedium" aria-label="Reviewer {i}" data-review-id="r{index}-{i}">'
+            f'<div class="d4r55 ">Reviewer {i}</div><div class="DU9Pgb"><span class="kvMYJc" role="img" aria-label="{stars} stars">'
+            + '<span class="hCCjke google-symbols NhBTye elGi1d"></span>' * stars
+            + f'</span><span class="rsqaWe">{rng.randint(1, 11)} months ago</span></div>'
+            f'<div class="MyEned"><span class="wiI7pd">Very professional staff and a clean clinic. Visit number {i}, '
+            f'would recommend the team to friends and family.</span></div></div>'
+        )
+    return "".join(blocks)
+
+
+def build_place_panel(index, variant="full", website_base=None):
+    """variant: "full" has every field, "minimal" only a name and address, "closed" is permanently closed"""
+
+    details = place_details(index, website_base)
+    name = html.escape(details["name"])
+
+    parts = [
+        f'<div class="tAiQdd"><div class="lMbq3e"><div><h1 class="DUwDvf lfPIob">{name}<span class="G0bp3e"></span></h1></div></div></div>',
+        f'<button class="CsEnBe" data-item-id="address" aria-label="Address: {html.escape(details["address"])}">'
+        f'<div class="AeaXub"><div class="rogA2c "><div class="Io6YTe fontBodyMedium kR99db ">{html.escape(details["address"])}</div></div></div></button>',
+    ]
+
+    if variant != "minimal":
+        parts.insert(1, (
+            f'<div class="F7nice "><span><span aria-hidden="true">{details["rating"]}</span>'
+            f'<span class="ceNzKf" role="img" aria-label="{details["rating"]} stars "></span></span>'
+            f'<span><span><span aria-label="{details["reviews"]} reviews">({details["reviews"]})</span></span></span></div>'
+            f'<div class="skqShb"><span class="YhemCb"></span><button class="DkEaL " jsaction="pane.rating.category">{html.escape(details["category"])}</button></div>'
+        ))
+        phone_digits = details["phone"].replace(" ", "")
+        parts.append(
+            f'<button class="CsEnBe" data-item-id="phone:tel:{phone_digits}" aria-label="Phone: {details["phone"]}">'
+            f'<div class="AeaXub"><div class="rogA2c "><div class="Io6YTe fontBodyMedium kR99db ">{details["phone"]}</div></div></div></button>'
+        )
+        if details["website"]:
+            parts.append(
+                f'<a class="CsEnBe" data-item-id="authority" href="{details["website"]}" aria-label="Website: {details["website"]}">'
+                f'<div class="rogA2c ITvuef"><div class="Io6YTe fontBodyMedium kR99db ">{details["website"]}</div></div></a>'
+            )
+            parts.append(
+                f'<a class="CsEnBe" aria-label="Open booking link" href="{details["website"]}booking">'
+                '<div class="Io6YTe fontBodyMedium kR99db ">Book online</div></a>'
+            )
+        hours = "".join(
+            f'<tr class="y0skZc"><td class="ylH6lf"><div>{day}</div></td><td class="mxowUb"><li class="G8aQO">9 AM–10 PM</li></td></tr>'
+            for day in DAYS
+        )
+        parts.append(f'<div class="t39EBf GUrTXd"><table class="eK4R0e fontBodyMedium"><tbody>{hours}</tbody></table></div>')
+
+    if variant == "closed":
+        parts.append('<span class="ZDu9vd"><span><span style="color: rgba(217,48,37,1.00);">Permanently closed</span></span></span>')
+    elif variant == "full":
+        parts.append(f'<span class="ZDu9vd"><span><span>{html.escape(details["status"])}</span></span></span>')
+
+    if variant == "full":
+        parts.append(f'<div class="m6QErb DxyBCb kA9KIf dS8AEf">{build_reviews(index, 40)}</div>')
+
+    return f'<div role="main" aria-label="{name}" class="m6QErb WNBkOb XiKgde ">{"".join(parts)}</div>'
+
+
+def build_place_page(index, variant="full", website_base=None):
+    name = html.escape(place_name(index))
+    return (
+        f"<!DOCTYPE html><html><head><title>{name} - Google Maps</title></head><body>"
+        f'<div id="app-container">{build_place_panel(index, variant, website_base)}</div></body></html>'
+    )
+
+
+def write_corpus(path=FIXTURES_PATH):
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    files = {
+        "feed_20.html": build_feed_page(20),
+        "feed_120.html": build_feed_page(120),
+        "place_full.html": build_place_page(1, "full"),
+        "place_no_website.html": build_place_page(3, "full"),
+        "place_minimal.html": build_place_page(2, "minimal"),
+        "place_closed.html": build_place_page(5, "closed"),
+    }
+    for name, content in files.items():
+        with open(os.path.join(path, name), "w", encoding="utf-8") as f:
+            f.write(content)
+        print(f"Wrote {name} ({len(content) // 1024} KB)")
+
+
+if __name__ == "__main__":
+    write_corpus()
@@ -0,0 +1,112 @@
+"""
+Cold start benchmark of the web apps: time to import an app module in a fresh
+interpreter, with the scraping stack loaded lazily (the current start up) and
+loaded eagerly (what the apps used to import at start up).
+
+Uses `python -X importtime`, so it needs the app dependencies installed but no
+Chrome. The warm-up thread is disabled in the measured processes.
+
+Usage, from the app directory:
+    python -m benchmarks.import_time --app production_app --runs 5 --top 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from benchmarks.common import print_table, write_json
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the apps imported at start up before they were loaded lazily
+EAGER_MODULES = ["scraper.improved_scraper", "scraper.grid", "scraper.batch", "scraper.datasaver", "pandas"]
+
+STARTUP_SCRIPT = """
+import settings
+settings.WARM_UP_IMPORTS = False
+import time
+started = time.perf_counter()
+{imports}
+print(time.perf_counter() - started)
+"""
+
+
+def run_import(modules):
+    """Wall clock seconds of the imports and the -X importtime report of one fresh interpreter"""
+    script = STARTUP_SCRIPT.format(imports="\n".join(f"import {name}" for name in modules))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{result.stderr[-2000:]}")
+    return float(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+
+def parse_importtime(report):
+    """Cumulative microseconds per top level package, from the -X importtime output"""
+    packages = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        try:
+            cumulative = int(cumulative)
+        except ValueError:
+            continue  # header line
+        # Top level entries of the import tree are not indented
+        if name.startswith(" ") and not name.startswith("  "):
+            package = name.strip().split(".")[0]
+            packages[package] = packages.get(package, 0) + cumulative
+    return packages
+
+
+def measure(modules, runs):
+    durations = []
+    packages = {}
+    for _ in range(runs):
+        seconds, packages = run_import(modules)
+        durations.append(seconds)
+    return {
+        "modules": modules,
+        "median_seconds": round(statistics.median(durations), 3),
+        "min_seconds": round(min(durations), 3),
+        "packages_ms": {name: round(us / 1000, 1) for name, us in sorted(packages.items(), key=lambda item: -item[1])},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of the web apps, lazy against eager")
+    parser.add_argument("--app", default="production_app", help="app module, e.g. production_app or railway_app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="packages listed per start up")
+    parser.add_argument("--output", help="write the results to a JSON file")
+    args = parser.parse_args()
+
+    results = {
+        "lazy": measure([args.app], args.runs),
+        "eager": measure([args.app] + EAGER_MODULES, args.runs),
+    }
+
+    print(f"\nImport time of {args.app}, median of {args.runs} fresh interpreters\n")
+    print_table(
+        ["start up", "median s", "min s"],
+        [[name, r["median_seconds"], r["min_seconds"]] for name, r in results.items()],
+    )
+    saved = results["eager"]["median_seconds"] - results["lazy"]["median_seconds"]
+    print(f"\nLazy imports save {saved:.3f}s per worker start")
+
+    for name, r in results.items():
+        print(f"\nSlowest packages, {name} start up\n")
+        top = list(r["packages_ms"].items())[:args.top]
+        print_table(["package", "cumulative ms"], [[package, ms] for package, ms in top])
+
+    if args.output:
+        write_json(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
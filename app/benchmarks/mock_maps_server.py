@@ -0,0 +1,281 @@
+"""
+Local stand-in for Google Maps, used to load test the whole scraping pipeline
+(Chrome, ImprovedScroller, Parser and DataSaver) without sending traffic to Google.
+
+It serves:
+    /maps/search/<query>/...   result feed with infinite scroll ([role='feed'],
+                               .hfpxzc anchors, loading spinner and end marker)
+    /mock/feed                 next page of result cards, fetched by the feed page on scroll
+    /maps/place/<name>/data=.. place page for a result
+    /site/<index>/             place website, some with the email on the home page
+                               and some only on /contact/
+
+Latency, result counts and failure injection are configurable. Pages are built
+with benchmarks.fixture_builder, so they match the offline fixtures.
+
+Usage, from the app directory:
+    python -m benchmarks.mock_maps_server --port 8765 --results 120 --latency-ms 150 --failure-rate 0.02
+
+then set MAPS_BASE_URL = "http://127.0.0.1:8765" in settings.py (or pass base_url
+to ImprovedBackend) and run jobs as usual.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from benchmarks.fixture_builder import (
+    END_MARKER,
+    build_cards,
+    build_feed_page,
+    build_place_page,
+    place_name,
+)
+
+PLACE_INDEX_PATTERN = re.compile(r"ChIJ(\d{8})")
+SITE_PATTERN = re.compile(r"^/site/(\d+)/*(contact/*)?$", re.IGNORECASE)
+
+FEED_SCRIPT = """
+<style>[role='feed'] {{ height: 900px; overflow-y: auto; }} .Nv2PK {{ min-height: 120px; }}</style>
+<script>
+(function () {{
+  var feed = document.querySelector("[role='feed']");
+  var key = {key}, loaded = {loaded}, total = {total}, loading = false;
+
+  function loadMore() {{
+    if (loading || loaded >= total) return;
+    if (feed.scrollTop + feed.clientHeight < feed.scrollHeight - 300) return;
+    loading = true;
+    fetch("/mock/feed?key=" + encodeURIComponent(key) + "&start=" + loaded)
+      .then(function (response) {{
+        if (!response.ok) throw new Error(response.status);
+        return response.json();
+      }})
+      .then(function (page) {{
+        var spinner = feed.querySelector(".lXJj5c");
+        spinner.insertAdjacentHTML("beforebegin", page.html);
+        loaded = page.next;
+        if (page.done) spinner.outerHTML = page.end;
+      }})
+      .catch(function () {{}})
+      .then(function () {{ loading = false; }});
+  }}
+
+  feed.addEventListener("scroll", loadMore);
+}})();
+</script>
+"""
+
+CONTACT_PAGE = """<!DOCTYPE html><html><head><title>{name}</title></head><body>
+<h1>{name}</h1><p>Call us or book online.</p>{email}
+<a href="/site/{index}/contact/">Contact</a></body></html>"""
+
+
+def place_variant(index):
+    if index % 10 == 7:
+        return "minimal"
+    if index % 13 == 5:
+        return "closed"
+    return "full"
+
+
+def place_email(index):
+    return f"info@smile-dental-{index}.example.com"
+
+
+class MockMapsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.config.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        config = self.server.config
+        url = urllib.parse.urlsplit(self.path)
+
+        if url.path == "/favicon.ico":
+            return self.reply(404, "")
+
+        config.delay()
+        if config.should_fail():
+            config.count("injected_failures")
+            return self.reply(503, "<html><body>Service unavailable</body></html>")
+
+        if url.path.startswith("/maps/search/"):
+            config.count("search")
+            return self.reply(200, config.search_page(url.path))
+
+        if url.path == "/mock/feed":
+            config.count("feed_page")
+            params = urllib.parse.parse_qs(url.query)
+            key = params.get("key", [""])[0]
+            start = int(params.get("start", ["0"])[0])
+            return self.reply(200, json.dumps(config.feed_page(key, start)), "application/json")
+
+        if url.path.startswith("/maps/place/"):
+            match = PLACE_INDEX_PATTERN.search(urllib.parse.unquote(self.path))
+            if match:
+                config.count("place")
+                return self.reply(200, config.place_page(int(match.group(1))))
+
+        match = SITE_PATTERN.match(url.path)
+        if match:
+            config.count("site")
+            return self.reply(200, config.site_page(int(match.group(1)), bool(match.group(2))))
+
+        config.count("not_found")
+        self.reply(404, "<html><body>Not found</body></html>")
+
+    def reply(self, status, body, content_type="text/html; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MockMapsConfig:
+    def __init__(self, base_url, results=120, page_size=20, latency_ms=0, jitter_ms=0, failure_rate=0.0, seed=None, verbose=False) -> None:
+        self.base_url = base_url
+        self.results = results
+        self.page_size = page_size
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.verbose = verbose
+
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def delay(self):
+        if self.latency_ms <= 0 and self.jitter_ms <= 0:
+            return
+        with self.lock:
+            delay_ms = self.random.uniform(self.latency_ms - self.jitter_ms, self.latency_ms + self.jitter_ms)
+        time.sleep(max(0, delay_ms) / 1000)
+
+    def should_fail(self):
+        if self.failure_rate <= 0:
+            return False
+        with self.lock:
+            return self.random.random() < self.failure_rate
+
+    def first_index(self, key):
+        # Every search (query and map position) gets its own block of places
+        return 1000 * (zlib.crc32(key.encode("utf-8")) % 90000)
+
+    def search_page(self, path):
+        key = urllib.parse.unquote_plus(path[len("/maps/search/"):]).strip("/")
+        query = key.split("/@")[0]
+        first_page = min(self.page_size, self.results)
+        done = first_page >= self.results
+
+        script = FEED_SCRIPT.format(key=json.dumps(key), loaded=first_page, total=self.results)
+        return build_feed_page(
+            first_page,
+            title=f"{query} - Google Maps",
+            base_url=self.base_url,
+            end_marker=done,
+            first_index=self.first_index(key),
+            script="" if done else script,
+        )
+
+    def feed_page(self, key, start):
+        count = max(0, min(self.page_size, self.results - start))
+        next_start = start + count
+        return {
+            "html": build_cards(start, count, self.base_url, self.first_index(key)),
+            "next": next_start,
+            "done": next_start >= self.results,
+            "end": END_MARKER,
+        }
+
+    def place_page(self, index):
+        return build_place_page(index, place_variant(index), website_base=self.base_url)
+
+    def site_page(self, index, contact):
+        # Even places only list their email on the contact page, to exercise the fallback lookup
+        email = f"<p>Email: {place_email(index)}</p>" if contact or index % 2 else ""
+        return CONTACT_PAGE.format(name=place_name(index), email=email, index=index)
+
+
+class MockMapsServer:
+    """The mock server running in a background thread, for use from benchmarks"""
+
+    def __init__(self, host="127.0.0.1", port=0, **options) -> None:
+        self.httpd = ThreadingHTTPServer((host, port), MockMapsHandler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.httpd.config = MockMapsConfig(self.base_url, **options)
+        self.thread = None
+
+    @property
+    def config(self):
+        return self.httpd.config
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="mock-maps-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--results", type=int, default=120, help="places returned by every search")
+    parser.add_argument("--page-size", type=int, default=20, help="places loaded per scroll")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = MockMapsServer(
+        args.host,
+        args.port,
+        results=args.results,
+        page_size=args.page_size,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+        verbose=args.verbose,
+    )
+    print(f"Mock Google Maps listening on {server.base_url}")
+    print(f'Set MAPS_BASE_URL = "{server.base_url}" in settings.py to scrape it')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"Requests served: {server.config.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Before/after measurement of the request blocking profiles.
+
+Opens one search and the first N places with every profile and reports bytes
+transferred (from the CDP network events) and page load times.
+
+Usage, from the app directory:
+    python -m benchmarks.resource_blocking "dentists in cairo" --places 10 --profiles off maps
+"""
+
+import argparse
+import time
+import urllib.parse
+from benchmarks.common import install_quiet_frontend, print_table, write_json
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as Ec
+from scraper.improved_scraper import ImprovedBackend
+from scraper.resource_blocking import NetworkMeter, BLOCKING_PROFILES
+
+
+def measure_profile(profile, query, places, headless):
+    driver = ImprovedBackend.build_driver(headless, resource_profile=profile, performance_log=True)
+    meter = NetworkMeter(driver)
+    meter.collect()  # drop the events of the blank start page
+
+    try:
+        url = f"https://www.google.com/maps/search/{urllib.parse.quote_plus(query)}/"
+        start = time.perf_counter()
+        driver.get(url)
+        WebDriverWait(driver, 60).until(
+            Ec.presence_of_element_located((By.CSS_SELECTOR, "a.hfpxzc"))
+        )
+        search_seconds = time.perf_counter() - start
+        search_usage = meter.collect()
+
+        links = [a.get_attribute("href") for a in driver.find_elements(By.CSS_SELECTOR, "a.hfpxzc")]
+        links = links[:places]
+
+        place_seconds = []
+        place_bytes = []
+        blocked = search_usage["blocked"]
+        for link in links:
+            start = time.perf_counter()
+            driver.get(link)
+            WebDriverWait(driver, 30).until(
+                Ec.presence_of_element_located((By.CSS_SELECTOR, "h1.DUwDvf"))
+            )
+            place_seconds.append(time.perf_counter() - start)
+            usage = meter.collect()
+            place_bytes.append(usage["bytes"])
+            blocked += usage["blocked"]
+
+    finally:
+        driver.quit()
+
+    count = max(1, len(place_seconds))
+    return {
+        "profile": profile,
+        "search_kb": round(search_usage["bytes"] / 1024, 1),
+        "search_seconds": round(search_seconds, 2),
+        "places": len(place_seconds),
+        "place_kb_avg": round(sum(place_bytes) / count / 1024, 1),
+        "place_seconds_avg": round(sum(place_seconds) / count, 2),
+        "blocked_requests": blocked,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("query")
+    parser.add_argument("--places", type=int, default=10)
+    parser.add_argument("--profiles", nargs="+", default=["off", "maps"], choices=list(BLOCKING_PROFILES))
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    install_quiet_frontend()
+
+    results = []
+    for profile in args.profiles:
+        print(f"Measuring profile '{profile}'...")
+        results.append(measure_profile(profile, args.query, args.places, 0 if args.headed else 1))
+
+    baseline = results[0]
+    rows = []
+    for result in results:
+        saved = ""
+        if result is not baseline and baseline["place_kb_avg"]:
+            saved = f"{100 * (1 - result['place_kb_avg'] / baseline['place_kb_avg']):.0f}%"
+        rows.append([
+            result["profile"],
+            result["search_kb"],
+            result["search_seconds"],
+            result["places"],
+            result["place_kb_avg"],
+            result["place_seconds_avg"],
+            result["blocked_requests"],
+            saved,
+        ])
+
+    print()
+    print_table(
+        ["profile", "search KB", "search s", "places", "KB/place", "s/place", "blocked", "bytes saved"],
+        rows,
+    )
+
+    if args.json:
+        write_json(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
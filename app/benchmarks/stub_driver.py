@@ -0,0 +1,44 @@
+"""
+Stand-ins for the Selenium driver and elements that serve fixture HTML,
+so the parsing code can run without a browser
+"""
+
+
+class StubElement:
+    def __init__(self, html) -> None:
+        self.html = html
+
+    def get_attribute(self, name):
+        if name in ("outerHTML", "innerHTML"):
+            return self.html
+        return None
+
+    def is_displayed(self):
+        return True
+
+
+class StubDriver:
+    def __init__(self, html="", current_url="https://www.google.com/maps") -> None:
+        self.page_source = html
+        self.current_url = current_url
+        self.title = "Google Maps"
+
+    def load(self, html, current_url=None):
+        self.page_source = html
+        if current_url is not None:
+            self.current_url = current_url
+
+    def execute_script(self, script, *args):
+        # Parser reads the details panel with document.querySelector("[role='main']")
+        if "role='main'" in script:
+            return StubElement(self.page_source)
+        return None
+
+    def find_element(self, by, value):
+        return StubElement(self.page_source)
+
+    def find_elements(self, by, value):
+        return []
+
+    def quit(self):
+        pass
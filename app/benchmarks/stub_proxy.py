@@ -0,0 +1,234 @@
+"""
+Local stand-in for an upstream HTTP proxy, used to try the proxy pool
+(scraper/proxy_pool.py) without paying for proxies.
+
+It forwards plain HTTP requests (absolute URI in the request line) and tunnels
+HTTPS through CONNECT, like Squid or a commercial proxy would. Added latency,
+connection errors and blocks are configurable, so a few stubs with different
+settings show how the pool scores, ejects and re-admits proxies. A block is
+answered like Google answers a burned IP: a redirect to /sorry/ for Maps
+requests and 429 for everything else.
+
+Usage, from the app directory, one stub per port:
+    python -m benchmarks.stub_proxy --port 8901
+    python -m benchmarks.stub_proxy --port 8902 --latency-ms 800 --error-rate 0.3
+    python -m benchmarks.stub_proxy --port 8903 --block-rate 0.5
+
+then set PROXIES = ["http://127.0.0.1:8901", "http://127.0.0.1:8902", "http://127.0.0.1:8903"]
+in settings.py, run jobs against benchmarks.mock_maps_server as usual and watch
+"proxies" in /health and the gms_proxy_* metrics.
+"""
+
+import argparse
+import random
+import select
+import socket
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "proxy-connection",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+
+class StubProxyHandler(BaseHTTPRequestHandler):
+    # One request per connection keeps the forwarding simple
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.config.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self.forward()
+
+    def do_HEAD(self):
+        self.forward()
+
+    def do_POST(self):
+        self.forward()
+
+    def do_CONNECT(self):
+        config = self.server.config
+        host, _, port = self.path.partition(":")
+        if not self.admit(self.path):
+            return
+        try:
+            upstream = socket.create_connection((host, int(port or 443)), timeout=config.timeout)
+        except OSError as e:
+            config.count("upstream_errors")
+            return self.send_error(502, f"Cannot reach {self.path}: {e}")
+
+        config.count("tunnels")
+        self.send_response(200, "Connection established")
+        self.end_headers()
+        self.relay(upstream)
+
+    def forward(self):
+        config = self.server.config
+        url = urllib.parse.urlsplit(self.path)
+        if not url.hostname:
+            return self.send_error(400, "Only proxy requests with an absolute URI are served")
+        if not self.admit(self.path, url):
+            return
+
+        path = urllib.parse.urlunsplit(("", "", url.path or "/", url.query, ""))
+        headers = {k: v for k, v in self.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+        headers["Connection"] = "close"
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        try:
+            upstream = socket.create_connection((url.hostname, url.port or 80), timeout=config.timeout)
+        except OSError as e:
+            config.count("upstream_errors")
+            return self.send_error(502, f"Cannot reach {url.netloc}: {e}")
+
+        config.count("forwarded")
+        with upstream:
+            request = [f"{self.command} {path} HTTP/1.0"] + [f"{k}: {v}" for k, v in headers.items()]
+            upstream.sendall(("\r\n".join(request) + "\r\n\r\n").encode("latin-1") + body)
+            # The answer goes back as it is, the upstream closes the connection when it is done
+            while True:
+                chunk = upstream.recv(65536)
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+
+    def admit(self, target, url=None):
+        """Add latency, then drop or block the request as configured. False when it was not let through"""
+        config = self.server.config
+        config.delay()
+        if config.roll() < config.error_rate:
+            config.count("dropped")
+            # Like a dead proxy: the connection closes without an answer
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return False
+        if config.roll() < config.block_rate:
+            config.count("blocked")
+            if url is not None and url.path.startswith("/maps"):
+                self.send_response(302)
+                self.send_header("Location", f"{url.scheme}://{url.netloc}/sorry/index?continue={urllib.parse.quote(target)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            else:
+                # HTTPS tunnels can only be refused
+                self.send_error(429, "Too Many Requests")
+            return False
+        return True
+
+    def relay(self, upstream):
+        """Copy bytes both ways until one side closes"""
+        client = self.connection
+        with upstream:
+            sockets = [client, upstream]
+            while True:
+                readable, _, failed = select.select(sockets, [], sockets, self.server.config.timeout)
+                if failed or not readable:
+                    return
+                for source in readable:
+                    target = upstream if source is client else client
+                    data = source.recv(65536)
+                    if not data:
+                        return
+                    target.sendall(data)
+
+
+class StubProxyConfig:
+    def __init__(self, latency_ms=0, error_rate=0.0, block_rate=0.0, timeout=30, seed=None, verbose=False) -> None:
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.block_rate = block_rate
+        self.timeout = timeout
+        self.verbose = verbose
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def roll(self):
+        with self.lock:
+            return self.random.random()
+
+    def delay(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+
+class StubProxy:
+    """A stub proxy running in a background thread, for use from benchmarks"""
+
+    def __init__(self, host="127.0.0.1", port=0, **options) -> None:
+        self.httpd = ThreadingHTTPServer((host, port), StubProxyHandler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.httpd.config = StubProxyConfig(**options)
+        self.thread = None
+
+    @property
+    def config(self):
+        return self.httpd.config
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="stub-proxy", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency-ms", type=float, default=0, help="added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of connections closed without an answer")
+    parser.add_argument("--block-rate", type=float, default=0.0, help="fraction of requests answered with /sorry/ or 429")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    proxy = StubProxy(
+        args.host,
+        args.port,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        block_rate=args.block_rate,
+        seed=args.seed,
+        verbose=args.verbose,
+    )
+    print(f"Stub proxy listening on {proxy.url}")
+    print(f'Add "{proxy.url}" to PROXIES in settings.py to send traffic through it')
+    try:
+        proxy.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy.httpd.server_close()
+        print(f"Requests handled: {proxy.config.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -28,9 +28,7 @@ import os
 RAILWAY_ENVIRONMENT = os.environ.get('RAILWAY_ENVIRONMENT', False)
 HEADLESS_MODE = 1 if RAILWAY_ENVIRONMENT else 0
 
-# Memory optimization for Railway
-MAX_MEMORY_USAGE = 80  # Percentage
-MEMORY_CHECK_INTERVAL = 30  # Seconds
+# The memory limits of the browser (MAX_MEMORY_USAGE, MEMORY_CHECK_INTERVAL...) are set in settings.py
 
 # Railway-specific timeouts
 RAILWAY_TIMEOUT = 300  # 5 minutes
@@ -1,7 +1,51 @@
-from scraper.frontend import Frontend
+import argparse
+from settings import BATCH_WORKERS
+
+
+class ConsoleFrontend:
+    """Frontend used by the command line batch mode, prints messages to the console"""
+
+    def __init__(self, output_format):
+        self.outputFormatValue = output_format
+
+    def messageshowing(self, message):
+        print(f"• {message}")
+
+    def end_processing(self):
+        pass
+
+
+def run_batch(args):
+    from scraper.communicator import Communicator
+    from scraper.batch import BatchRunner, queries_from_csv
+
+    with open(args.batch, encoding="utf-8-sig") as f:
+        queries = queries_from_csv(f.read())
+
+    Communicator.set_frontend_object(ConsoleFrontend(args.format))
+    runner = BatchRunner(queries, args.format, headless_mode=1, workers=args.workers, fields=args.fields)
+    runner.run()
+
+    for stats in runner.progress()["queries"]:
+        print(
+            f"{stats['status']:>9}  {stats['records']:>4} records  "
+            f"{stats['duplicate_links']:>4} duplicates  {stats['query']}"
+        )
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Google Maps scraper")
+    parser.add_argument("--batch", help="CSV file of queries to scrape without the GUI")
+    parser.add_argument("--format", default="csv", choices=["excel", "csv", "json"])
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="browsers used by a batch")
+    parser.add_argument("--fields", default=None, help="comma separated output fields, e.g. name,phone,address,email")
+    args = parser.parse_args()
+
+    if args.batch:
+        run_batch(args)
+        return
+
+    from scraper.frontend import Frontend
 
     app = Frontend()
     app.root.protocol("WM_DELETE_WINDOW", app.closingbrowser)
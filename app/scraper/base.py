@@ -1,31 +1,97 @@
 from selenium.webdriver.support.ui import WebDriverWait
+import time
 from time import sleep
 from selenium.webdriver.support import expected_conditions as Ec
 from selenium.common.exceptions import (
     WebDriverException
 )
 from .common import Common
+from .cancellation import is_cancelled
+from .retry import NAVIGATION_POLICY, NAVIGATION_BREAKER, BLOCKED_URL_MARKER, BlockedError, NavigationError, browser_gone, classify
+from .rate_limit import GOOGLE_RATE_LIMITER
+from .proxy_pool import PROXY_POOL, proxy_of, egress_of
+from . import metrics
 
 
 class Base:
     timeout = 120
+    # CancellationToken of the job, see scraper.cancellation
+    cancellation = None
+
+    @property
+    def egress(self):
+        """Egress identity (proxy) the driver's requests go out through, see scraper.rate_limit"""
+        return egress_of(getattr(self, "driver", None))
+
+    def cancelled(self):
+        return is_cancelled(self.cancellation)
+
+    def pause(self, seconds):
+        """sleep() that ends early when the job is cancelled"""
+        if self.cancellation is not None:
+            self.cancellation.wait(seconds)
+        else:
+            sleep(seconds)
 
     def openingurl(self, url: str):
         """
-        To avoid internet connection error while requesting"""
+        Open url, retrying failed navigations with backoff (see scraper.retry).
+        Raises NavigationError when the attempts are used up or the error cannot be retried,
+        with reason "browser_gone" when the driver cannot navigate anymore"""
 
+        attempt = 0
         while True:
             if Common.close_thread_is_set():
                 self.driver.quit()
+                PROXY_POOL.release_driver(self.driver)
                 return
 
+            permit = NAVIGATION_BREAKER.acquire(self.cancellation)
+            if permit is None or self.cancelled():
+                NAVIGATION_BREAKER.release(permit)
+                return
+
+            attempt += 1
+            proxy = proxy_of(self.driver)
             try:
+                # Wait for our turn among all jobs once the breaker lets us through, so a blocked
+                # or cancelled navigation uses up no rate. Raises DailyBudgetExceeded
+                if not GOOGLE_RATE_LIMITER.acquire(self.egress, self.cancellation):
+                    return
+                started = time.perf_counter()
                 self.driver.get(url)
-            except WebDriverException:
-                sleep(5)
+                if BLOCKED_URL_MARKER in self.driver.current_url:
+                    raise BlockedError(f"Google answered {url} with its unusual traffic page")
+            except (WebDriverException, BlockedError) as e:
+                reason = classify(e)
+                if reason is None:
+                    metrics.RETRY_GIVEUPS.inc(operation="openingurl")
+                    reason = "browser_gone" if browser_gone(e) else "fatal"
+                    raise NavigationError(f"Could not open {url}: {str(e).strip()}", reason, retryable=False)
+
+                NAVIGATION_BREAKER.record(False, permit)
+                permit = None
+                PROXY_POOL.record(proxy, False, blocked=reason == "blocked")
+                if not NAVIGATION_POLICY.should_retry(attempt):
+                    metrics.RETRY_GIVEUPS.inc(operation="openingurl")
+                    raise NavigationError(
+                        f"Could not open {url} after {attempt} attempts ({reason}): {str(e).strip()}",
+                        reason,
+                        retryable=True,
+                    )
+
+                metrics.RETRIES.inc(operation="openingurl", reason=reason)
+                self.pause(NAVIGATION_POLICY.delay(attempt))
                 continue
             else:
+                NAVIGATION_BREAKER.record(True, permit)
+                permit = None
+                PROXY_POOL.record(proxy, True, latency=time.perf_counter() - started)
                 break
+            finally:
+                # Calls that end without an outcome (fatal errors, a dead chromedriver...) give
+                # the permit back, or a half open breaker would wait for its probe forever
+                NAVIGATION_BREAKER.release(permit)
 
     def findelementwithwait(self, by, value):
         """we will use this function to find an element"""
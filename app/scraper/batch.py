@@ -0,0 +1,283 @@
+"""
+Batch jobs: many search queries scraped over a shared pool of browsers,
+merged into one deduplicated output file
+"""
+
+import csv
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from scraper.cancellation import is_cancelled
+from scraper.communicator import Communicator
+from scraper.datasaver import DataSaver
+from scraper.driver_pool import DriverPool
+from scraper.grid import GridPlanner, place_id_from_url
+from scraper.fields import select_fields
+from scraper.improved_scraper import ImprovedBackend
+from scraper import metrics
+from scraper.tracing import span, submit_in_context
+from settings import BATCH_WORKERS, BATCH_MAX_WORKERS, BATCH_MAX_QUERIES, MAPS_BASE_URL
+
+QUERY_COLUMNS = ("query", "search_query", "keyword", "search")
+LOCATION_COLUMNS = ("location", "city", "area")
+
+
+class BatchQuery:
+    def __init__(self, query, area=None) -> None:
+        self.query = query
+        self.area = area
+
+        self.status = "pending"
+        self.error = None
+        self.links_found = 0
+        self.duplicate_links = 0
+        self.records = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def stats(self):
+        duration = None
+        if self.started_at is not None:
+            duration = round((self.finished_at or time.time()) - self.started_at, 1)
+
+        return {
+            "query": self.query,
+            "status": self.status,
+            "links_found": self.links_found,
+            "duplicate_links": self.duplicate_links,
+            "records": self.records,
+            "duration_seconds": duration,
+            "error": self.error,
+        }
+
+
+def build_query(query, location=None):
+    query = " ".join(str(query).split())
+    if location:
+        location = " ".join(str(location).split())
+        if location:
+            query = f"{query} in {location}"
+    return query
+
+
+def queries_from_list(items):
+    """
+    Build batch queries from the JSON payload. Each item is either a plain query
+    string or an object with "query" and optional "location" / "area" keys.
+    """
+
+    queries = []
+    for item in items:
+        if isinstance(item, str):
+            query, location, area = item, None, None
+        elif isinstance(item, dict):
+            query = item.get("query") or item.get("search_query")
+            location = item.get("location")
+            area = item.get("area")
+        else:
+            raise ValueError(f"Unsupported query item: {item!r}")
+
+        if area is not None:
+            # Reject invalid or oversized areas before the batch starts
+            try:
+                GridPlanner.from_area(area).plan()
+            except (TypeError, KeyError, AttributeError) as e:
+                raise ValueError(f"Invalid search area {area!r}: {e}")
+
+        if query and str(query).strip():
+            queries.append(BatchQuery(build_query(query, location), area=area))
+    return queries
+
+
+def queries_from_csv(text):
+    """
+    Build batch queries from CSV text. The file may have a header with a query
+    column (query, search_query, keyword or search), an optional location column
+    and optional lat, lng and radius_km columns for a grid search. Files without
+    a recognised header use the first column as the query and the second as location.
+    """
+
+    rows = list(csv.reader(io.StringIO(text)))
+    rows = [row for row in rows if any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+
+    header = [cell.strip().lower() for cell in rows[0]]
+    query_column = next((header.index(c) for c in QUERY_COLUMNS if c in header), None)
+
+    if query_column is None:
+        return queries_from_list(
+            {"query": row[0], "location": row[1] if len(row) > 1 else None}
+            for row in rows
+        )
+
+    location_column = next((header.index(c) for c in LOCATION_COLUMNS if c in header), None)
+
+    def cell(row, name):
+        if name in header and header.index(name) < len(row):
+            return row[header.index(name)].strip()
+        return ""
+
+    items = []
+    for row in rows[1:]:
+        if query_column >= len(row):
+            continue
+
+        item = {"query": row[query_column]}
+        if location_column is not None and location_column < len(row):
+            item["location"] = row[location_column]
+
+        lat, lng, radius = cell(row, "lat"), cell(row, "lng"), cell(row, "radius_km")
+        if lat and lng and radius:
+            item["area"] = {"center": [float(lat), float(lng)], "radius_km": float(radius)}
+
+        items.append(item)
+
+    return queries_from_list(items)
+
+
+class BatchRunner:
+    def __init__(self, queries, output_format, headless_mode, workers=BATCH_WORKERS, name=None, base_url=MAPS_BASE_URL, fields=None, cancellation=None) -> None:
+        if len(queries) == 0:
+            raise ValueError("A batch needs at least one query")
+        if len(queries) > BATCH_MAX_QUERIES:
+            raise ValueError(f"A batch can contain at most {BATCH_MAX_QUERIES} queries")
+
+        self.queries = queries
+        self.output_format = output_format
+        self.headless_mode = headless_mode
+        self.workers = max(1, min(workers, len(queries), BATCH_MAX_WORKERS))
+        self.name = name or f"batch {time.strftime('%Y-%m-%d %H-%M-%S')}"
+        self.base_url = base_url
+        self.fields = select_fields(fields)
+        # CancellationToken of the batch, see scraper.cancellation
+        self.cancellation = cancellation
+
+        self.lock = threading.Lock()
+        self.claimed_places = set()
+        self.records_by_place = {}
+        self.output_file = None
+
+    def run(self):
+        """Scrape every query and save the merged records. Returns the output file path"""
+
+        Communicator.show_message(
+            f"Starting batch of {len(self.queries)} queries with {self.workers} browser(s)"
+        )
+
+        pool = DriverPool(partial(ImprovedBackend.build_driver, self.headless_mode), self.workers)
+        if self.cancellation is not None:
+            # Free every browser as soon as the batch is cancelled, the records so far are still saved
+            self.cancellation.on_cancel(pool.close_all)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for item in self.queries:
+                    metrics.QUEUE_DEPTH.inc()
+                    submit_in_context(executor, self.run_query, item, pool)
+        finally:
+            pool.close_all()
+
+        records = list(self.records_by_place.values())
+        Communicator.show_message(
+            f"Batch finished: {len(records)} unique records from {len(self.queries)} queries"
+        )
+        if records:
+            self.output_file = DataSaver().save(datalist=records, search_query=self.name, fields=self.fields)
+        return self.output_file
+
+    def run_query(self, item, pool):
+        metrics.QUEUE_DEPTH.dec()
+        if is_cancelled(self.cancellation):
+            item.status = "cancelled"
+            return
+
+        item.status = "running"
+        item.started_at = time.time()
+        driver = None
+        try:
+            driver = pool.acquire()
+            Communicator.show_message(f"Batch: scraping '{item.query}'")
+
+            backend = ImprovedBackend(
+                item.query,
+                self.output_format,
+                self.headless_mode,
+                area=item.area,
+                grid_workers=1,
+                driver=driver,
+                save_results=False,
+                link_filter=partial(self.claim_links, item),
+                base_url=self.base_url,
+                fields=self.fields,
+                cancellation=self.cancellation,
+            )
+            with span("batch_query", query=item.query):
+                backend.mainscraping()
+            item.records = self.add_records(backend.results())
+            item.status = "cancelled" if is_cancelled(self.cancellation) else "completed"
+
+        except Exception as e:
+            if is_cancelled(self.cancellation):
+                item.status = "cancelled"
+                return
+            metrics.FAILURES.inc(phase="batch_query")
+            item.status = "failed"
+            item.error = str(e)
+            Communicator.show_message(f"Batch: query '{item.query}' failed. Error: {str(e)}")
+
+        finally:
+            item.finished_at = time.time()
+            if driver is not None:
+                pool.release(driver, discard=not self.driver_is_alive(driver))
+
+    def claim_links(self, item, links):
+        """Drop links to places another query of this batch already took"""
+
+        item.links_found = len(links)
+        kept = []
+        with self.lock:
+            for link in links:
+                place_id = place_id_from_url(link)
+                if place_id in self.claimed_places:
+                    item.duplicate_links += 1
+                    continue
+                self.claimed_places.add(place_id)
+                kept.append(link)
+        return kept
+
+    def add_records(self, records):
+        added = 0
+        with self.lock:
+            for record in records:
+                url = record.get("Google Maps URL") or ""
+                key = place_id_from_url(url) if url else id(record)
+                if key not in self.records_by_place:
+                    self.records_by_place[key] = record
+                    added += 1
+        return added
+
+    def driver_is_alive(self, driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def progress(self):
+        counts = {}
+        for item in self.queries:
+            counts[item.status] = counts.get(item.status, 0) + 1
+
+        finished = sum(counts.get(s, 0) for s in ("completed", "failed", "cancelled"))
+        return {
+            "name": self.name,
+            "total_queries": len(self.queries),
+            "finished_queries": finished,
+            "percent": round(100 * finished / len(self.queries), 1),
+            "status_counts": counts,
+            "unique_records": len(self.records_by_place),
+            "output_file": self.output_file,
+            "queries": [item.stats() for item in self.queries],
+        }
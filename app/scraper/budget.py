@@ -0,0 +1,105 @@
+"""
+Result count target and time budget of a scraping job.
+
+A job started with max_results stops scrolling once that many unique places
+were collected and parses only those. A job started with a deadline splits its
+time between the phases: scrolling stops when it used its share of the deadline
+or when more links were collected than can be parsed in the time left, places
+are parsed while time remains, and email lookups (the slowest part of parsing a
+place) are only done when they still fit after the places left to parse.
+Whatever was parsed when time runs out is saved as usual.
+"""
+
+import time
+from settings import BUDGET_SCROLL_SHARE, BUDGET_PLACE_SECONDS, BUDGET_SAVE_RESERVE
+
+
+class JobBudget:
+    def __init__(self, max_results=None, deadline=None) -> None:
+        """
+        max_results: number of places wanted, None for all of them
+        deadline: seconds the whole job may take, None for no limit
+        """
+        if max_results is not None and max_results < 1:
+            raise ValueError("max_results must be at least 1")
+        if deadline is not None and deadline <= 0:
+            raise ValueError("deadline must be a positive number of seconds")
+
+        self.max_results = max_results
+        self.deadline = deadline
+        self.started = time.monotonic()
+
+        # Moving averages of the measured cost of a place and of an email lookup
+        self.place_seconds = None
+        self.email_seconds = None
+
+        self.emails_skipped = 0
+        self.places_skipped = 0
+        self.stop_reason = None
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self):
+        """Seconds left before results must be saved, None when there is no deadline"""
+        if self.deadline is None:
+            return None
+        return self.deadline - self.elapsed() - BUDGET_SAVE_RESERVE
+
+    def expired(self):
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def place_estimate(self):
+        return self.place_seconds if self.place_seconds is not None else BUDGET_PLACE_SECONDS
+
+    def enough_links(self, count):
+        return self.max_results is not None and count >= self.max_results
+
+    def scroll_time_up(self, links_collected):
+        """True when scrolling should stop to leave time for parsing"""
+        if self.deadline is None:
+            return False
+        if self.elapsed() >= self.deadline * BUDGET_SCROLL_SHARE:
+            return True
+        # More links than can be parsed in the time left
+        return links_collected * self.place_estimate() >= self.remaining()
+
+    def trim(self, items):
+        if self.max_results is None:
+            return items
+        return items[:self.max_results]
+
+    def observe(self, kind, seconds):
+        """Record the measured cost of a "place" or an "email" lookup"""
+        attribute = f"{kind}_seconds"
+        previous = getattr(self, attribute)
+        setattr(self, attribute, seconds if previous is None else 0.7 * previous + 0.3 * seconds)
+
+    def should_lookup_email(self, places_left):
+        """Look up an email only if the places left to parse still fit in the time after it"""
+        remaining = self.remaining()
+        if remaining is None:
+            return True
+
+        email_estimate = self.email_seconds if self.email_seconds is not None else 0
+        if remaining >= places_left * self.place_estimate() + email_estimate:
+            return True
+
+        self.emails_skipped += 1
+        return False
+
+    def stop(self, reason, places_skipped=0):
+        if self.stop_reason is None:
+            self.stop_reason = reason
+        self.places_skipped += places_skipped
+
+    def stats(self):
+        return {
+            "max_results": self.max_results,
+            "deadline_seconds": self.deadline,
+            "elapsed_seconds": round(self.elapsed(), 1),
+            "stop_reason": self.stop_reason,
+            "places_skipped": self.places_skipped,
+            "emails_skipped": self.emails_skipped,
+        }
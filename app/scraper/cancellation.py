@@ -0,0 +1,60 @@
+"""
+Cancellation of a single job.
+
+A CancellationToken is handed to the backend of a job and checked wherever the
+scraper already stopped for Common.closeThread (which still stops every job of
+the process, e.g. when the desktop window closes). Cancelling runs the
+callbacks registered by the job, which quit its browser right away, and the
+scraper then saves what was parsed so far.
+"""
+
+import threading
+from scraper.common import Common
+from scraper.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class CancellationToken:
+    def __init__(self, job_id=None) -> None:
+        self.job_id = job_id
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.reason = None
+        self.callbacks = []
+
+    def cancel(self, reason="cancelled"):
+        """Cancel the job. Returns False when it was already cancelled"""
+        with self.lock:
+            if self.event.is_set():
+                return False
+            self.reason = reason
+            self.event.set()
+            callbacks, self.callbacks = self.callbacks, []
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning("Cancellation callback of job %s failed: %s", self.job_id, e)
+        return True
+
+    def is_cancelled(self):
+        return self.event.is_set()
+
+    def on_cancel(self, callback):
+        """Run callback when the job is cancelled, right away if it already was"""
+        with self.lock:
+            if not self.event.is_set():
+                self.callbacks.append(callback)
+                return
+        callback()
+
+    def wait(self, seconds):
+        """Sleep that ends early on cancellation. Returns True when cancelled"""
+        return self.event.wait(seconds)
+
+
+def is_cancelled(token):
+    """True when the job of token was cancelled or every job is being closed"""
+    return Common.close_thread_is_set() or (token is not None and token.is_cancelled())
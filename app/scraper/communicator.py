@@ -1,3 +1,6 @@
+from scraper.log import get_logger
+
+logger = get_logger(__name__)
 
 
 class Communicator:
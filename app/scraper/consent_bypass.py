@@ -6,7 +6,10 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException
-from app.scraper.communicator import Communicator
+from scraper.communicator import Communicator
+from scraper.log import get_logger
+
+logger = get_logger(__name__)
 
 class ConsentBypass:
     def __init__(self, driver):
@@ -23,7 +26,7 @@ class ConsentBypass:
             return True  # No consent page detected
         
         Communicator.show_message("Detected consent page, using aggressive bypass...")
-        print("DEBUG: Detected consent page, using aggressive bypass")
+        logger.debug("Detected consent page, using aggressive bypass")
         
         # Strategy 1: Multiple bypass URLs
         bypass_urls = [
@@ -38,7 +41,7 @@ class ConsentBypass:
         for i, url in enumerate(bypass_urls):
             try:
                 Communicator.show_message(f"Trying bypass URL {i+1}/{len(bypass_urls)}")
-                print(f"DEBUG: Trying bypass URL {i+1}: {url}")
+                logger.debug("Trying bypass URL %s: %s", i + 1, url)
                 
                 self.driver.get(url)
                 time.sleep(2)
@@ -46,21 +49,21 @@ class ConsentBypass:
                 current_url = self.driver.current_url
                 page_title = self.driver.title
                 
-                print(f"DEBUG: After URL {i+1} - URL: {current_url}, Title: {page_title}")
+                logger.debug("After URL %s - URL: %s, Title: %s", i + 1, current_url, page_title)
                 
                 if "consent.google.com" not in current_url and "Voordat je verdergaat" not in page_title:
                     Communicator.show_message(f"Successfully bypassed consent with URL {i+1}!")
-                    print(f"DEBUG: Successfully bypassed consent with URL {i+1}!")
+                    logger.debug("Successfully bypassed consent with URL %s", i + 1)
                     return True
                     
             except Exception as e:
                 Communicator.show_message(f"Bypass URL {i+1} failed: {str(e)}")
-                print(f"DEBUG: Bypass URL {i+1} failed: {str(e)}")
+                logger.debug("Bypass URL %s failed: %s", i + 1, e)
                 continue
         
         # Strategy 2: Quick button detection
         Communicator.show_message("All bypass URLs failed, trying quick button detection...")
-        print("DEBUG: All bypass URLs failed, trying quick button detection")
+        logger.debug("All bypass URLs failed, trying quick button detection")
         
         try:
             wait = WebDriverWait(self.driver, 2)  # 2 second timeout per selector
@@ -85,20 +88,20 @@ class ConsentBypass:
                     
                     if button and button.is_displayed():
                         Communicator.show_message(f"Found consent button: {selector}")
-                        print(f"DEBUG: Found consent button: {selector}")
+                        logger.debug("Found consent button: %s", selector)
                         
                         # Try to click
                         try:
                             button.click()
                             Communicator.show_message("Consent button clicked!")
-                            print("DEBUG: Consent button clicked!")
+                            logger.debug("Consent button clicked")
                             time.sleep(2)
                             return True
                         except:
                             try:
                                 self.driver.execute_script("arguments[0].click();", button)
                                 Communicator.show_message("Consent button clicked via JavaScript!")
-                                print("DEBUG: Consent button clicked via JavaScript!")
+                                logger.debug("Consent button clicked via JavaScript")
                                 time.sleep(2)
                                 return True
                             except:
@@ -111,11 +114,11 @@ class ConsentBypass:
                     
         except Exception as e:
             Communicator.show_message(f"Quick button detection failed: {str(e)}")
-            print(f"DEBUG: Quick button detection failed: {str(e)}")
+            logger.debug("Quick button detection failed: %s", e)
         
         # Strategy 3: Force navigation
         Communicator.show_message("Trying force navigation...")
-        print("DEBUG: Trying force navigation")
+        logger.debug("Trying force navigation")
         
         try:
             # Try to navigate directly to the search results
@@ -126,14 +129,14 @@ class ConsentBypass:
             current_url = self.driver.current_url
             if "consent.google.com" not in current_url:
                 Communicator.show_message("Force navigation successful!")
-                print("DEBUG: Force navigation successful!")
+                logger.debug("Force navigation successful")
                 return True
                 
         except Exception as e:
             Communicator.show_message(f"Force navigation failed: {str(e)}")
-            print(f"DEBUG: Force navigation failed: {str(e)}")
+            logger.debug("Force navigation failed: %s", e)
         
         Communicator.show_message("All consent bypass strategies failed, proceeding anyway...")
-        print("DEBUG: All consent bypass strategies failed, proceeding anyway")
+        logger.warning("All consent bypass strategies failed, proceeding anyway")
         return False
 
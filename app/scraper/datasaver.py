@@ -3,7 +3,9 @@ This module contain the code for saving the scraped data
 """
 
 
-import pandas as pd
+import time
+from scraper import metrics
+from scraper.tracing import span
 from scraper.communicator import Communicator
 from settings import OUTPUT_PATH
 import os
@@ -13,20 +15,30 @@ class DataSaver:
     def __init__(self) -> None:
         self.outputFormat = Communicator.get_output_format()
 
-    def save(self, datalist):
+    def save(self, datalist, search_query=None, fields=None):
         """
         This function will save the data that has been scrapped.
         This can be call if any error occurs while scraping , or if scraping is done successfully.
         In both cases we have to save the scraped data.
+
+        search_query: name used for the output file, defaults to the query of the running backend
+        fields: columns of the output, in order (see scraper.fields). Defaults to the keys of the records
         """
+        with span("save", records=len(datalist)):
+            return self.save_records(datalist, search_query, fields)
 
+    def save_records(self, datalist, search_query=None, fields=None):
         if len(datalist) > 0:
+            save_started = time.perf_counter()
             Communicator.show_message("Saving the scraped data")
 
-            dataFrame = pd.DataFrame(datalist)
+            # pandas is slow to import, load it only when there is something to save
+            import pandas as pd
+
+            dataFrame = pd.DataFrame(datalist, columns=fields)
             totalRecords = dataFrame.shape[0]
 
-            searchQuery = Communicator.get_search_query()
+            searchQuery = search_query or Communicator.get_search_query()
             filename = f"{searchQuery} - GMS output"
 
             if self.outputFormat == "excel":
@@ -62,6 +74,8 @@ class DataSaver:
                 dataFrame.to_json(joinedPath, indent=4, orient="records")
 
             Communicator.show_message(f"Hurrah! Scraped data successfully saved! Total records saved: {totalRecords}. If you're loving this free tool, consider fueling us with a coffee! Your support helps us keep democratizing automation. ☕️ Support us here: https://www.buymeacoffee.com/zubdata")
+            metrics.observe_phase("save", save_started)
+            return joinedPath
             
         else:
             Communicator.show_error_message("Oops! Could not scrape the data because you did not scrape any record.",{ERROR_CODES['NO_RECORD_TO_SAVE']})
@@ -0,0 +1,135 @@
+"""
+On-disk cache of the chromedriver resolved for the installed Chrome.
+
+Resolving a driver means running `chrome --version`, letting
+undetected_chromedriver download and patch a chromedriver and, when that
+fails, asking webdriver_manager for one. The cache keeps a copy of the patched
+driver that last worked together with the Chrome version it was made for, keyed
+by the size and modification time of the Chrome binary. New drivers start from
+the cached copy without a subprocess or a download, and the cache is rebuilt
+only after Chrome was updated or the cached driver failed to start.
+"""
+
+import json
+import os
+import shutil
+import stat
+import subprocess
+import re
+import threading
+from scraper import metrics
+from settings import CHROME_BINARY_PATH, DRIVER_CACHE_PATH
+
+CACHE_FILE = "driver_cache.json"
+
+
+def binary_signature(path):
+    """Cheap identity of a file: its real path, size and modification time"""
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return {"path": os.path.realpath(path), "size": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+
+def read_chrome_version(binary):
+    output = subprocess.check_output([binary, "--version"]).decode().strip()
+    match = re.search(r"(\d+)\.(\d+)\.(\d+)\.(\d+)", output)
+    if match is None:
+        raise ValueError(f"Unexpected Chrome version output: {output}")
+    return match.group(0)
+
+
+class DriverCache:
+    lock = threading.Lock()
+
+    def __init__(self, chrome_binary=CHROME_BINARY_PATH, path=DRIVER_CACHE_PATH) -> None:
+        self.chrome_binary = chrome_binary
+        self.path = path
+        self.cache_file = os.path.join(path, CACHE_FILE)
+
+    def read(self):
+        try:
+            with open(self.cache_file, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write(self, entry):
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        temporary = self.cache_file + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=2)
+        os.replace(temporary, self.cache_file)
+
+    def chrome_version(self):
+        """
+        Full Chrome version, e.g. "141.0.7390.54". Read from the cache while the
+        Chrome binary is unchanged, otherwise from `chrome --version`.
+        """
+        entry = self.read()
+        signature = binary_signature(self.chrome_binary)
+        if signature is not None and entry.get("chrome") == signature and entry.get("version"):
+            return entry["version"]
+
+        version = read_chrome_version(self.chrome_binary)
+        with self.lock:
+            # Remember the version, the driver is recorded once it started successfully
+            self.write({"chrome": signature, "version": version})
+        return version
+
+    def lookup(self):
+        """Path of the cached patched driver, or None when there is none for the installed Chrome"""
+        entry = self.read()
+        driver = entry.get("driver")
+        if not driver:
+            metrics.DRIVER_CACHE.inc(result="miss")
+            return None
+
+        if entry.get("chrome") != binary_signature(self.chrome_binary):
+            metrics.DRIVER_CACHE.inc(result="stale")
+            return None
+
+        signature = binary_signature(driver["path"])
+        if signature is None or signature["size"] != driver["size"] or not os.access(driver["path"], os.X_OK):
+            metrics.DRIVER_CACHE.inc(result="stale")
+            return None
+
+        metrics.DRIVER_CACHE.inc(result="hit")
+        return driver["path"]
+
+    def store(self, driver, version):
+        """Keep a copy of the patched driver executable of a driver that started successfully"""
+        source = getattr(getattr(driver, "patcher", None), "executable_path", None)
+        if not source or not os.path.exists(source):
+            return None
+
+        with self.lock:
+            entry = self.read()
+            cached = entry.get("driver") or {}
+            if cached.get("path") == os.path.realpath(source):
+                return cached["path"]
+
+            if not os.path.exists(self.path):
+                os.makedirs(self.path)
+            extension = ".exe" if source.endswith(".exe") else ""
+            target = os.path.realpath(os.path.join(self.path, f"chromedriver-{version}{extension}"))
+            if os.path.realpath(source) != target:
+                shutil.copy2(source, target + ".tmp")
+                os.replace(target + ".tmp", target)
+            os.chmod(target, os.stat(target).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+            signature = binary_signature(target)
+            self.write({
+                "chrome": binary_signature(self.chrome_binary),
+                "version": version,
+                "driver": {"path": target, "size": signature["size"]},
+            })
+            return target
+
+    def invalidate(self):
+        with self.lock:
+            entry = self.read()
+            entry.pop("driver", None)
+            self.write(entry)
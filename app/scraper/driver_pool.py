@@ -0,0 +1,112 @@
+"""
+Pool of Chrome drivers shared between concurrent scraping tasks
+"""
+
+import queue
+import threading
+from contextlib import contextmanager
+from scraper.communicator import Communicator
+from scraper.proxy_pool import PROXY_POOL, proxy_of
+
+
+class DriverPool:
+    def __init__(self, factory, size, drivers=None) -> None:
+        """
+        params:
+
+        factory: callable that creates a new, ready to use driver
+        size: maximum number of drivers alive at the same time
+        drivers: already created drivers that should be handed out first
+        """
+
+        self.factory = factory
+        self.size = max(1, size)
+        self.lock = threading.Lock()
+        self.idle = queue.Queue()
+        self.all_drivers = []
+
+        for driver in drivers or []:
+            self.all_drivers.append(driver)
+            self.idle.put(driver)
+
+    def acquire(self, timeout=None):
+        """Get an idle driver, creating a new one while the pool is not full"""
+
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            can_create = len(self.all_drivers) < self.size
+            if can_create:
+                # Reserve the slot before the (slow) driver startup
+                self.all_drivers.append(None)
+
+        if can_create:
+            try:
+                driver = self.factory()
+            except Exception:
+                with self.lock:
+                    self.all_drivers.remove(None)
+                raise
+
+            with self.lock:
+                self.all_drivers[self.all_drivers.index(None)] = driver
+            Communicator.show_message(f"Browser pool: started browser {len(self.all_drivers)} of {self.size}")
+            return driver
+
+        return self.idle.get(timeout=timeout)
+
+    def release(self, driver, discard=False):
+        """Give a driver back to the pool. Broken drivers should be discarded"""
+
+        if not discard and PROXY_POOL.is_ejected(proxy_of(driver)):
+            # Its proxy was ejected, the next task gets a browser on a healthy one
+            discard = True
+
+        if not discard:
+            self.idle.put(driver)
+            return
+
+        with self.lock:
+            if driver in self.all_drivers:
+                self.all_drivers.remove(driver)
+        try:
+            driver.quit()
+        except:
+            pass
+        PROXY_POOL.release_driver(driver)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        driver = self.acquire(timeout=timeout)
+        try:
+            yield driver
+        except Exception:
+            self.release(driver, discard=True)
+            raise
+        else:
+            self.release(driver)
+
+    def close_all(self, keep=()):
+        """Quit every pooled driver except the ones listed in keep"""
+
+        with self.lock:
+            drivers = [d for d in self.all_drivers if d is not None]
+            self.all_drivers = [d for d in drivers if d in keep]
+
+        while True:
+            try:
+                self.idle.get_nowait()
+            except queue.Empty:
+                break
+
+        for driver in drivers:
+            if driver in keep:
+                continue
+            try:
+                driver.quit()
+            except:
+                pass
+            PROXY_POOL.release_driver(driver)
@@ -0,0 +1,285 @@
+"""
+Email lookup on the website of a place.
+
+The homepage is fetched first and its mailto: links and text are searched.
+When it has no email, its links are ranked by how likely they lead to a contact
+page (contact, impressum, about...) and the best few are fetched concurrently;
+the lookup stops at the first page with an email. Requests to one domain are
+spaced by EMAIL_DOMAIN_DELAY and limited to EMAIL_DOMAIN_CONCURRENCY at a time,
+across all the lookups of the process, and a whole lookup stays within
+EMAIL_SITE_BUDGET seconds.
+"""
+
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import requests
+from bs4 import BeautifulSoup
+from scraper import metrics
+from scraper.cancellation import is_cancelled
+from scraper.tracing import span, submit_in_context
+from scraper.log import get_logger
+from scraper.proxy_pool import PROXY_POOL
+from settings import (
+    EMAIL_MAX_PAGES,
+    EMAIL_CRAWL_WORKERS,
+    EMAIL_SITE_BUDGET,
+    EMAIL_DOMAIN_DELAY,
+    EMAIL_DOMAIN_CONCURRENCY,
+)
+
+logger = get_logger(__name__)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
+}
+EMAIL_PATTERN = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+VALID_EMAIL = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,}$")
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp")
+
+# Words in the path or text of a link, and how likely the page holds an email
+CONTACT_HINTS = (
+    ("contact", 10),
+    ("kontakt", 10),
+    ("contacto", 10),
+    ("impressum", 9),
+    ("imprint", 9),
+    ("mentions-legales", 8),
+    ("about", 6),
+    ("uber-uns", 6),
+    ("ueber-uns", 6),
+    ("team", 4),
+    ("legal", 3),
+    ("support", 3),
+)
+# Tried when the homepage links give no candidate
+FALLBACK_PATHS = ("/contact", "/contact-us", "/impressum", "/about")
+SKIPPED_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".zip", ".doc", ".docx")
+
+
+def emails_in(text):
+    """Valid email addresses of text, in order of appearance and without duplicates"""
+    found = []
+    for email in EMAIL_PATTERN.findall(text or ""):
+        if VALID_EMAIL.match(email) and not email.lower().endswith(IMAGE_SUFFIXES) and email not in found:
+            found.append(email)
+    return found
+
+
+def page_emails(html):
+    """Emails of the mailto: links of a page (usually its footer) first, then of its text"""
+    soup = BeautifulSoup(html, "html.parser")
+    found = []
+    for link in soup.select("a[href^='mailto:' i]"):
+        address = urllib.parse.unquote(link["href"][len("mailto:"):].split("?")[0])
+        for email in emails_in(address):
+            if email not in found:
+                found.append(email)
+    for email in emails_in(html):
+        if email not in found:
+            found.append(email)
+    return found, soup
+
+
+def contact_candidates(soup, base_url, limit):
+    """Links of the page to the same site, best contact page candidates first"""
+    base = urllib.parse.urlsplit(base_url)
+    scored = {}
+    for link in soup.find_all("a", href=True):
+        url = urllib.parse.urljoin(base_url, link["href"].strip())
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https") or parts.netloc.lower() != base.netloc.lower():
+            continue
+        path = parts.path.lower()
+        if path.endswith(SKIPPED_EXTENSIONS) or path.rstrip("/") == base.path.lower().rstrip("/"):
+            continue
+
+        text = (path + " " + link.get_text(" ", strip=True).lower()).replace("_", "-")
+        score = max((weight for hint, weight in CONTACT_HINTS if hint in text), default=0)
+        if score == 0:
+            continue
+        # One request per page: /Contact/ and /contact are the same candidate
+        key = path.rstrip("/")
+        if key not in scored or scored[key][0] < score:
+            scored[key] = (score, urllib.parse.urlunsplit((parts.scheme, parts.netloc, parts.path, parts.query, "")))
+
+    ranked = sorted(scored.values(), key=lambda candidate: -candidate[0])
+    if not ranked:
+        root = f"{base.scheme}://{base.netloc}"
+        return [root + path for path in FALLBACK_PATHS][:limit]
+    return [url for _, url in ranked[:limit]]
+
+
+class DomainPoliteness:
+    """Spacing and concurrency limit of the requests to each domain"""
+
+    def __init__(self, delay=EMAIL_DOMAIN_DELAY, concurrency=EMAIL_DOMAIN_CONCURRENCY) -> None:
+        self.delay = delay
+        self.concurrency = concurrency
+        self.lock = threading.Lock()
+        self.slots = {}  # domain -> semaphore
+        self.users = {}  # domain -> fetches holding or waiting for one of its slots
+        self.next_start = {}  # domain -> earliest time.monotonic() of its next request
+
+    def acquire(self, domain, deadline, cancellation=None):
+        """Wait for a turn to request domain. Returns False when deadline passes or the job is cancelled first"""
+        with self.lock:
+            slot = self.slots.setdefault(domain, threading.BoundedSemaphore(self.concurrency))
+            self.users[domain] = self.users.get(domain, 0) + 1
+        if not slot.acquire(timeout=max(0, deadline - time.monotonic())):
+            self.leave(domain)
+            return False
+
+        while not is_cancelled(cancellation):
+            with self.lock:
+                now = time.monotonic()
+                start = self.next_start.get(domain, 0)
+                if now >= deadline:
+                    break
+                if start <= now:
+                    # The request goes out now, only then is the next one pushed back
+                    self.next_start[domain] = now + self.delay
+                    return True
+            if start >= deadline:
+                break
+            if cancellation is not None:
+                cancellation.wait(start - now)
+            else:
+                time.sleep(start - now)
+        self.release(domain)
+        return False
+
+    def release(self, domain):
+        self.slots[domain].release()
+        self.leave(domain)
+
+    def leave(self, domain):
+        """Drop a user of domain and forget the idle domains whose spacing has run out"""
+        with self.lock:
+            self.users[domain] -= 1
+            now = time.monotonic()
+            idle = [name for name, users in self.users.items() if users == 0 and self.next_start.get(name, 0) <= now]
+            for name in idle:
+                del self.users[name]
+                del self.slots[name]
+                self.next_start.pop(name, None)
+
+
+# Shared by every lookup of the process, so parallel jobs stay polite to a site together
+POLITENESS = DomainPoliteness()
+
+
+class EmailFinder:
+    def __init__(
+        self,
+        max_pages=EMAIL_MAX_PAGES,
+        workers=EMAIL_CRAWL_WORKERS,
+        site_budget=EMAIL_SITE_BUDGET,
+        timeout=10,
+        politeness=POLITENESS,
+        proxies=PROXY_POOL,
+        cancellation=None,
+    ) -> None:
+        """max_pages: pages fetched per site at most, the homepage included"""
+        self.max_pages = max_pages
+        self.workers = workers
+        self.site_budget = site_budget
+        self.timeout = timeout
+        self.politeness = politeness
+        self.proxies = proxies
+        self.cancellation = cancellation
+        # Pages fetched by the last lookup, counted by the crawl threads
+        self.pages_fetched = 0
+        self.lock = threading.Lock()
+
+    def fetch(self, session, url, deadline, proxy=None):
+        """Text and final URL of a page, or None when it failed or the time is up"""
+        domain = urllib.parse.urlsplit(url).netloc.lower()
+        if is_cancelled(self.cancellation) or not self.politeness.acquire(domain, deadline, self.cancellation):
+            return None
+        try:
+            timeout = min(self.timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                return None
+            started = time.perf_counter()
+            with span("http_get", url=url):
+                response = session.get(url, headers=HEADERS, timeout=timeout, allow_redirects=True)
+            with self.lock:
+                self.pages_fetched += 1
+            self.proxies.record_response(proxy, response.status_code, time.perf_counter() - started)
+            if response.status_code >= 400:
+                return None
+            return response.text, response.url
+        except requests.exceptions.ProxyError as e:
+            self.proxies.record(proxy, False)
+            logger.debug("Proxy %s failed for %s: %s", proxy.name if proxy else None, url, e)
+            return None
+        except requests.RequestException as e:
+            logger.debug("Could not fetch %s: %s", url, e)
+            return None
+        finally:
+            self.politeness.release(domain)
+
+    def find(self, url):
+        """Emails of the website at url, at most 3. Empty when none was found"""
+        self.pages_fetched = 0
+        deadline = time.monotonic() + self.site_budget
+        emails = []
+        # One proxy for all the pages of a site
+        proxy = self.proxies.acquire()
+        try:
+            with requests.Session() as session:
+                if proxy is not None:
+                    session.proxies = {"http": proxy.url, "https": proxy.url}
+                homepage = self.fetch(session, url, deadline, proxy)
+                if homepage is not None:
+                    html, final_url = homepage
+                    emails, soup = page_emails(html)
+                    if not emails:
+                        candidates = contact_candidates(soup, final_url, self.max_pages - 1)
+                        emails = self.crawl(session, candidates, deadline, proxy)
+        finally:
+            self.proxies.release(proxy)
+
+        if not emails:
+            # Some sites put the address in the URL itself
+            emails = emails_in(url)
+
+        metrics.EMAIL_PAGES.observe(self.pages_fetched, result="found" if emails else "not_found")
+        logger.debug("Email lookup of %s: %s page(s), %s email(s)", url, self.pages_fetched, len(emails))
+        return emails[:3]
+
+    def crawl(self, session, candidates, deadline, proxy=None):
+        """Fetch candidates concurrently, returning the emails of the first page that has any"""
+        if not candidates:
+            return []
+
+        stop = threading.Event()
+
+        def emails_of(candidate):
+            if stop.is_set():
+                return []
+            page = self.fetch(session, candidate, deadline, proxy)
+            return page_emails(page[0])[0] if page is not None else []
+
+        executor = ThreadPoolExecutor(max_workers=min(self.workers, len(candidates)), thread_name_prefix="email")
+        try:
+            pending = {submit_in_context(executor, emails_of, candidate) for candidate in candidates}
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    emails = future.result()
+                    if emails:
+                        return emails
+            return []
+        finally:
+            # Stop at the first success: queued candidates are dropped and the running requests,
+            # bounded by the deadline, are waited for. They use the session find() closes next,
+            # hold politeness slots and count pages_fetched
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
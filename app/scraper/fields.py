@@ -0,0 +1,109 @@
+"""
+Output fields of a place record and field selection.
+
+A job may ask for a subset of the fields. Fields that were not asked for are
+not extracted, and the expensive enrichments (the email lookup on the place
+website, opening hours and booking links) only run when they are selected.
+"""
+
+# Output columns, in the order they are saved
+FIELDS = [
+    "Category",
+    "Name",
+    "Phone",
+    "Google Maps URL",
+    "Website",
+    "email",
+    "Business Status",
+    "Address",
+    "Total Reviews",
+    "Booking Links",
+    "Rating",
+    "Hours",
+]
+
+# Always extracted: records are identified and deduplicated by them
+REQUIRED_FIELDS = ["Name", "Google Maps URL"]
+
+# Opt-in enrichments and their typical cost per place
+EXPENSIVE_FIELDS = {
+    "email": "1 to 3 requests to the place website, usually 1-10 s per place",
+    "Hours": "reads the opening hours table of the place panel",
+    "Booking Links": "looks up the booking link of the place panel",
+}
+
+# Fields needed to extract another field
+DEPENDENCIES = {
+    "email": ["Website"],
+}
+
+ALIASES = {
+    "category": "Category",
+    "name": "Name",
+    "phone": "Phone",
+    "google_maps_url": "Google Maps URL",
+    "url": "Google Maps URL",
+    "website": "Website",
+    "email": "email",
+    "business_status": "Business Status",
+    "status": "Business Status",
+    "address": "Address",
+    "total_reviews": "Total Reviews",
+    "reviews": "Total Reviews",
+    "booking_links": "Booking Links",
+    "booking": "Booking Links",
+    "rating": "Rating",
+    "hours": "Hours",
+}
+
+
+def canonical_field(name):
+    if name in FIELDS:
+        return name
+    key = str(name).strip().lower().replace(" ", "_")
+    if key in ALIASES:
+        return ALIASES[key]
+    raise ValueError(f"Unknown field '{name}'. Available fields: {', '.join(FIELDS)}")
+
+
+def select_fields(requested=None):
+    """
+    Output fields for a job, in output order. requested is a list of field names
+    (output names or their snake_case aliases, e.g. "phone" or "booking"), or None
+    for every field.
+    """
+
+    if requested is None:
+        return list(FIELDS)
+    if isinstance(requested, str):
+        requested = [part for part in requested.split(",") if part.strip()]
+
+    selected = {canonical_field(name) for name in requested} | set(REQUIRED_FIELDS)
+    return [field for field in FIELDS if field in selected]
+
+
+def fields_to_extract(fields):
+    """Output fields plus the fields they depend on"""
+
+    extract = set(fields)
+    for field in fields:
+        extract.update(DEPENDENCIES.get(field, []))
+    return extract
+
+
+def project(record, fields):
+    """Record restricted to the given fields, in output order"""
+    return {field: record.get(field) for field in fields}
+
+
+def describe_fields():
+    """Field list for the web UI and the API documentation"""
+    return [
+        {
+            "name": field,
+            "required": field in REQUIRED_FIELDS,
+            "expensive": field in EXPENSIVE_FIELDS,
+            "cost": EXPENSIVE_FIELDS.get(field),
+        }
+        for field in FIELDS
+    ]
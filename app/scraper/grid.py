@@ -0,0 +1,287 @@
+"""
+Geographic grid tiling for large search areas.
+
+A single Google Maps result feed stops at roughly 120 places, so big areas are
+split into viewport sized tiles that are searched one by one (in parallel over
+a pool of browsers). Tiles that come back full are subdivided and searched
+again, and the places found in every tile are merged by their place ID.
+"""
+
+import math
+import re
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from scraper.base import Base
+from scraper.cancellation import is_cancelled
+from scraper.communicator import Communicator
+from scraper.improved_scroller import ImprovedScroller
+from scraper import metrics
+from scraper.tracing import span, submit_in_context
+from settings import (
+    GRID_TILE_SIZE_KM,
+    GRID_RESULT_CAP,
+    GRID_MAX_DEPTH,
+    GRID_VIEWPORT,
+    GRID_MAX_TILES,
+    MAPS_BASE_URL,
+)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Web mercator: metres covered by one pixel at zoom 0 on the equator
+METERS_PER_PIXEL_Z0 = 156543.03392
+
+PLACE_ID_PATTERNS = [
+    re.compile(r"!19s(ChIJ[^!?&/]+)"),  # Google place ID
+    re.compile(r"!1s(0x[0-9a-fA-F]+:0x[0-9a-fA-F]+)"),  # feature ID
+    re.compile(r"[?&]cid=(\d+)"),
+    re.compile(r"place_id:([A-Za-z0-9_-]+)"),
+]
+
+
+def place_id_from_url(url):
+    """Return a stable identifier of the place a Google Maps link points to"""
+
+    decoded = urllib.parse.unquote(url)
+    for pattern in PLACE_ID_PATTERNS:
+        match = pattern.search(decoded)
+        if match:
+            return match.group(1)
+
+    # Fall back to the link without its query string and volatile map state
+    return decoded.split("?")[0].split("/data=")[0]
+
+
+class Tile:
+    def __init__(self, south, west, north, east, depth=0) -> None:
+        self.south = south
+        self.west = west
+        self.north = north
+        self.east = east
+        self.depth = depth
+
+    def __repr__(self):
+        return (
+            f"Tile({self.south:.5f}, {self.west:.5f}, {self.north:.5f}, "
+            f"{self.east:.5f}, depth={self.depth})"
+        )
+
+    @property
+    def center(self):
+        return (self.south + self.north) / 2, (self.west + self.east) / 2
+
+    def size_km(self):
+        """Height and width of the tile in kilometres"""
+
+        lat, _ = self.center
+        height = math.radians(self.north - self.south) * EARTH_RADIUS_KM
+        width = (
+            math.radians(self.east - self.west)
+            * EARTH_RADIUS_KM
+            * math.cos(math.radians(lat))
+        )
+        return height, width
+
+    def zoom(self, viewport=GRID_VIEWPORT):
+        """Highest integer zoom level at which the whole tile fits in the browser viewport"""
+
+        lat, _ = self.center
+        height_km, width_km = self.size_km()
+        viewport_width, viewport_height = viewport
+        meters_per_pixel = max(
+            width_km * 1000 / viewport_width, height_km * 1000 / viewport_height
+        )
+        if meters_per_pixel <= 0:
+            return 21
+
+        zoom = math.log2(
+            METERS_PER_PIXEL_Z0 * math.cos(math.radians(lat)) / meters_per_pixel
+        )
+        return max(3, min(21, int(math.floor(zoom))))
+
+    def subdivide(self):
+        """Split the tile into four equal quadrants"""
+
+        mid_lat, mid_lng = self.center
+        depth = self.depth + 1
+        return [
+            Tile(self.south, self.west, mid_lat, mid_lng, depth),
+            Tile(self.south, mid_lng, mid_lat, self.east, depth),
+            Tile(mid_lat, self.west, self.north, mid_lng, depth),
+            Tile(mid_lat, mid_lng, self.north, self.east, depth),
+        ]
+
+    def search_url(self, query, base_url=MAPS_BASE_URL):
+        lat, lng = self.center
+        encoded_query = urllib.parse.quote_plus(query)
+        return f"{base_url}/maps/search/{encoded_query}/@{lat:.6f},{lng:.6f},{self.zoom()}z"
+
+
+class GridPlanner:
+    def __init__(self, south, west, north, east, tile_size_km=GRID_TILE_SIZE_KM, max_tiles=GRID_MAX_TILES) -> None:
+        if south >= north or west >= east:
+            raise ValueError("Bounding box must be given as south, west, north, east")
+        if tile_size_km <= 0:
+            raise ValueError("Tile size must be positive")
+
+        self.area = Tile(south, west, north, east)
+        self.tile_size_km = tile_size_km
+        self.max_tiles = max_tiles
+
+    @classmethod
+    def from_area(cls, area):
+        """
+        Build a planner from the area description accepted by the web API:
+        {"bbox": [south, west, north, east]} or {"center": [lat, lng], "radius_km": r}
+        """
+
+        tile_size_km = float(area.get("tile_size_km", GRID_TILE_SIZE_KM))
+
+        if "bbox" in area:
+            south, west, north, east = [float(v) for v in area["bbox"]]
+            return cls(south, west, north, east, tile_size_km=tile_size_km)
+
+        if "center" in area and "radius_km" in area:
+            lat, lng = [float(v) for v in area["center"]]
+            return cls.from_center(lat, lng, float(area["radius_km"]), tile_size_km)
+
+        raise ValueError("Area must contain either 'bbox' or 'center' and 'radius_km'")
+
+    @classmethod
+    def from_center(cls, lat, lng, radius_km, tile_size_km=GRID_TILE_SIZE_KM):
+        delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        delta_lng = math.degrees(
+            radius_km / (EARTH_RADIUS_KM * max(math.cos(math.radians(lat)), 1e-6))
+        )
+        return cls(
+            lat - delta_lat,
+            lng - delta_lng,
+            lat + delta_lat,
+            lng + delta_lng,
+            tile_size_km=tile_size_km,
+        )
+
+    def plan(self):
+        """
+        Split the area into a row-major list of tiles no bigger than tile_size_km.
+        Raises ValueError when that takes more than max_tiles tiles
+        """
+
+        height_km, width_km = self.area.size_km()
+        rows = max(1, math.ceil(height_km / self.tile_size_km))
+        cols = max(1, math.ceil(width_km / self.tile_size_km))
+        if self.max_tiles is not None and rows * cols > self.max_tiles:
+            raise ValueError(
+                f"The area needs {rows * cols} tiles of {self.tile_size_km} km, at most {self.max_tiles} are allowed"
+            )
+
+        lat_step = (self.area.north - self.area.south) / rows
+        lng_step = (self.area.east - self.area.west) / cols
+
+        tiles = []
+        for row in range(rows):
+            for col in range(cols):
+                south = self.area.south + row * lat_step
+                west = self.area.west + col * lng_step
+                tiles.append(Tile(south, west, south + lat_step, west + lng_step))
+        return tiles
+
+
+class TileSearch(Base):
+    """Runs a single tile search on a pooled driver and returns the links it found"""
+
+    def __init__(self, driver, query, base_url=MAPS_BASE_URL, cancellation=None) -> None:
+        self.driver = driver
+        self.query = query
+        self.base_url = base_url
+        self.cancellation = cancellation
+
+    def run(self, tile):
+        url = tile.search_url(self.query, base_url=self.base_url)
+        self.openingurl(url=url)
+        self.pause(3)
+        if self.cancelled():
+            return []
+
+        scroller = ImprovedScroller(driver=self.driver, base_url=self.base_url, cancellation=self.cancellation)
+        return list(scroller.collect_links())
+
+
+class GridScraper:
+    def __init__(self, pool, query, workers, base_url=MAPS_BASE_URL, cancellation=None) -> None:
+        self.pool = pool
+        self.query = query
+        self.workers = max(1, workers)
+        self.base_url = base_url
+        self.cancellation = cancellation
+
+        self.links_by_place = {}
+        self.tiles_searched = 0
+        self.tiles_subdivided = 0
+
+    def submit(self, executor, tile):
+        metrics.QUEUE_DEPTH.inc()
+        return submit_in_context(executor, self.search_tile, tile)
+
+    def search_tile(self, tile):
+        metrics.QUEUE_DEPTH.dec()
+        if is_cancelled(self.cancellation):
+            return []
+        with span("tile_search", tile=tile), self.pool.lease() as driver:
+            return TileSearch(driver, self.query, base_url=self.base_url, cancellation=self.cancellation).run(tile)
+
+    def harvest(self, tiles):
+        """Search every tile, subdividing saturated ones, and return links unique by place ID"""
+
+        Communicator.show_message(
+            f"Grid search: {len(tiles)} tile(s) with {self.workers} browser(s)"
+        )
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {self.submit(executor, tile): tile for tile in tiles}
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    tile = pending.pop(future)
+                    self.tiles_searched += 1
+
+                    try:
+                        links = future.result()
+                    except Exception as e:
+                        metrics.FAILURES.inc(phase="tile_search")
+                        Communicator.show_message(f"Grid search: tile {tile} failed. Error: {str(e)}")
+                        continue
+
+                    new_places = self.add_links(links)
+                    Communicator.show_message(
+                        f"Grid search: tile {self.tiles_searched} returned {len(links)} result(s), "
+                        f"{new_places} new. Unique places so far: {len(self.links_by_place)}"
+                    )
+
+                    if is_cancelled(self.cancellation):
+                        continue
+
+                    if len(links) >= GRID_RESULT_CAP and tile.depth < GRID_MAX_DEPTH:
+                        self.tiles_subdivided += 1
+                        Communicator.show_message(
+                            f"Grid search: tile hit the result cap, splitting it into 4 smaller tiles"
+                        )
+                        for child in tile.subdivide():
+                            pending[self.submit(executor, child)] = child
+
+        Communicator.show_message(
+            f"Grid search finished: {self.tiles_searched} tile(s) searched, "
+            f"{self.tiles_subdivided} subdivided, {len(self.links_by_place)} unique places"
+        )
+        return list(self.links_by_place.values())
+
+    def add_links(self, links):
+        added = 0
+        for link in links:
+            place_id = place_id_from_url(link)
+            if place_id not in self.links_by_place:
+                self.links_by_place[place_id] = link
+                added += 1
+        return added
@@ -2,37 +2,130 @@
 Improved scraper with better search handling and debugging
 """
 
+import logging
 import time
-from time import sleep
 from scraper.base import Base
 from scraper.improved_scroller import ImprovedScroller
+from scraper.driver_pool import DriverPool
+from scraper.grid import GridPlanner, GridScraper
+from scraper.resource_blocking import apply_resource_blocking
+from scraper.network_capture import NetworkCapture
+from scraper.budget import JobBudget
+from scraper.fields import select_fields
+from scraper.driver_cache import DriverCache
+from scraper.probe import probe, wait_for_any, PLACE_TITLE_SELECTORS, RESULT_FEED_SELECTORS, SEARCH_LANDING_SELECTORS
+from scraper.proxy_pool import PROXY_POOL
+from scraper import metrics
+from scraper.tracing import span
 import undetected_chromedriver as uc
-from settings import DRIVER_EXECUTABLE_PATH
+from settings import DRIVER_EXECUTABLE_PATH, GRID_WORKERS, RESOURCE_BLOCKING_PROFILE, EXTRACTION_MODE, MAPS_BASE_URL
+from settings import CHROME_BINARY_PATH
 from scraper.communicator import Communicator
 import urllib.parse
+from functools import partial
 from webdriver_manager.chrome import ChromeDriverManager
+from scraper.log import get_logger
+
+logger = get_logger(__name__)
 
 class ImprovedBackend(Base):
     
-    def __init__(self, searchquery, outputformat, healdessmode):
+    def __init__(
+        self,
+        searchquery,
+        outputformat,
+        healdessmode,
+        area=None,
+        grid_workers=GRID_WORKERS,
+        driver=None,
+        save_results=True,
+        link_filter=None,
+        resource_profile=RESOURCE_BLOCKING_PROFILE,
+        extraction=EXTRACTION_MODE,
+        base_url=MAPS_BASE_URL,
+        max_results=None,
+        deadline=None,
+        fields=None,
+        cancellation=None,
+    ):
+        """
+        area: optional search area, {"bbox": [south, west, north, east]} or
+              {"center": [lat, lng], "radius_km": r}. When given, the area is
+              searched tile by tile to get past the per-search result cap.
+        grid_workers: number of browsers used in parallel for the tile searches
+        driver: already running driver to reuse (e.g. from a DriverPool). It is
+                left open when scraping ends, so its owner can hand it out again.
+        save_results: save the parsed records with DataSaver when parsing ends
+        link_filter: optional callable applied to the collected links before parsing
+        resource_profile: name of the request blocking profile used by new drivers
+        extraction: "dom" opens and parses every place page, "network" decodes the
+                    results from the Maps JSON responses captured while scrolling.
+                    Network mode needs a driver of its own and is not used for grid searches.
+        base_url: scheme and host Google Maps is opened on, e.g. the local mock server
+        max_results: stop once this many places were collected and parse only those
+        deadline: seconds the job may take. Time is split between scrolling, parsing and
+                  email lookups, and the places parsed when it runs out are saved.
+        fields: output fields, see scraper.fields. None extracts every field
+        cancellation: CancellationToken of the job. Cancelling it quits the browser right away
+                      (when it is our own) and saves the places parsed so far
+        """
+        # Started first so the deadline includes the browser start
+        self.budget = JobBudget(max_results, deadline)
+        self.fields = select_fields(fields)
         self.searchquery = searchquery
         self.headlessMode = healdessmode
         self.outputformat = outputformat
+        self.area = area
+        self.grid_workers = grid_workers
+        self.resource_profile = resource_profile
+        self.base_url = base_url.rstrip("/")
+        self.owns_driver = driver is None
+        self.cancellation = cancellation
+        self.capture_network = extraction == "network" and self.owns_driver and area is None
+        
+        if self.owns_driver:
+            self.init_driver()
+            if cancellation is not None:
+                cancellation.on_cancel(self.quit_driver)
+        else:
+            self.driver = driver
         
-        self.init_driver()
-        self.scroller = ImprovedScroller(driver=self.driver)
+        self.network_capture = NetworkCapture(self.driver) if self.capture_network else None
+        self.scroller = ImprovedScroller(
+            driver=self.driver,
+            save_results=save_results,
+            link_filter=link_filter,
+            network_capture=self.network_capture,
+            base_url=self.base_url,
+            budget=self.budget,
+            fields=self.fields,
+            # Only a driver of our own may be restarted, pooled ones belong to their pool
+            restart_driver=self.restart_driver if self.owns_driver else None,
+            cancellation=cancellation,
+        )
         self.init_communicator()
 
     def init_communicator(self):
         Communicator.set_backend_object(self)
 
     def init_driver(self):
+        self.driver = self.build_driver(
+            self.headlessMode, self.resource_profile, performance_log=self.capture_network
+        )
+
+    @classmethod
+    def chrome_options(cls, headless_mode, performance_log=False, proxy=None):
+        """
+        Chrome options of a new driver. undetected_chromedriver does not accept an options object twice
+
+        proxy: upstream proxy of the browser, see scraper.proxy_pool
+        """
         options = uc.ChromeOptions()
         
         # Add Chrome binary path for DigitalOcean
-        options.binary_location = "/opt/google/chrome/chrome"
+        options.binary_location = CHROME_BINARY_PATH
         
-        if self.headlessMode == 1:
+        if headless_mode == 1:
             options.headless = True
 
         # Essential Chrome options
@@ -54,77 +147,129 @@ class ImprovedBackend(Base):
         }
         options.add_experimental_option("prefs", prefs)
 
+        if performance_log:
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        if proxy is not None:
+            options.add_argument(f'--proxy-server={proxy.server}')
+        return options
+
+    @classmethod
+    def build_driver(cls, headless_mode, resource_profile=RESOURCE_BLOCKING_PROFILE, performance_log=False):
+        """
+        Create and configure a new Chrome driver instance
+
+        resource_profile: request blocking profile, see scraper.resource_blocking
+        performance_log: record CDP network events in the driver's performance log
+
+        The browser keeps the proxy it is given from the shared proxy pool for its lifetime.
+        """
+        startup_started = time.perf_counter()
+        driver_cache = DriverCache()
+        proxy = PROXY_POOL.acquire()
+        if proxy is not None:
+            Communicator.show_message(f"Browser traffic goes through proxy {proxy.name}")
+            if proxy.has_credentials:
+                logger.warning("Chrome ignores the credentials of proxy %s, it must allow this IP", proxy.name)
+
         Communicator.show_message("Initializing Chrome driver...")
         
+        driver = None
+        chrome_version_full = None
+        chrome_major_version = None
+        
         try:
-            # Get Chrome version
-            import subprocess
-            import re
-            
-            chrome_version_full = None
-            chrome_major_version = None
-            
+            chrome_version_full = driver_cache.chrome_version()
+            chrome_major_version = int(chrome_version_full.split(".")[0])
+            Communicator.show_message(f"Detected Chrome version: {chrome_version_full} (major: {chrome_major_version})")
+            logger.debug("Chrome version: %s, major: %s", chrome_version_full, chrome_major_version)
+        except Exception as e:
+            Communicator.show_message(f"Could not determine Chrome version: {str(e)}")
+            logger.debug("Error getting Chrome version: %s", e)
+        
+        # Strategy 0: the patched chromedriver that worked last time for this Chrome binary
+        cached_driver_path = driver_cache.lookup()
+        if cached_driver_path is not None:
             try:
-                chrome_version_output = subprocess.check_output(["/opt/google/chrome/chrome", "--version"]).decode().strip()
-                Communicator.show_message(f"Chrome version: {chrome_version_output}")
-                print(f"DEBUG: Chrome version output: {chrome_version_output}")
-                
-                # Extract version number (e.g., "141.0.7390.54" from "Google Chrome 141.0.7390.54")
-                version_match = re.search(r'(\d+)\.(\d+)\.(\d+)\.(\d+)', chrome_version_output)
-                if version_match:
-                    chrome_version_full = version_match.group(0)
-                    chrome_major_version = int(version_match.group(1))
-                    Communicator.show_message(f"Detected Chrome version: {chrome_version_full} (major: {chrome_major_version})")
-                    print(f"DEBUG: Parsed Chrome version: {chrome_version_full}, major: {chrome_major_version}")
-            except Exception as e:
-                Communicator.show_message(f"Could not determine Chrome version: {str(e)}")
-                print(f"DEBUG: Error getting Chrome version: {str(e)}")
-            
+                driver = uc.Chrome(
+                    options=cls.chrome_options(headless_mode, performance_log, proxy),
+                    driver_executable_path=cached_driver_path,
+                    version_main=chrome_major_version,
+                )
+                logger.debug("Started Chrome with cached chromedriver %s", cached_driver_path)
+            except Exception as cache_error:
+                Communicator.show_message(f"Cached chromedriver failed, resolving a new one: {str(cache_error)}")
+                logger.debug("Cached chromedriver failed: %s", cache_error)
+                driver_cache.invalidate()
+        
+        if driver is None:
+            try:
+                driver = cls.resolve_driver(cls.chrome_options(headless_mode, performance_log, proxy), chrome_major_version)
+            except Exception:
+                PROXY_POOL.release(proxy)
+                raise
+            if chrome_version_full:
+                try:
+                    driver_cache.store(driver, chrome_version_full)
+                except Exception as e:
+                    logger.debug("Could not cache chromedriver: %s", e)
+        
+        PROXY_POOL.assign(driver, proxy)
+        driver.maximize_window()
+        # No implicit wait: selector misses fail at once, waits are explicit (see scraper.probe)
+        driver.implicitly_wait(0)
+        apply_resource_blocking(driver, resource_profile)
+        metrics.observe_phase("driver_startup", startup_started)
+        return driver
+
+    @classmethod
+    def resolve_driver(cls, options, chrome_major_version=None):
+        """Start Chrome with a chromedriver downloaded by undetected_chromedriver or webdriver_manager"""
+        try:
             # Strategy 1: Let undetected_chromedriver handle everything (BEST for latest Chrome)
             Communicator.show_message("Using undetected_chromedriver auto-mode (recommended for Chrome 141+)...")
-            print("DEBUG: Attempting undetected_chromedriver auto-mode")
+            logger.debug("Attempting undetected_chromedriver auto-mode")
             
             try:
                 # undetected_chromedriver will automatically download the correct driver
-                self.driver = uc.Chrome(
+                driver = uc.Chrome(
                     options=options,
                     version_main=chrome_major_version if chrome_major_version else None
                 )
                 Communicator.show_message("Chrome driver initialized successfully (auto-mode)")
-                print("DEBUG: undetected_chromedriver auto-mode succeeded")
+                logger.debug("undetected_chromedriver auto-mode succeeded")
                 
             except Exception as uc_error:
                 Communicator.show_message(f"Auto-mode failed: {str(uc_error)}")
-                print(f"DEBUG: undetected_chromedriver auto-mode failed: {str(uc_error)}")
+                logger.debug("undetected_chromedriver auto-mode failed: %s", uc_error)
                 
                 # Strategy 2: Try WebDriver Manager with specific version
                 if chrome_major_version:
                     try:
                         Communicator.show_message(f"Trying WebDriver Manager for Chrome {chrome_major_version}...")
-                        print(f"DEBUG: Trying WebDriver Manager with version {chrome_major_version}")
+                        logger.debug("Trying WebDriver Manager with version %s", chrome_major_version)
                         
                         # Try to get the specific driver version
                         from webdriver_manager.core.utils import ChromeType
                         driver_path = ChromeDriverManager(chrome_type=ChromeType.GOOGLE).install()
                         
                         Communicator.show_message(f"ChromeDriver path: {driver_path}")
-                        print(f"DEBUG: ChromeDriver path: {driver_path}")
+                        logger.debug("ChromeDriver path: %s", driver_path)
                         
-                        self.driver = uc.Chrome(
+                        driver = uc.Chrome(
                             driver_executable_path=driver_path,
                             options=options
                         )
                         Communicator.show_message("Chrome driver initialized with WebDriver Manager")
-                        print("DEBUG: WebDriver Manager succeeded")
+                        logger.debug("WebDriver Manager succeeded")
                         
                     except Exception as wdm_error:
                         Communicator.show_message(f"WebDriver Manager failed: {str(wdm_error)}")
-                        print(f"DEBUG: WebDriver Manager failed: {str(wdm_error)}")
+                        logger.debug("WebDriver Manager failed: %s", wdm_error)
                         
                         # Strategy 3: Manual path as last resort
                         if DRIVER_EXECUTABLE_PATH is not None:
                             Communicator.show_message("Trying manual ChromeDriver path...")
-                            self.driver = uc.Chrome(
+                            driver = uc.Chrome(
                                 driver_executable_path=DRIVER_EXECUTABLE_PATH,
                                 options=options
                             )
@@ -137,7 +282,7 @@ class ImprovedBackend(Base):
         except Exception as e:
             error_msg = f"Chrome driver initialization failed: {str(e)}"
             Communicator.show_message(error_msg)
-            print(f"ERROR: {error_msg}")
+            logger.error(error_msg)
             
             # Provide helpful error message
             if "version" in str(e).lower():
@@ -146,8 +291,32 @@ class ImprovedBackend(Base):
             
             raise e
         
-        self.driver.maximize_window()
-        self.driver.implicitly_wait(self.timeout)
+        return driver
+
+    def quit_driver(self):
+        """Close our browser, used when the job is cancelled"""
+        Communicator.show_message("Job cancelled, closing the browser")
+        try:
+            self.driver.quit()
+        except:
+            pass
+        PROXY_POOL.release_driver(self.driver)
+
+    def restart_driver(self):
+        """Replace the driver with a fresh one, used by the memory watchdog between places"""
+        try:
+            self.driver.quit()
+        except:
+            pass
+        PROXY_POOL.release_driver(self.driver)
+        
+        self.driver = self.build_driver(
+            self.headlessMode, self.resource_profile, performance_log=self.capture_network
+        )
+        self.scroller.driver = self.driver
+        if self.network_capture is not None:
+            self.network_capture.attach(self.driver)
+        return self.driver
 
     def format_search_query(self, query):
         """Format search query for better Google Maps results"""
@@ -155,25 +324,88 @@ class ImprovedBackend(Base):
         query = ' '.join(query.split())
         return query
 
+    def grid_scraping(self):
+        """Search the area tile by tile and parse the merged, deduplicated results"""
+        tiles = GridPlanner.from_area(self.area).plan()
+        formatted_query = self.format_search_query(self.searchquery)
+
+        pool = DriverPool(
+            partial(self.build_driver, self.headlessMode, self.resource_profile),
+            self.grid_workers,
+            drivers=[self.driver],
+        )
+        try:
+            if self.cancellation is not None:
+                # Free the tile search browsers as soon as the job is cancelled
+                self.cancellation.on_cancel(pool.close_all)
+            links = GridScraper(
+                pool, formatted_query, self.grid_workers, base_url=self.base_url, cancellation=self.cancellation
+            ).harvest(tiles)
+        finally:
+            driver_alive = self.driver in pool.all_drivers
+            pool.close_all(keep=(self.driver,))
+
+        if self.cancelled():
+            return
+
+        if len(links) == 0:
+            Communicator.show_message("No results to parse - no links were collected in the search area")
+            return
+
+        replacement = None
+        if not driver_alive:
+            # The main driver broke during a tile search, parse with a fresh one
+            replacement = self.driver = self.build_driver(self.headlessMode, self.resource_profile)
+            self.scroller.driver = self.driver
+
+        try:
+            self.scroller.all_results_links = links
+            self.scroller.start_parsing()
+        finally:
+            if replacement is not None and not self.owns_driver:
+                # The caller's pool only knows the dead driver, nobody else would quit this one
+                try:
+                    replacement.quit()
+                except:
+                    pass
+                PROXY_POOL.release_driver(replacement)
+
     def mainscraping(self):
+        with span("mainscraping", query=self.searchquery):
+            self.scraping_session()
+
+    def scraping_session(self):
         try:
+            if self.area is not None:
+                self.grid_scraping()
+                return
+
             # Format the search query
             formatted_query = self.format_search_query(self.searchquery)
             Communicator.show_message(f"Formatted search query: {formatted_query}")
             
             # URL encode the query
             encoded_query = urllib.parse.quote_plus(formatted_query)
-            link_of_page = f"https://www.google.com/maps/search/{encoded_query}/"
+            link_of_page = f"{self.base_url}/maps/search/{encoded_query}/"
             
             Communicator.show_message(f"Searching: {link_of_page}")
             
+            if self.network_capture is not None:
+                Communicator.show_message("Using network capture extraction mode")
+                self.network_capture.start()
+            
             # Navigate to the search page
+            search_started = time.perf_counter()
             self.openingurl(url=link_of_page)
+            if self.cancelled():
+                return
             
             Communicator.show_message("Page loaded, starting search...")
             
-            # Single wait time - reduced from multiple waits
-            sleep(5)  # One consolidated wait for page to fully load
+            # Wait until the page shows the result list, a single place or the consent form
+            wait_for_any(self.driver, SEARCH_LANDING_SELECTORS, 5, cancellation=self.cancellation)
+            if self.cancelled():
+                return
             
             # Check if we're on the right page
             current_url = self.driver.current_url
@@ -186,7 +418,7 @@ class ImprovedBackend(Base):
             # Handle Google consent page
             if "consent.google.com" in current_url:
                 Communicator.show_message("WARNING: Detected consent page - Google may be blocking automated access")
-                print("DEBUG: On consent page - this is a blocking issue")
+                logger.debug("On consent page - this is a blocking issue")
                 
                 # Try to click reject/accept buttons
                 try:
@@ -199,21 +431,30 @@ class ImprovedBackend(Base):
                         "form[action*='consent'] button[type='submit']"
                     ]
                     
-                    for selector in accept_selectors:
+                    # Probe the remaining selectors in one call, click the first match
+                    remaining = accept_selectors
+                    while remaining:
+                        match = probe(self.driver, remaining, visible=True)
+                        if match is None:
+                            break
+                        remaining = remaining[match.index + 1:]
                         try:
-                            button = self.driver.find_element("css selector", selector)
-                            if button:
-                                button.click()
-                                sleep(2)
-                                
-                                if "consent.google.com" not in self.driver.current_url:
-                                    Communicator.show_message("Successfully bypassed consent page!")
-                                    break
+                            match.element.click()
+                            wait_for_any(
+                                self.driver,
+                                RESULT_FEED_SELECTORS + PLACE_TITLE_SELECTORS,
+                                5,
+                                cancellation=self.cancellation,
+                            )
+                            
+                            if "consent.google.com" not in self.driver.current_url:
+                                Communicator.show_message("Successfully bypassed consent page!")
+                                break
                         except:
                             continue
                     
                 except Exception as e:
-                    print(f"DEBUG: Could not bypass consent: {str(e)}")
+                    logger.debug("Could not bypass consent: %s", e)
                 
                 # If still on consent page, we can't proceed
                 if "consent.google.com" in self.driver.current_url:
@@ -224,31 +465,33 @@ class ImprovedBackend(Base):
             # Handle redirect to single place page (common issue with Google Maps)
             if '/maps/place/' in current_url:
                 Communicator.show_message("WARNING: Google Maps redirected to a single place instead of search results")
-                print("DEBUG: Redirected to place page, trying alternative approaches")
+                logger.debug("Redirected to place page, trying alternative approaches")
                 
                 # Try alternative search approaches
                 alternative_urls = [
                     # Try with different parameters
-                    f"https://www.google.com/maps/search/{encoded_query}/@0,0,2z",
-                    f"https://www.google.com/maps/search/{encoded_query}/?hl=en",
-                    f"https://www.google.com/maps/search/{encoded_query}/?entry=ttu",
+                    f"{self.base_url}/maps/search/{encoded_query}/@0,0,2z",
+                    f"{self.base_url}/maps/search/{encoded_query}/?hl=en",
+                    f"{self.base_url}/maps/search/{encoded_query}/?entry=ttu",
                     # Try with broader search
-                    f"https://www.google.com/maps/search/{encoded_query.split('+')[0]}/",
+                    f"{self.base_url}/maps/search/{encoded_query.split('+')[0]}/",
                 ]
                 
                 for alt_url in alternative_urls:
                     try:
                         Communicator.show_message(f"Trying alternative URL: {alt_url[:80]}...")
-                        print(f"DEBUG: Trying alternative URL: {alt_url}")
+                        logger.debug("Trying alternative URL: %s", alt_url)
                         
-                        self.driver.get(alt_url)
-                        sleep(5)
+                        self.openingurl(url=alt_url)
+                        wait_for_any(self.driver, SEARCH_LANDING_SELECTORS, 5, cancellation=self.cancellation)
+                        if self.cancelled():
+                            return
                         
                         new_url = self.driver.current_url
                         new_title = self.driver.title
                         
                         Communicator.show_message(f"Alternative URL result: {new_title}")
-                        print(f"DEBUG: New URL: {new_url[:100]}")
+                        logger.debug("New URL: %s", new_url[:100])
                         
                         # If we're now on search results or a different place, try scrolling
                         if '/maps/search/' in new_url or '/maps/place/' not in new_url:
@@ -266,34 +509,40 @@ class ImprovedBackend(Base):
                     Communicator.show_message("This search query may only have one result or Google is showing a featured result")
                     return
             
+            metrics.observe_phase("search_load", search_started)
+            
             # Start scrolling and scraping
-            Communicator.show_message("DEBUG: About to call scroller.scroll()")
-            print("DEBUG: About to call scroller.scroll()")
+            logger.debug("About to call scroller.scroll()")
             self.scroller.scroll()
-            Communicator.show_message("DEBUG: Scroller.scroll() completed")
-            print("DEBUG: Scroller.scroll() completed")
+            logger.debug("Scroller.scroll() completed")
             
         except Exception as e:
+            metrics.FAILURES.inc(phase="job")
             Communicator.show_message(f"Error occurred while scraping. Error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Scraping failed")
             
             # Try to get more debug information
-            try:
-                current_url = self.driver.current_url
-                page_source = self.driver.page_source[:500]
-                Communicator.show_message(f"Debug - Current URL: {current_url}")
-                print(f"DEBUG - Page source preview: {page_source}")
-            except:
-                pass
+            if logger.isEnabledFor(logging.DEBUG):
+                try:
+                    logger.debug("Current URL: %s", self.driver.current_url)
+                    logger.debug("Page source preview: %s", self.driver.page_source[:500])
+                except:
+                    pass
 
         finally:
-            try:
-                Communicator.show_message("Closing the driver")
-                self.driver.close()
-                self.driver.quit()
-            except:
-                pass
+            if self.owns_driver:
+                try:
+                    Communicator.show_message("Closing the driver")
+                    self.driver.close()
+                    self.driver.quit()
+                except:
+                    pass
+                PROXY_POOL.release_driver(self.driver)
+
+                Communicator.end_processing()
+                Communicator.show_message("Scraping session completed")
 
-            Communicator.end_processing()
-            Communicator.show_message("Scraping session completed")
\ No newline at end of file
+    def results(self):
+        """Records parsed by this backend, useful when save_results is False"""
+        parser = getattr(self.scroller, "parser", None)
+        return parser.finalData if parser is not None else []
\ No newline at end of file
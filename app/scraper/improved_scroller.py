@@ -1,38 +1,93 @@
 """
 Improved scroller with better error handling and debugging
 """
+import logging
 import time
 from scraper.communicator import Communicator
 from scraper.common import Common
+from scraper.cancellation import is_cancelled
 from bs4 import BeautifulSoup
 from selenium.common.exceptions import JavascriptException
 from scraper.parser import Parser
+from scraper import metrics
+from scraper.tracing import span
+from scraper.scroll_pacer import ScrollPacer
+from scraper.budget import JobBudget
+from scraper.probe import probe, wait_for_any, RESULT_CONTAINER_SELECTORS, RESULT_FEED_SELECTORS, SCROLLABLE_SELECTORS, MIN_RESULTS_HTML
+from scraper.rate_limit import GOOGLE_RATE_LIMITER, DailyBudgetExceeded
+from scraper.proxy_pool import PROXY_POOL, egress_of
+from scraper.log import get_logger
+from settings import MAPS_BASE_URL
+
+logger = get_logger(__name__)
+
+# Longest wait for the result feed to reappear during scrolling
+FEED_WAIT_SECONDS = 3
 
 class ImprovedScroller:
-    def __init__(self, driver) -> None:
+    def __init__(self, driver, save_results=True, link_filter=None, network_capture=None, base_url=MAPS_BASE_URL, budget=None, fields=None, restart_driver=None, cancellation=None) -> None:
         self.driver = driver
+        # CancellationToken of the job, see scraper.cancellation
+        self.cancellation = cancellation
+        self.fields = fields
+        self.restart_driver = restart_driver
+        # Result count target and deadline of the job, see scraper.budget
+        self.budget = budget or JobBudget()
+        self.base_url = base_url
+        self.save_results = save_results
+        self.link_filter = link_filter
+        # When set, records are decoded from captured Maps responses instead of visiting each place
+        self.network_capture = network_capture
         # Initialize the results list in __init__ to ensure it persists
         self.all_results_links = []
+        # Iterations, duration and stop reason of the last scroll, see ScrollPacer.stats
+        self.scroll_stats = {}
     
     def __init_parser(self):
-        self.parser = Parser(self.driver)
+        self.parser = Parser(
+            self.driver,
+            save_results=self.save_results,
+            budget=self.budget,
+            fields=self.fields,
+            restart_driver=self.restart_driver,
+            cancellation=self.cancellation,
+        )
     
     def start_parsing(self):
-        Communicator.show_message("DEBUG: Starting parsing process")
-        print("DEBUG: Starting parsing process")
-        print(f"DEBUG: all_results_links length before parsing: {len(self.all_results_links)}")
-        Communicator.show_message(f"DEBUG: all_results_links length before parsing: {len(self.all_results_links)}")
+        logger.debug("Starting parsing process")
+        logger.debug("all_results_links length before parsing: %s", len(self.all_results_links))
+        
+        # Captured records do not need the DOM links, check them first
+        if self.network_capture is not None:
+            records = self.network_capture.records()
+            if len(records) > 0:
+                self.parse_captured_records(records)
+                return
+            Communicator.show_message("Network capture found no results, falling back to page parsing")
         
         if len(self.all_results_links) == 0:
             Communicator.show_message("ERROR: No links to parse!")
-            print("ERROR: No links to parse!")
+            logger.error("No links to parse!")
             return
         
+        if self.link_filter is not None:
+            self.all_results_links = self.link_filter(self.all_results_links)
+        self.all_results_links = self.budget.trim(self.all_results_links)
+        
         self.__init_parser()
-        print(f"DEBUG: About to call parser.main with {len(self.all_results_links)} links")
-        Communicator.show_message(f"DEBUG: About to call parser.main with {len(self.all_results_links)} links")
+        logger.debug("About to call parser.main with %s links", len(self.all_results_links))
         self.parser.main(self.all_results_links)
     
+    def parse_captured_records(self, records):
+        """Finish records decoded from network responses without opening each place"""
+        if self.link_filter is not None:
+            kept = set(self.link_filter([record["Google Maps URL"] for record in records]))
+            records = [record for record in records if record["Google Maps URL"] in kept]
+        records = self.budget.trim(records)
+        
+        self.__init_parser()
+        self.parser.main_from_records(records)
+    
     def handle_direct_place_redirect(self):
         """Handle case where Google Maps redirects to a single place instead of search results"""
         try:
@@ -41,79 +96,70 @@ class ImprovedScroller:
             # Check if we're on a place page instead of search results
             if '/maps/place/' in current_url:
                 Communicator.show_message("Detected redirect to single place, going back to search results...")
-                print("DEBUG: On a place page, need to go back to search results")
+                logger.debug("On a place page, need to go back to search results")
                 
                 # Strategy 1: Try browser back
                 try:
-                    print("DEBUG: Trying browser back...")
+                    logger.debug("Trying browser back...")
+                    GOOGLE_RATE_LIMITER.acquire(egress_of(self.driver), self.cancellation)
                     self.driver.back()
-                    time.sleep(3)
+                    wait_for_any(self.driver, RESULT_FEED_SELECTORS, 3, cancellation=self.cancellation)
                     
                     new_url = self.driver.current_url
-                    print(f"DEBUG: After back, URL: {new_url}")
+                    logger.debug("After back, URL: %s", new_url)
                     
                     if '/maps/search/' in new_url:
                         Communicator.show_message("Successfully returned to search results using back button")
-                        print("DEBUG: Back button worked - now on search results")
+                        logger.debug("Back button worked - now on search results")
                         return True
                     
                 except Exception as e:
-                    print(f"DEBUG: Browser back failed: {str(e)}")
+                    logger.debug("Browser back failed: %s", e)
                 
                 # Strategy 2: If we're still on a place page, this might be the ONLY result
                 # Just scrape this one place
                 if '/maps/place/' in self.driver.current_url:
                     Communicator.show_message("Only one result found - will scrape this single place")
-                    print("DEBUG: Only single result exists, adding to list")
+                    logger.debug("Only single result exists, adding to list")
                     
                     # Add this single place URL to results
                     place_url = self.driver.current_url
                     if place_url not in self.all_results_links:
                         self.all_results_links.append(place_url)
-                        print(f"DEBUG: Added single place: {place_url}")
+                        logger.debug("Added single place: %s", place_url)
                     
                     return True
                     
         except Exception as e:
-            print(f"ERROR in handle_direct_place_redirect: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in handle_direct_place_redirect: %s", e)
         
         return False
     
     def wait_for_search_results(self, timeout=60):
         """Wait for search results to load with better detection"""
         Communicator.show_message("Waiting for search results to load...")
-        print("DEBUG: wait_for_search_results() started")
+        logger.debug("wait_for_search_results() started")
         
         # First, do a quick check without waiting
-        print("DEBUG: Attempting immediate result detection...")
-        try:
-            quick_selectors = ["[role='feed']", ".m6QErb", "div.m6QErb"]
-            for selector in quick_selectors:
-                try:
-                    element = self.driver.find_element("css selector", selector)
-                    if element and element.is_displayed():
-                        html = element.get_attribute('outerHTML')
-                        if html and len(html) > 100:
-                            print(f"DEBUG: Quick check found results immediately with {selector}")
-                            Communicator.show_message(f"Results found immediately!")
-                            return element
-                except:
-                    continue
-        except Exception as e:
-            print(f"DEBUG: Quick check failed: {str(e)}")
+        logger.debug("Attempting immediate result detection...")
+        match = probe(self.driver, RESULT_CONTAINER_SELECTORS[:3], visible=True, min_html_length=MIN_RESULTS_HTML)
+        if match is not None:
+            logger.debug("Quick check found results immediately with %s", match.selector)
+            Communicator.show_message(f"Results found immediately!")
+            return match.element
         
-        print("DEBUG: Starting timed wait loop...")
+        logger.debug("Starting timed wait loop...")
         start_time = time.time()
         attempt = 0
         
         while time.time() - start_time < timeout:
+            if is_cancelled(self.cancellation):
+                return None
             attempt += 1
             elapsed = int(time.time() - start_time)
             
             if attempt % 3 == 0:  # More frequent updates
-                print(f"DEBUG: Wait attempt {attempt}, elapsed {elapsed}s")
+                logger.debug("Wait attempt %s, elapsed %ss", attempt, elapsed)
                 Communicator.show_message(f"Still waiting for results... ({elapsed}s)")
             
             try:
@@ -121,106 +167,85 @@ class ImprovedScroller:
                 current_url = self.driver.current_url
                 
                 if attempt % 5 == 0:
-                    print(f"DEBUG: Current URL: {current_url[:100]}...")
+                    logger.debug("Current URL: %s...", current_url[:100])
                 
                 if "consent.google.com" in current_url:
                     Communicator.show_message("ERROR: Still on consent page - cannot access Google Maps")
-                    print("ERROR: Still on consent page")
+                    logger.error("Still on consent page")
                     return None
                 
                 # Check if we were redirected to a place page
                 if '/maps/place/' in current_url:
-                    print("DEBUG: Detected place page redirect")
+                    logger.debug("Detected place page redirect")
                     Communicator.show_message("Detected redirect to place page, handling...")
                     
                     if self.handle_direct_place_redirect():
                         current_url = self.driver.current_url
-                        print(f"DEBUG: After handling redirect, URL: {current_url}")
+                        logger.debug("After handling redirect, URL: %s", current_url)
                         
                         # Check if we now have results
                         if len(self.all_results_links) > 0:
-                            print(f"DEBUG: Have {len(self.all_results_links)} results after redirect handling")
+                            logger.debug("Have %s results after redirect handling", len(self.all_results_links))
                             Communicator.show_message(f"Found {len(self.all_results_links)} result(s)")
                             return "SINGLE_RESULT"
                         
                         # If we're back on search page, continue looking for results
                         if '/maps/search/' in current_url:
-                            print("DEBUG: Back on search page, continuing to look for results...")
-                            time.sleep(2)  # Give page time to load
+                            logger.debug("Back on search page, continuing to look for results...")
+                            wait_for_any(
+                                self.driver,
+                                RESULT_CONTAINER_SELECTORS,
+                                2,
+                                cancellation=self.cancellation,
+                                visible=True,
+                                min_html_length=MIN_RESULTS_HTML,
+                            )
                             continue
                     
-                    # If handling failed, wait and retry
-                    time.sleep(1)
+                    # If handling failed, give the result list a moment to show up and retry
+                    wait_for_any(self.driver, RESULT_FEED_SELECTORS, 1, cancellation=self.cancellation)
                     continue
                 
-                # Try multiple selectors for search results
-                selectors = [
-                    "[role='feed']",
-                    ".m6QErb",
-                    "div.m6QErb",
-                    ".section-scrollbox",
-                    "div[role='main']",
-                    "[aria-label*='Results']",
-                    ".section-layout"
-                ]
-                
-                for selector in selectors:
-                    try:
-                        element = self.driver.find_element("css selector", selector)
-                        
-                        if element and element.is_displayed():
-                            if attempt % 5 == 0:
-                                print(f"DEBUG: Found element with selector: {selector}")
-                            
-                            # Get element info
-                            try:
-                                html = element.get_attribute('outerHTML')
-                                
-                                # Check if element has content
-                                if html and len(html) > 100:
-                                    Communicator.show_message(f"Found search results container using selector: {selector}")
-                                    print(f"DEBUG: Returning results container (HTML length: {len(html)})")
-                                    return element
-                            except Exception as e:
-                                if attempt % 10 == 0:
-                                    print(f"DEBUG: Error getting element HTML: {str(e)}")
-                                continue
-                    except Exception as e:
-                        continue
+                # Try multiple selectors for search results, all in one call
+                match = probe(self.driver, RESULT_CONTAINER_SELECTORS, visible=True, min_html_length=MIN_RESULTS_HTML)
+                if match is not None:
+                    Communicator.show_message(f"Found search results container using selector: {match.selector}")
+                    logger.debug("Returning results container (selector %s of %s)", match.index + 1, len(RESULT_CONTAINER_SELECTORS))
+                    return match.element
                 
                 # If no selector worked after 10 attempts, try aggressive approach
                 if attempt >= 10 and attempt % 5 == 0:
-                    print("DEBUG: No selectors worked, trying to find any results...")
+                    logger.debug("No selectors worked, trying to find any results...")
                     try:
                         all_links = self.driver.find_elements("css selector", "a[href*='/maps/place/']")
-                        print(f"DEBUG: Found {len(all_links)} place links on page")
+                        logger.debug("Found %s place links on page", len(all_links))
                         
                         if len(all_links) > 0:
                             Communicator.show_message(f"Found {len(all_links)} results by scanning page links")
-                            print("DEBUG: Will extract links directly from page")
+                            logger.debug("Will extract links directly from page")
                             body = self.driver.find_element("css selector", "body")
                             return body
                     except Exception as e:
-                        print(f"DEBUG: Direct link search failed: {str(e)}")
+                        logger.debug("Direct link search failed: %s", e)
                 
                 time.sleep(0.5)  # Shorter sleep for faster detection
                 
             except Exception as e:
-                print(f"ERROR in wait loop: {str(e)}")
+                logger.error("Error in wait loop: %s", e)
                 time.sleep(0.5)
         
-        print(f"ERROR: Timeout after {timeout}s waiting for search results")
+        logger.error("Timeout after %ss waiting for search results", timeout)
         Communicator.show_message("Timeout waiting for search results - trying last resort")
         
         # Last resort - check if we collected any results during redirect handling
         if len(self.all_results_links) > 0:
-            print(f"DEBUG: Timeout but have {len(self.all_results_links)} results from redirect handling")
+            logger.debug("Timeout but have %s results from redirect handling", len(self.all_results_links))
             Communicator.show_message(f"Proceeding with {len(self.all_results_links)} result(s) found")
             return "SINGLE_RESULT"
         
         # Try body extraction as final fallback
         try:
-            print("DEBUG: Timeout - attempting last resort body extraction")
+            logger.debug("Timeout - attempting last resort body extraction")
             body = self.driver.find_element("css selector", "body")
             return body
         except:
@@ -233,40 +258,40 @@ class ImprovedScroller:
                 # We already have the single result in all_results_links
                 return []
             
-            print("DEBUG: Starting link extraction...")
+            logger.debug("Starting link extraction...")
             html_content = element.get_attribute('outerHTML')
-            print(f"DEBUG: Got HTML content, length: {len(html_content)}")
+            logger.debug("Got HTML content, length: %s", len(html_content))
             
             soup = BeautifulSoup(html_content, 'html.parser')
             
             # Method 1: Try to find links with the hfpxzc class (Google Maps result links)
             result_links = soup.find_all('a', class_='hfpxzc')
-            print(f"DEBUG: Method 1 (hfpxzc class): Found {len(result_links)} links")
+            logger.debug("Method 1 (hfpxzc class): Found %s links", len(result_links))
             
             valid_links = []
             for link in result_links:
                 href = link.get('href', '')
                 if href and href not in valid_links:
                     valid_links.append(href)
-                    print(f"DEBUG: Added link from hfpxzc: {href[:80]}...")
+                    logger.debug("Added link from hfpxzc: %s...", href[:80])
             
             # Method 2: If no hfpxzc links found, try data-item-id attribute
             if len(valid_links) == 0:
-                print("DEBUG: Method 2 - trying data-item-id...")
+                logger.debug("Method 2 - trying data-item-id...")
                 data_item_links = soup.find_all('a', attrs={'data-item-id': True})
-                print(f"DEBUG: Found {len(data_item_links)} links with data-item-id")
+                logger.debug("Found %s links with data-item-id", len(data_item_links))
                 
                 for link in data_item_links:
                     href = link.get('href', '')
                     if href and '/maps/place/' in href and href not in valid_links:
                         valid_links.append(href)
-                        print(f"DEBUG: Added link from data-item-id: {href[:80]}...")
+                        logger.debug("Added link from data-item-id: %s...", href[:80])
             
             # Method 3: If still no links, try all anchor tags with place URLs
             if len(valid_links) == 0:
-                print("DEBUG: Method 3 - scanning all anchor tags...")
+                logger.debug("Method 3 - scanning all anchor tags...")
                 all_links = soup.find_all('a', href=True)
-                print(f"DEBUG: Found {len(all_links)} total anchor tags")
+                logger.debug("Found %s total anchor tags", len(all_links))
                 
                 for link in all_links:
                     href = link.get('href', '')
@@ -277,37 +302,37 @@ class ImprovedScroller:
                         if href.startswith('http'):
                             if href not in valid_links:
                                 valid_links.append(href)
-                                print(f"DEBUG: Added place link: {href[:80]}...")
+                                logger.debug("Added place link: %s...", href[:80])
                         elif href.startswith('/'):
-                            full_url = f"https://www.google.com{href}"
+                            full_url = f"{self.base_url}{href}"
                             if full_url not in valid_links:
                                 valid_links.append(full_url)
-                                print(f"DEBUG: Added relative link: {full_url[:80]}...")
+                                logger.debug("Added relative link: %s...", full_url[:80])
             
             # Method 4: Last resort - use Selenium to find elements directly
             if len(valid_links) == 0:
-                print("DEBUG: Method 4 - using Selenium to find links...")
+                logger.debug("Method 4 - using Selenium to find links...")
                 try:
                     from selenium.webdriver.common.by import By
                     
                     # Try to find place links directly with Selenium
                     place_links = self.driver.find_elements(By.CSS_SELECTOR, "a[href*='/maps/place/']")
-                    print(f"DEBUG: Selenium found {len(place_links)} place links")
+                    logger.debug("Selenium found %s place links", len(place_links))
                     
                     for link_elem in place_links:
                         try:
                             href = link_elem.get_attribute('href')
                             if href and href not in valid_links:
                                 valid_links.append(href)
-                                print(f"DEBUG: Added Selenium link: {href[:80]}...")
+                                logger.debug("Added Selenium link: %s...", href[:80])
                         except:
                             continue
                 except Exception as e:
-                    print(f"DEBUG: Selenium method failed: {str(e)}")
+                    logger.debug("Selenium method failed: %s", e)
             
-            print(f"DEBUG: Total extracted {len(valid_links)} valid links")
+            logger.debug("Total extracted %s valid links", len(valid_links))
             if len(valid_links) > 0:
-                print(f"DEBUG: First link: {valid_links[0][:100]}")
+                logger.debug("First link: %s", valid_links[0][:100])
                 Communicator.show_message(f"Extracted {len(valid_links)} business links")
             else:
                 Communicator.show_message("Warning: No links extracted from current view")
@@ -315,32 +340,52 @@ class ImprovedScroller:
             return valid_links
             
         except Exception as e:
-            print(f"ERROR extracting links: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error extracting links: %s", e)
             return []
     
     def scroll(self):
         """Improved scrolling with better error handling and performance"""
         
-        Communicator.show_message("DEBUG: Starting enhanced scroller.scroll() method")
-        print("DEBUG: Starting enhanced scroller.scroll() method")
+        with span("scroll") as trace_args:
+            self.collect_links()
+            trace_args.update(self.scroll_stats)
+        
+        if is_cancelled(self.cancellation):
+            return
+        
+        # Start parsing
+        logger.debug("Checking if we have results to parse")
+        logger.debug("all_results_links count: %s", len(self.all_results_links))
+        
+        if len(self.all_results_links) > 0 or self.network_capture is not None:
+            # Network mode may have captured records without any DOM link
+            Communicator.show_message(f"Total results found: {len(self.all_results_links)}")
+            logger.debug("Starting parsing with %s links", len(self.all_results_links))
+            self.start_parsing()
+        else:
+            Communicator.show_message("No results to parse - no links were collected")
+            logger.error("No results to parse - all_results_links is empty")
+    
+    def collect_links(self):
+        """Scroll the results feed and return all unique place links without parsing them"""
+        
+        logger.debug("Starting enhanced scroller.scroll() method")
         
         # Make sure all_results_links is initialized
         self.all_results_links = []
+        self.scroll_stats = {}
         self.unique_links = set()  # Track unique links to avoid duplicates
-        Communicator.show_message("DEBUG: Initialized all_results_links and unique_links tracker")
-        print("DEBUG: Initialized all_results_links and unique_links tracker")
+        logger.debug("Initialized all_results_links and unique_links tracker")
         
         # Check page state immediately (no additional sleep since mainscraping already waited)
         try:
             current_url = self.driver.current_url
             page_title = self.driver.title
-            print(f"DEBUG: Page URL: {current_url}")
-            print(f"DEBUG: Page title: {page_title}")
+            logger.debug("Page URL: %s", current_url)
+            logger.debug("Page title: %s", page_title)
             Communicator.show_message(f"Current page: {page_title[:50]}...")
         except Exception as e:
-            print(f"DEBUG: Could not get page info: {str(e)}")
+            logger.debug("Could not get page info: %s", e)
         
         # Wait for search results to load
         Communicator.show_message("Looking for search results...")
@@ -348,26 +393,27 @@ class ImprovedScroller:
         
         if scrollAbleElement is None:
             Communicator.show_message("ERROR: Could not find search results container")
-            print("ERROR: Could not find search results container")
-            return
+            logger.error("Could not find search results container")
+            return self.all_results_links
         
         # Check if we already have a single result from redirect handling
         if scrollAbleElement == "SINGLE_RESULT":
-            print(f"DEBUG: Single result already collected: {len(self.all_results_links)} links")
+            logger.debug("Single result already collected: %s links", len(self.all_results_links))
             Communicator.show_message(f"Single result found, proceeding to scraping...")
-            
-            if len(self.all_results_links) > 0:
-                print(f"DEBUG: Starting parsing with single result")
-                self.start_parsing()
-            return
+            return self.all_results_links
         
-        # Save page source for debugging
-        try:
-            with open('/tmp/page_source.html', 'w', encoding='utf-8') as f:
-                f.write(self.driver.page_source)
-            print("DEBUG: Page source saved to /tmp/page_source.html")
-        except Exception as e:
-            print(f"DEBUG: Could not save page source: {str(e)}")
+        # Save page source for debugging, only when debug logging is on
+        if logger.isEnabledFor(logging.DEBUG):
+            try:
+                with open('/tmp/page_source.html', 'w', encoding='utf-8') as f:
+                    f.write(self.driver.page_source)
+                logger.debug("Page source saved to /tmp/page_source.html")
+            except Exception as e:
+                logger.debug("Could not save page source: %s", e)
+        
+        if self.network_capture is not None:
+            self.network_capture.capture_initial_state()
+            self.network_capture.poll()
         
         # Extract initial links
         initial_links = self.extract_links_from_element(scrollAbleElement)
@@ -375,16 +421,15 @@ class ImprovedScroller:
             if link not in self.unique_links:
                 self.unique_links.add(link)
                 self.all_results_links.append(link)
-        print(f"DEBUG: Initial extraction found {len(initial_links)} links, {len(self.all_results_links)} unique")
-        Communicator.show_message(f"DEBUG: Initial extraction found {len(self.all_results_links)} unique links")
+        logger.debug("Initial extraction found %s links, %s unique", len(initial_links), len(self.all_results_links))
         
         if len(initial_links) == 0:
             # Try alternative extraction method
-            print("DEBUG: No links found with primary method, trying alternative...")
+            logger.debug("No links found with primary method, trying alternative...")
             try:
                 # Get all anchor tags from the page
                 all_anchors = self.driver.find_elements("css selector", "a")
-                print(f"DEBUG: Found {len(all_anchors)} total anchor tags on page")
+                logger.debug("Found %s total anchor tags on page", len(all_anchors))
                 
                 for anchor in all_anchors:
                     try:
@@ -396,58 +441,56 @@ class ImprovedScroller:
                     except:
                         continue
                 
-                print(f"DEBUG: Alternative method found {len(self.all_results_links)} links")
+                logger.debug("Alternative method found %s links", len(self.all_results_links))
                 Communicator.show_message(f"Alternative extraction found {len(self.all_results_links)} links")
             except Exception as e:
-                print(f"ERROR in alternative extraction: {str(e)}")
+                logger.error("Error in alternative extraction: %s", e)
         
         Communicator.show_message("Starting scrolling to load more results...")
         
-        last_height = 0
-        scroll_attempts = 0
-        max_scroll_attempts = 50
-        no_new_results_count = 0
+        pacer = ScrollPacer(self.driver)
+        state = pacer.feed_state(scrollAbleElement)
+        self.check_budget(pacer)
         
-        while scroll_attempts < max_scroll_attempts:
+        while pacer.should_continue():
             if Common.close_thread_is_set():
+                pacer.stop("cancelled")
+                self.record_scroll_stats(pacer)
                 self.driver.quit()
-                return
+                PROXY_POOL.release_driver(self.driver)
+                return self.all_results_links
+            
+            if is_cancelled(self.cancellation):
+                # The job's browser is closed by its cancellation callback
+                pacer.stop("cancelled")
+                self.record_scroll_stats(pacer)
+                return self.all_results_links
             
             try:
-                # Find the scrollable element
-                scrollAbleElement = None
-                scrollable_selectors = ["[role='feed']", ".m6QErb", ".section-scrollbox"]
+                # Scrolls load results from Google, they wait for the shared rate limit like navigations
+                if not GOOGLE_RATE_LIMITER.acquire(egress_of(self.driver), self.cancellation, kind="scroll"):
+                    continue  # cancelled, stopped at the top of the loop
                 
-                for selector in scrollable_selectors:
-                    try:
-                        scrollAbleElement = self.driver.find_element("css selector", selector)
-                        if scrollAbleElement:
-                            break
-                    except:
-                        continue
+                iteration_started = time.perf_counter()
+                round_trips = pacer.round_trips
                 
-                if scrollAbleElement is None:
+                # Find the feed, scroll it, wait until it grows and read its new links in one
+                # round trip; a re-rendering feed gets a moment to come back
+                step = pacer.step(SCROLLABLE_SELECTORS, state.get("cards", 0), FEED_WAIT_SECONDS)
+                
+                if step is None:
                     Communicator.show_message("Lost scrollable element")
-                    print("ERROR: Lost scrollable element")
+                    logger.error("Lost scrollable element")
+                    pacer.stop("lost_feed")
                     break
+                state = step
                 
-                # Get current count
-                current_count = len(self.all_results_links)
-                
-                # Scroll down
-                self.driver.execute_script(
-                    "arguments[0].scrollTo(0, arguments[0].scrollHeight);",
-                    scrollAbleElement,
-                )
-                time.sleep(2)
+                if self.network_capture is not None:
+                    commands = self.network_capture.commands
+                    self.network_capture.poll()
+                    pacer.round_trips += self.network_capture.commands - commands
                 
-                # Get new scroll height
-                new_height = self.driver.execute_script(
-                    "return arguments[0].scrollHeight", scrollAbleElement
-                )
-                
-                # Extract new links
-                new_links = self.extract_links_from_element(scrollAbleElement)
+                new_links = state["links"]
                 
                 # Add only unique links using set for faster lookup
                 added_count = 0
@@ -457,67 +500,61 @@ class ImprovedScroller:
                         self.all_results_links.append(link)
                         added_count += 1
                 
-                print(f"DEBUG: Added {added_count} new links. Total: {len(self.all_results_links)}")
+                logger.debug("Added %s new links. Total: %s (cards: %s, height: %s, next wait: %.1fs)", added_count, len(self.all_results_links), state['cards'], state['height'], pacer.wait)
                 Communicator.show_message(f"Found {len(self.all_results_links)} results so far...")
                 
-                # Check if we added new results
-                if added_count == 0:
-                    no_new_results_count += 1
-                else:
-                    no_new_results_count = 0
-                
-                # If no new results for 3 consecutive scrolls, check if we're at the end
-                if no_new_results_count >= 3:
-                    Communicator.show_message("No new results found, checking if at end...")
-                    print("DEBUG: No new results for 3 scrolls")
-                    
-                    # Check for end marker
-                    try:
-                        end_markers = [
-                            "You've reached the end",
-                            "reached the end",
-                            ".PbZDve"
-                        ]
-                        
-                        page_text = self.driver.page_source.lower()
-                        if any(marker.lower() in page_text for marker in end_markers):
-                            Communicator.show_message("Reached the end of results")
-                            print("DEBUG: Reached end of results")
-                            break
-                    except:
-                        pass
-                    
-                    # If we have results, break
-                    if len(self.all_results_links) > 0:
-                        break
+                pacer.record(added_count, state)
+                self.check_budget(pacer)
+                metrics.observe_phase("scroll_iteration", iteration_started)
+                metrics.SCROLL_ROUND_TRIPS.observe(pacer.round_trips - round_trips)
                 
-                scroll_attempts += 1
+                if pacer.stop_reason == "end_of_list":
+                    Communicator.show_message("Reached the end of results")
+                    logger.debug("Reached end of results")
+                elif pacer.stop_reason == "stalled":
+                    Communicator.show_message("No new results found, stopping scrolling")
+                    logger.debug("No new results for %s scrolls", pacer.stalls)
                 
+            except DailyBudgetExceeded as e:
+                Communicator.show_message(f"Stopping scrolling: {str(e)}")
+                pacer.stop("daily_budget")
             except Exception as e:
+                metrics.FAILURES.inc(phase="scroll")
                 Communicator.show_message(f"Error during scrolling: {str(e)}")
-                print(f"ERROR during scrolling: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                scroll_attempts += 1
-                time.sleep(2)
+                logger.exception("Error during scrolling: %s", e)
+                pacer.record(0, {})
+                time.sleep(pacer.wait)
         
-        Communicator.show_message("Scrolling completed")
-        print(f"DEBUG: Scrolling completed. Total results: {len(self.all_results_links)}")
-        Communicator.show_message(f"DEBUG: Total results collected: {len(self.all_results_links)}")
+        self.record_scroll_stats(pacer)
+        
+        if self.network_capture is not None:
+            self.network_capture.poll()
+        
+        Communicator.show_message(
+            f"Scrolling completed after {pacer.iterations} scroll(s) in {self.scroll_stats['duration_seconds']}s"
+        )
+        logger.debug("Scrolling completed. Total results: %s, stats: %s", len(self.all_results_links), self.scroll_stats)
         
         # Print first few links for debugging
         if len(self.all_results_links) > 0:
-            print(f"DEBUG: First 3 links: {self.all_results_links[:3]}")
-            Communicator.show_message(f"DEBUG: Sample links collected successfully")
+            logger.debug("First 3 links: %s", self.all_results_links[:3])
         
-        # Start parsing
-        print(f"DEBUG: Checking if we have results to parse")
-        print(f"DEBUG: all_results_links count: {len(self.all_results_links)}")
+        return self.all_results_links
+    
+    def check_budget(self, pacer):
+        """Stop scrolling once enough links were collected or parsing needs the time left"""
+        if not pacer.should_continue():
+            return
         
-        if len(self.all_results_links) > 0:
-            Communicator.show_message(f"Total results found: {len(self.all_results_links)}")
-            print(f"DEBUG: Starting parsing with {len(self.all_results_links)} links")
-            self.start_parsing()
-        else:
-            Communicator.show_message("No results to parse - no links were collected")
-            print("ERROR: No results to parse - all_results_links is empty")
\ No newline at end of file
+        if self.budget.enough_links(len(self.all_results_links)):
+            pacer.stop("max_results")
+            Communicator.show_message(f"Collected the {self.budget.max_results} results asked for, stopping scrolling")
+        elif self.budget.scroll_time_up(len(self.all_results_links)):
+            pacer.stop("deadline")
+            Communicator.show_message("Stopping scrolling to leave time for parsing within the deadline")
+    
+    def record_scroll_stats(self, pacer):
+        """Keep the scroll phase duration and iteration count of this job"""
+        self.scroll_stats = pacer.stats()
+        metrics.observe_phase("scroll", pacer.started)
+        metrics.SCROLL_ITERATIONS.observe(pacer.iterations)
@@ -0,0 +1,269 @@
+"""
+Job state shared by the processes of the web app.
+
+A job runs in the worker process that accepted it, but its status may be
+polled through any worker. Job metadata (status, query, output file, progress
+snapshots) and messages are therefore written to a store every process can
+read, chosen with JOB_STORE_URL:
+
+    sqlite:///job_store.sqlite3   SQLite database in WAL mode (default)
+    redis://localhost:6379/0      Redis or any server speaking its protocol (needs the redis package)
+    memory://                     this process only, for a single process server
+
+Every backend stores a job as a flat dict of JSON values plus its list of
+messages.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from settings import JOB_STORE_URL
+
+
+class JobStore(ABC):
+    """Interface of the job store backends"""
+
+    @abstractmethod
+    def create(self, job_id, **fields):
+        ...
+
+    @abstractmethod
+    def update(self, job_id, **fields):
+        ...
+
+    @abstractmethod
+    def append_message(self, job_id, message):
+        ...
+
+    @abstractmethod
+    def get(self, job_id, last_messages=50):
+        """Job fields plus its last messages under "messages", or None"""
+        ...
+
+    @abstractmethod
+    def latest(self, last_messages=50):
+        """Most recently created job, or None"""
+        ...
+
+    @abstractmethod
+    def delete(self, job_id):
+        ...
+
+    @abstractmethod
+    def expire(self, max_age):
+        """Delete the jobs created more than max_age seconds ago, returns how many"""
+        ...
+
+
+class MemoryJobStore(JobStore):
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.messages = {}
+
+    def create(self, job_id, **fields):
+        with self.lock:
+            self.jobs[job_id] = dict(fields, job_id=job_id, created_at=time.time())
+            self.messages[job_id] = []
+
+    def update(self, job_id, **fields):
+        with self.lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(fields)
+
+    def append_message(self, job_id, message):
+        with self.lock:
+            if job_id in self.messages:
+                self.messages[job_id].append(message)
+
+    def get(self, job_id, last_messages=50):
+        with self.lock:
+            if job_id not in self.jobs:
+                return None
+            messages = self.messages[job_id][-last_messages:] if last_messages else []
+            return dict(self.jobs[job_id], messages=messages)
+
+    def latest(self, last_messages=50):
+        with self.lock:
+            if not self.jobs:
+                return None
+            job_id = max(self.jobs.values(), key=lambda job: job["created_at"])["job_id"]
+        return self.get(job_id, last_messages)
+
+    def delete(self, job_id):
+        with self.lock:
+            self.jobs.pop(job_id, None)
+            self.messages.pop(job_id, None)
+
+    def expire(self, max_age):
+        cutoff = time.time() - max_age
+        with self.lock:
+            expired = [job_id for job_id, job in self.jobs.items() if job["created_at"] < cutoff]
+        for job_id in expired:
+            self.delete(job_id)
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            created_at REAL NOT NULL,
+            fields TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            message TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS messages_job ON messages (job_id, id);
+    """
+
+    def __init__(self, path) -> None:
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        # One connection per thread, sqlite3 connections are not shared between threads
+        self.local = threading.local()
+        # Serialises read-modify-write of the fields of a job within this process,
+        # BEGIN IMMEDIATE does the same between processes
+        self.lock = threading.Lock()
+        with self.connection() as db:
+            db.executescript(self.SCHEMA)
+
+    def connection(self):
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA busy_timeout=10000")
+            self.local.db = db
+        return db
+
+    def create(self, job_id, **fields):
+        fields = dict(fields, job_id=job_id)
+        db = self.connection()
+        db.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, created_at, fields) VALUES (?, ?, ?)",
+            (job_id, time.time(), json.dumps(fields, default=str)),
+        )
+        db.execute("DELETE FROM messages WHERE job_id = ?", (job_id,))
+
+    def update(self, job_id, **fields):
+        db = self.connection()
+        with self.lock:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT fields FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+                if row is not None:
+                    stored = json.loads(row[0])
+                    stored.update(fields)
+                    db.execute(
+                        "UPDATE jobs SET fields = ? WHERE job_id = ?",
+                        (json.dumps(stored, default=str), job_id),
+                    )
+                db.execute("COMMIT")
+            except:
+                db.execute("ROLLBACK")
+                raise
+
+    def append_message(self, job_id, message):
+        self.connection().execute("INSERT INTO messages (job_id, message) VALUES (?, ?)", (job_id, message))
+
+    def get(self, job_id, last_messages=50):
+        db = self.connection()
+        row = db.execute("SELECT fields, created_at FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        messages = db.execute(
+            "SELECT message FROM messages WHERE job_id = ? ORDER BY id DESC LIMIT ?",
+            (job_id, last_messages),
+        ).fetchall()
+        return dict(json.loads(row[0]), created_at=row[1], messages=[m[0] for m in reversed(messages)])
+
+    def latest(self, last_messages=50):
+        row = self.connection().execute("SELECT job_id FROM jobs ORDER BY created_at DESC LIMIT 1").fetchone()
+        return self.get(row[0], last_messages) if row is not None else None
+
+    def delete(self, job_id):
+        db = self.connection()
+        db.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        db.execute("DELETE FROM messages WHERE job_id = ?", (job_id,))
+
+    def expire(self, max_age):
+        db = self.connection()
+        cutoff = time.time() - max_age
+        removed = db.execute("DELETE FROM jobs WHERE created_at < ?", (cutoff,)).rowcount
+        db.execute("DELETE FROM messages WHERE job_id NOT IN (SELECT job_id FROM jobs)")
+        return removed
+
+
+class RedisJobStore(JobStore):
+    """Jobs as hashes of JSON values, messages as lists, newest jobs in a sorted set"""
+
+    PREFIX = "gms:job:"
+    INDEX = "gms:jobs"
+
+    def __init__(self, url) -> None:
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("JOB_STORE_URL points to Redis but the redis package is not installed (pip install redis)")
+        self.redis = redis.Redis.from_url(url)
+
+    def create(self, job_id, **fields):
+        fields = dict(fields, job_id=job_id)
+        created_at = time.time()
+        pipe = self.redis.pipeline()
+        pipe.delete(self.PREFIX + job_id, self.PREFIX + job_id + ":messages")
+        pipe.hset(self.PREFIX + job_id, mapping={k: json.dumps(v, default=str) for k, v in fields.items()})
+        pipe.hset(self.PREFIX + job_id, "created_at", json.dumps(created_at))
+        pipe.zadd(self.INDEX, {job_id: created_at})
+        pipe.execute()
+
+    def update(self, job_id, **fields):
+        if fields and self.redis.exists(self.PREFIX + job_id):
+            self.redis.hset(self.PREFIX + job_id, mapping={k: json.dumps(v, default=str) for k, v in fields.items()})
+
+    def append_message(self, job_id, message):
+        self.redis.rpush(self.PREFIX + job_id + ":messages", message)
+
+    def get(self, job_id, last_messages=50):
+        stored = self.redis.hgetall(self.PREFIX + job_id)
+        if not stored:
+            return None
+        job = {k.decode(): json.loads(v) for k, v in stored.items()}
+        messages = self.redis.lrange(self.PREFIX + job_id + ":messages", -last_messages, -1) if last_messages else []
+        job["messages"] = [m.decode() for m in messages]
+        return job
+
+    def latest(self, last_messages=50):
+        newest = self.redis.zrevrange(self.INDEX, 0, 0)
+        return self.get(newest[0].decode(), last_messages) if newest else None
+
+    def delete(self, job_id):
+        pipe = self.redis.pipeline()
+        pipe.delete(self.PREFIX + job_id, self.PREFIX + job_id + ":messages")
+        pipe.zrem(self.INDEX, job_id)
+        pipe.execute()
+
+    def expire(self, max_age):
+        expired = self.redis.zrangebyscore(self.INDEX, "-inf", time.time() - max_age)
+        for job_id in expired:
+            self.delete(job_id.decode())
+        return len(expired)
+
+
+def open_job_store(url=JOB_STORE_URL):
+    if url.startswith("sqlite:///"):
+        return SQLiteJobStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisJobStore(url)
+    if url.startswith("memory://"):
+        return MemoryJobStore()
+    raise ValueError(f"Unsupported JOB_STORE_URL '{url}', use sqlite:///<path>, redis://<host>/<db> or memory://")
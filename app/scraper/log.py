@@ -0,0 +1,55 @@
+"""
+Leveled logging of the scraper.
+
+Modules log through get_logger(__name__) with lazy %-style arguments, so a
+disabled level costs one level check and no string formatting. Records are put
+on a queue by the thread that logs them and written to the console by a single
+listener thread, keeping stdout locking and I/O out of the scraping loops.
+
+DEBUG records are dropped unless LOG_LEVEL is "DEBUG". Messages meant for the
+user still go through Communicator.show_message, which is the job's message
+stream in the web apps; debug chatter no longer does.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from settings import LOG_LEVEL, LOG_FORMAT
+
+ROOT_LOGGER = "scraper"
+
+listener = None
+setup_lock = threading.Lock()
+
+
+def setup_logging(level=LOG_LEVEL, stream=None):
+    """Route the scraper loggers through a queue to the console. Calling it again only changes the level"""
+    global listener
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    with setup_lock:
+        if listener is not None:
+            return
+
+        records = queue.SimpleQueue()
+        console = logging.StreamHandler(stream or sys.stdout)
+        console.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        root.addHandler(logging.handlers.QueueHandler(records))
+        root.propagate = False
+        listener = logging.handlers.QueueListener(records, console, respect_handler_level=True)
+        listener.start()
+        # Write out what is still queued when the process exits
+        atexit.register(listener.stop)
+
+
+def get_logger(name):
+    """Logger of a module, e.g. get_logger(__name__) in scraper/parser.py"""
+    setup_logging()
+    if name != ROOT_LOGGER and not name.startswith(ROOT_LOGGER + "."):
+        name = f"{ROOT_LOGGER}.{name}"
+    return logging.getLogger(name)
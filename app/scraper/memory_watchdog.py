@@ -0,0 +1,179 @@
+"""
+Memory watchdog for long parsing runs.
+
+Chrome leaks renderer memory over hundreds of page loads, until the host runs
+out of memory and the browser gets killed along with the job. The watchdog is
+checked between two places: it samples the resident memory of the driver's
+Chrome process tree and the host memory use (at most every MEMORY_CHECK_INTERVAL
+seconds, from /proc), counts the places opened by the driver, and asks for a
+fresh driver when a limit is reached. A full host only counts when Chrome holds
+MIN_CHROME_MEMORY_SHARE of the used memory, since a restart frees nothing that
+other processes use. The parser then restarts the driver and
+carries on with the next place.
+"""
+
+import os
+import time
+from scraper import metrics
+from settings import (
+    MAX_MEMORY_USAGE,
+    MIN_CHROME_MEMORY_SHARE,
+    MEMORY_CHECK_INTERVAL,
+    MAX_CHROME_MEMORY_MB,
+    MAX_PLACES_PER_DRIVER,
+)
+
+
+def read_proc_status(pid):
+    """Parent pid and resident memory in bytes of a process, from /proc/<pid>/status"""
+    ppid, rss = None, 0
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("PPid:"):
+                    ppid = int(line.split()[1])
+                elif line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        return None, 0
+    return ppid, rss
+
+
+def process_tree_rss(root_pids):
+    """Summed resident memory of the given processes and all their descendants"""
+    if not os.path.isdir("/proc"):
+        return 0
+
+    children = {}
+    memory = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        ppid, rss = read_proc_status(entry)
+        if ppid is None:
+            continue
+        pid = int(entry)
+        memory[pid] = rss
+        children.setdefault(ppid, []).append(pid)
+
+    total = 0
+    seen = set()
+    pending = [pid for pid in root_pids if pid in memory]
+    while pending:
+        pid = pending.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        total += memory.get(pid, 0)
+        pending.extend(children.get(pid, []))
+    return total
+
+
+def host_memory():
+    """Used and total host memory in bytes, from /proc/meminfo. None when unavailable"""
+    values = {}
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                values[key] = int(value.split()[0])
+    except (OSError, ValueError):
+        return None
+
+    total = values.get("MemTotal")
+    available = values.get("MemAvailable")
+    if not total or available is None:
+        return None
+    return (total - available) * 1024, total * 1024
+
+
+def driver_pids(driver):
+    """Pids of the chromedriver service and of the browser started by the driver"""
+    pids = []
+    for pid in (
+        getattr(driver, "browser_pid", None),
+        getattr(getattr(getattr(driver, "service", None), "process", None), "pid", None),
+    ):
+        if isinstance(pid, int):
+            pids.append(pid)
+    return pids
+
+
+class MemoryWatchdog:
+    def __init__(
+        self,
+        driver,
+        max_memory_percent=MAX_MEMORY_USAGE,
+        min_chrome_share=MIN_CHROME_MEMORY_SHARE,
+        max_chrome_mb=MAX_CHROME_MEMORY_MB,
+        max_places=MAX_PLACES_PER_DRIVER,
+        check_interval=MEMORY_CHECK_INTERVAL,
+    ) -> None:
+        """Limits set to None are not checked"""
+        self.max_memory_percent = max_memory_percent
+        self.min_chrome_share = min_chrome_share
+        self.max_chrome_mb = max_chrome_mb
+        self.max_places = max_places
+        self.check_interval = check_interval
+
+        self.recycles = 0
+        self.chrome_rss = 0
+        self.host_used = None
+        self.host_percent = None
+        self.reset(driver)
+
+    def reset(self, driver):
+        """Start watching a new driver"""
+        self.driver = driver
+        self.places = 0
+        self.last_sample = 0.0
+
+    def place_opened(self):
+        self.places += 1
+
+    def sample(self):
+        self.last_sample = time.monotonic()
+        self.chrome_rss = process_tree_rss(driver_pids(self.driver))
+        memory = host_memory()
+        if memory is not None:
+            self.host_used, total = memory
+            self.host_percent = 100.0 * self.host_used / total
+        else:
+            self.host_used, self.host_percent = None, None
+        metrics.CHROME_MEMORY.set(self.chrome_rss)
+
+    def check(self):
+        """Reason to restart the driver now, or None"""
+
+        if self.max_places is not None and self.places >= self.max_places:
+            return "max_places"
+
+        if time.monotonic() - self.last_sample < self.check_interval:
+            return None
+        self.sample()
+
+        if self.max_chrome_mb is not None and self.chrome_rss >= self.max_chrome_mb * 1024 * 1024:
+            return "chrome_memory"
+        # Restarting only helps when the browser holds a real part of the used memory
+        if (
+            self.max_memory_percent is not None
+            and self.host_percent is not None
+            and self.host_percent >= self.max_memory_percent
+            and self.chrome_rss > 0
+            and self.chrome_rss >= (self.min_chrome_share or 0) * self.host_used
+        ):
+            return "host_memory"
+        return None
+
+    def recycled(self, driver, reason):
+        self.recycles += 1
+        metrics.DRIVER_RECYCLES.inc(reason=reason)
+        self.reset(driver)
+
+    def stats(self):
+        return {
+            "places_on_driver": self.places,
+            "recycles": self.recycles,
+            "chrome_memory_mb": round(self.chrome_rss / 1024 / 1024, 1),
+            "host_memory_percent": round(self.host_percent, 1) if self.host_percent is not None else None,
+        }
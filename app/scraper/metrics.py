@@ -0,0 +1,365 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Counters, gauges and histograms are module level objects so every part of the
+scraper can record into them; production_app serves them at /metrics.
+
+Each worker process of a multi-process server has its own values. With
+METRICS_DIR set, every worker saves a snapshot of them there (write_snapshot)
+and /metrics merges the recent snapshots of the other workers into its own:
+counters and histograms are summed, gauges are combined as their multiprocess
+mode says (sum, max or min).
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    type_name = "untyped"
+
+    def __init__(self, name, documentation) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def header(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def collect(self):
+        """Current values by label key"""
+        with self.lock:
+            return dict(self.values)
+
+    def merge(self, values, other):
+        """Add the values of another process, other being collect() output"""
+        for key, value in other.items():
+            values[key] = values.get(key, 0) + value
+
+    def render(self, others=()):
+        """Lines of the metric, with the values of other processes merged in"""
+        values = self.collect()
+        for other in others:
+            self.merge(values, other)
+        return self.header() + self.format(values)
+
+    def format(self, values):
+        # A metric without values yet shows as 0
+        values = values or {(): 0}
+        return [f"{self.name}{format_labels(key)} {format_value(value)}" for key, value in sorted(values.items())]
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name, documentation) -> None:
+        super().__init__(name, documentation)
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+
+class Gauge(Metric):
+    type_name = "gauge"
+    MULTIPROCESS_MODES = {"sum": lambda a, b: a + b, "max": max, "min": min}
+
+    def __init__(self, name, documentation, function=None, multiprocess_mode="sum") -> None:
+        """
+        function: optional callable that computes the value when metrics are rendered
+        multiprocess_mode: how the values of the worker processes combine, "sum",
+                           "max" (e.g. host wide values every worker sees) or "min"
+        """
+        super().__init__(name, documentation)
+        self.values = {}
+        self.function = function
+        self.combine = self.MULTIPROCESS_MODES[multiprocess_mode]
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[tuple(sorted(labels.items()))] = value
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels):
+        if self.function is not None:
+            return self.function()
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+    def collect(self):
+        if self.function is not None:
+            try:
+                return {(): self.function()}
+            except Exception:
+                return {(): 0}
+        return super().collect()
+
+    def merge(self, values, other):
+        for key, value in other.items():
+            values[key] = self.combine(values[key], value) if key in values else value
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def mean(self, **labels):
+        """Average observed value, None before the first observation"""
+        with self.lock:
+            series = self.series.get(tuple(sorted(labels.items())))
+            if not series or not series["count"]:
+                return None
+            return series["sum"] / series["count"]
+
+    def collect(self):
+        with self.lock:
+            return {key: dict(value, counts=list(value["counts"])) for key, value in self.series.items()}
+
+    def merge(self, values, other):
+        for key, value in other.items():
+            series = values.get(key)
+            if series is None:
+                values[key] = dict(value, counts=list(value["counts"]))
+                continue
+            series["counts"] = [a + b for a, b in zip(series["counts"], value["counts"])]
+            series["sum"] += value["sum"]
+            series["count"] += value["count"]
+
+    def format(self, values):
+        lines = []
+        for key, value in sorted(values.items()):
+            for bound, count in zip(self.buckets, value["counts"]):
+                labels = key + (("le", format_value(bound)),)
+                lines.append(f"{self.name}_bucket{format_labels(labels)} {count}")
+            lines.append(f"{self.name}_sum{format_labels(key)} {format_value(value['sum'])}")
+            lines.append(f"{self.name}_count{format_labels(key)} {value['count']}")
+        return lines
+
+
+REGISTRY = []
+
+
+def render(snapshots=()):
+    """All metrics in the Prometheus text format, merged with snapshots of other processes"""
+    lines = []
+    for metric in REGISTRY:
+        others = [snapshot[metric.name] for snapshot in snapshots if metric.name in snapshot]
+        lines.extend(metric.render(others))
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    """Values of every metric of this process, as JSON friendly data"""
+    return {
+        metric.name: [[list(map(list, key)), value] for key, value in metric.collect().items()]
+        for metric in REGISTRY
+    }
+
+
+def load_snapshot(data):
+    """Inverse of snapshot(): label keys back to tuples"""
+    return {
+        name: {tuple(tuple(pair) for pair in key): value for key, value in entries}
+        for name, entries in data.items()
+    }
+
+
+def write_snapshot(directory):
+    """Save this process's metrics as <directory>/<pid>.json for the /metrics of the other workers"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{os.getpid()}.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f)
+    os.replace(path + ".tmp", path)
+
+
+def read_snapshots(directory, max_age):
+    """
+    Snapshots of the other worker processes saved during the last max_age seconds.
+    Older files belong to stopped workers and are deleted
+    """
+    if not directory or not os.path.isdir(directory):
+        return []
+
+    snapshots = []
+    own = f"{os.getpid()}.json"
+    now = time.time()
+    for name in os.listdir(directory):
+        if not name.endswith(".json") or name == own:
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                os.remove(path)
+                continue
+            with open(path, encoding="utf-8") as f:
+                snapshots.append(load_snapshot(json.load(f)))
+        except (OSError, ValueError):
+            # Being replaced or removed by its worker right now
+            continue
+    return snapshots
+
+
+def count_chrome_processes():
+    """Number of running chrome and chromedriver processes (Linux only)"""
+    if not os.path.isdir("/proc"):
+        return 0
+
+    count = 0
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/comm") as f:
+                if "chrome" in f.read():
+                    count += 1
+        except OSError:
+            continue
+    return count
+
+
+class RateWindow:
+    """Counts events in a sliding time window"""
+
+    def __init__(self, seconds=60) -> None:
+        self.seconds = seconds
+        self.events = deque()
+        self.lock = threading.Lock()
+
+    def add(self):
+        with self.lock:
+            self.events.append(time.time())
+
+    def count(self):
+        cutoff = time.time() - self.seconds
+        with self.lock:
+            while self.events and self.events[0] < cutoff:
+                self.events.popleft()
+            return len(self.events)
+
+
+places_window = RateWindow(seconds=60)
+
+PHASE_SECONDS = Histogram(
+    "gms_phase_duration_seconds",
+    "Time spent in each scraping phase (driver_startup, search_load, scroll, scroll_iteration, open_place, parse_place, find_mail, save)",
+)
+SCROLL_ITERATIONS = Histogram(
+    "gms_scroll_iterations", "Scrolls needed to load a result feed, per search", buckets=(1, 2, 3, 5, 8, 13, 20, 30, 50)
+)
+SCROLL_ROUND_TRIPS = Histogram(
+    "gms_scroll_round_trips", "WebDriver commands sent per scroll iteration", buckets=(1, 2, 3, 5, 8, 13, 20, 50)
+)
+CHROME_MEMORY = Gauge("gms_chrome_memory_bytes", "Resident memory of the Chrome process tree at the last watchdog sample")
+DRIVER_RECYCLES = Counter("gms_driver_recycles_total", "Drivers restarted by the memory watchdog, by reason")
+DRIVER_CACHE = Counter("gms_driver_cache_lookups_total", "Chromedriver cache lookups by result (hit, miss, stale)")
+RETRIES = Counter("gms_retries_total", "Retried operations by operation name and reason (network, timeout, blocked, other)")
+RETRY_GIVEUPS = Counter("gms_retry_giveups_total", "Operations that failed after their last attempt or with an error not worth retrying")
+BREAKER_STATE = Gauge(
+    "gms_circuit_breaker_state", "Circuit breaker state: 0 closed, 1 half open, 2 open", multiprocess_mode="max"
+)
+BREAKER_TRIPS = Counter("gms_circuit_breaker_trips_total", "Times a circuit breaker opened")
+EMAIL_PAGES = Histogram(
+    "gms_email_pages_fetched",
+    "Website pages fetched per email lookup, by result (found, not_found)",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10),
+)
+RATE_LIMIT_WAIT = Histogram(
+    "gms_rate_limit_wait_seconds", "Time Google requests waited for the shared rate limit, by egress and kind"
+)
+GOOGLE_REQUESTS = Counter("gms_google_requests_total", "Google navigations and feed scrolls let through by the rate limiter")
+PROXY_HEALTH = Gauge(
+    "gms_proxy_health_score", "Health score of each upstream proxy, from 0 to 1", multiprocess_mode="min"
+)
+PROXY_EJECTED = Gauge("gms_proxy_ejected", "1 while an upstream proxy is ejected from the pool", multiprocess_mode="max")
+PROXY_BROWSERS = Gauge("gms_proxy_browsers", "Browsers and email lookups currently using each upstream proxy")
+PROXY_REQUESTS = Counter("gms_proxy_requests_total", "Requests through each upstream proxy by result (ok, error, blocked)")
+PROXY_EJECTIONS = Counter("gms_proxy_ejections_total", "Times each upstream proxy was ejected from the pool")
+FAILURES = Counter("gms_failures_total", "Failed operations by phase")
+PLACES_SCRAPED = Counter("gms_places_scraped_total", "Places parsed successfully")
+PLACES_PER_MINUTE = Gauge(
+    "gms_places_per_minute", "Places parsed during the last 60 seconds", function=places_window.count
+)
+ACTIVE_JOBS = Gauge("gms_active_jobs", "Scraping jobs currently running")
+EVICTIONS = Counter("gms_evictions_total", "Finished jobs and files removed by the reaper, by kind")
+REAPER_PENDING = Gauge("gms_reaper_pending", "Expiry entries waiting in the reaper")
+QUEUE_DEPTH = Gauge("gms_queue_depth", "Searches (batch queries and grid tiles) waiting for a browser")
+CHROME_PROCESSES = Gauge(
+    "gms_chrome_processes",
+    "Live chrome and chromedriver processes",
+    function=count_chrome_processes,
+    multiprocess_mode="max",
+)
+
+
+def observe_phase(phase, start):
+    """Record the duration of a phase that started at start (a time.perf_counter() value)"""
+    PHASE_SECONDS.observe(time.perf_counter() - start, phase=phase)
+
+
+def record_place():
+    PLACES_SCRAPED.inc()
+    places_window.add()
@@ -0,0 +1,224 @@
+"""
+Network capture extraction mode.
+
+Google Maps loads its results as JSON (the search?tbm=map and place preview
+RPCs, plus the first page of results inlined in APP_INITIALIZATION_STATE) and
+only then renders them. Instead of reading the rendered HTML place by place,
+this module buffers those responses through the driver's performance log and
+CDP Network.getResponseBody, and decodes them into the same records that
+Parser.parse produces.
+
+The positions used to read the fields come from the (undocumented) array
+layout of the responses. Missing positions simply leave the field empty.
+"""
+
+import json
+import re
+from scraper.communicator import Communicator
+from scraper.log import get_logger
+
+logger = get_logger(__name__)
+
+CAPTURED_URL_PATTERNS = [
+    re.compile(r"/search\?.*tbm=map"),
+    re.compile(r"/maps/preview/place"),
+]
+
+XSSI_PREFIX = ")]}'"
+
+
+def dig(value, *path):
+    """Follow a path of indexes into nested lists, returning None when it does not exist"""
+
+    for index in path:
+        try:
+            value = value[index]
+        except (IndexError, KeyError, TypeError):
+            return None
+    return value
+
+
+def strip_xssi(text):
+    text = text.strip()
+    if text.startswith(XSSI_PREFIX):
+        text = text[len(XSSI_PREFIX):]
+    return text
+
+
+def first_url(value):
+    """Depth first search for the first http(s) URL inside nested lists"""
+
+    if isinstance(value, str):
+        return value if value.startswith(("http://", "https://")) else None
+    if isinstance(value, list):
+        for item in value:
+            url = first_url(item)
+            if url:
+                return url
+    return None
+
+
+def decode_search_payload(data):
+    """Return the place arrays of a decoded search response"""
+
+    places = []
+    for entries in (dig(data, 0, 1), dig(data, 64)):
+        if not isinstance(entries, list):
+            continue
+        for entry in entries:
+            place = dig(entry, 14)
+            if isinstance(place, list):
+                places.append(place)
+        if places:
+            break
+    return places
+
+
+def decode_search_body(body):
+    body = body.replace('/*""*/', "")
+    data = json.loads(strip_xssi(body))
+    if isinstance(data, dict):
+        data = json.loads(strip_xssi(data.get("d", "")))
+    return decode_search_payload(data)
+
+
+def decode_place_body(body):
+    place = dig(json.loads(strip_xssi(body)), 6)
+    return [place] if isinstance(place, list) else []
+
+
+def format_hours(place):
+    days = dig(place, 34, 1)
+    if not isinstance(days, list):
+        return None
+
+    parts = []
+    for day in days:
+        name = dig(day, 0)
+        ranges = dig(day, 1)
+        if name is None:
+            continue
+        if isinstance(ranges, list):
+            ranges = ", ".join(str(r) for r in ranges)
+        parts.append(f"{name}: {ranges}")
+    return "; ".join(parts) or None
+
+
+def decode_place(place):
+    """Convert a place array into a record with the same keys as Parser.parse"""
+
+    place_id = dig(place, 78)
+    categories = dig(place, 13)
+    reviews = dig(place, 4, 8)
+    rating = dig(place, 4, 7)
+    address = dig(place, 39)
+    if not address and isinstance(dig(place, 2), list):
+        address = ", ".join(str(part) for part in place[2])
+
+    return {
+        "Category": categories[0] if isinstance(categories, list) and categories else None,
+        "Name": dig(place, 11),
+        "Phone": dig(place, 178, 0, 0),
+        "Google Maps URL": (
+            f"https://www.google.com/maps/place/?q=place_id:{place_id}" if place_id else None
+        ),
+        "Website": dig(place, 7, 0),
+        "email": None,
+        "Business Status": dig(place, 34, 4, 4),
+        "Address": address,
+        "Total Reviews": f"({reviews:,})" if isinstance(reviews, int) else None,
+        "Booking Links": first_url(dig(place, 75)),
+        "Rating": str(rating) if rating is not None else None,
+        "Hours": format_hours(place),
+    }
+
+
+class NetworkCapture:
+    """
+    Buffers and decodes the Maps RPC responses seen by a driver. The driver must
+    be created with performance logging enabled (ImprovedBackend.build_driver(performance_log=True)).
+    """
+
+    def __init__(self, driver) -> None:
+        self.driver = driver
+        self.pending_requests = {}
+        self.places = {}
+        self.responses = 0
+        self.commands = 0  # WebDriver commands sent by poll(), for the round trip metrics
+
+    def attach(self, driver):
+        """Capture from a replacement driver, keeping the places decoded so far"""
+        self.driver = driver
+        # Request ids of the old browser mean nothing to the new one
+        self.pending_requests = {}
+        self.start()
+
+    def start(self):
+        self.driver.execute_cdp_cmd("Network.enable", {})
+        self.driver.get_log("performance")  # drop events from before the search
+
+    def capture_initial_state(self):
+        """Read the first page of results that Maps inlines in the search page"""
+
+        try:
+            state = self.driver.execute_script(
+                "return JSON.stringify(window.APP_INITIALIZATION_STATE || null)"
+            )
+            payload = dig(json.loads(state or "null"), 3, 2)
+            if isinstance(payload, str) and payload.strip().startswith(XSSI_PREFIX):
+                self.add_places(decode_search_payload(json.loads(strip_xssi(payload))))
+        except Exception as e:
+            logger.debug("Could not read APP_INITIALIZATION_STATE: %s", e)
+
+    def poll(self):
+        """Read new network events and decode finished Maps RPC responses"""
+
+        self.commands += 1
+        for entry in self.driver.get_log("performance"):
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+
+            method = message.get("method")
+            params = message.get("params", {})
+
+            if method == "Network.responseReceived":
+                url = params.get("response", {}).get("url", "")
+                if any(pattern.search(url) for pattern in CAPTURED_URL_PATTERNS):
+                    self.pending_requests[params["requestId"]] = url
+
+            elif method == "Network.loadingFinished":
+                url = self.pending_requests.pop(params.get("requestId"), None)
+                if url is not None:
+                    self.read_response(params["requestId"], url)
+
+    def read_response(self, request_id, url):
+        self.commands += 1
+        try:
+            body = self.driver.execute_cdp_cmd(
+                "Network.getResponseBody", {"requestId": request_id}
+            )["body"]
+            if "/maps/preview/place" in url:
+                places = decode_place_body(body)
+            else:
+                places = decode_search_body(body)
+        except Exception as e:
+            logger.debug("Could not decode captured response %s: %s", url[:80], e)
+            return
+
+        self.responses += 1
+        self.add_places(places)
+
+    def add_places(self, places):
+        for place in places:
+            record = decode_place(place)
+            key = record["Google Maps URL"] or record["Name"]
+            if key and key not in self.places:
+                self.places[key] = record
+
+    def records(self):
+        Communicator.show_message(
+            f"Network capture: decoded {len(self.places)} places from {self.responses} responses"
+        )
+        return list(self.places.values())
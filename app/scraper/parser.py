@@ -4,13 +4,40 @@ from scraper.communicator import Communicator
 from scraper.datasaver import DataSaver
 from scraper.base import Base
 from scraper.common import Common
-import requests
-import re
-from time import sleep
+import time
+from scraper import metrics
+from scraper.tracing import span
+from scraper.budget import JobBudget
+from scraper.fields import select_fields, fields_to_extract, project
+from scraper.memory_watchdog import MemoryWatchdog
+from scraper.retry import NavigationError
+from scraper.email_finder import EmailFinder
+from scraper.proxy_pool import PROXY_POOL
+from scraper.log import get_logger
+
+logger = get_logger(__name__)
 
 class Parser(Base):
-    def __init__(self, driver) -> None:
+    def __init__(self, driver, save_results=True, budget=None, fields=None, restart_driver=None, cancellation=None) -> None:
+        """
+        fields: output fields to extract, see scraper.fields.select_fields. None extracts all of them
+        restart_driver: callable that replaces the driver with a fresh one and returns it.
+                        When given, the memory watchdog restarts the driver between places.
+        cancellation: CancellationToken of the job, parsing stops and saves what it has when cancelled
+        """
         self.driver = driver
+        self.cancellation = cancellation
+        self.restart_driver = restart_driver
+        self.watchdog = MemoryWatchdog(driver) if restart_driver is not None else None
+        self.save_results = save_results
+        self.budget = budget or JobBudget()
+        self.fields = select_fields(fields)
+        self.extract = fields_to_extract(self.fields)
+        # Places still to parse after the current one, and time spent on its email lookup
+        self.places_left = 0
+        self.place_email_seconds = 0
+        # Crawls the website of a place for its email, see scraper.email_finder
+        self.email_finder = EmailFinder(cancellation=cancellation)
         self.finalData = []
         self.comparing_tool_tips = {
             "location": "Copy address",
@@ -24,13 +51,21 @@ class Parser(Base):
 
     def parse(self):
         """Our function to parse the html"""
+        
+        # Give the place page time to load, the only readiness wait of a place
+        with span("readiness_wait"):
+            self.pause(2)
+        
+        with span("extract"):
+            self.extract_details()
+
+    def extract_details(self):
         """This block will get element details sheet of a business. 
         Details sheet means that business details card when you click on a business in 
-        serach results in google maps"""
-        
-        # Wait for content to load
-        sleep(2)
+        serach results in google maps. Only the fields selected for the job are extracted."""
         
+        parse_started = time.perf_counter()
+        extract = self.extract
         infoSheet = self.driver.execute_script(
             """return document.querySelector("[role='main']")"""
         )
@@ -49,23 +84,26 @@ class Parser(Base):
                 bookingLink,
                 businessStatus,
             ) = (None, None, None, None, None, None, None, None, None, None, None)
+            name = None
             
             html = infoSheet.get_attribute("outerHTML")
             soup = BeautifulSoup(html, "html.parser")
             
             # Extract rating
-            try:
-                rating = soup.find("span", class_="ceNzKf").get("aria-label")
-                rating = rating.replace("stars", "").strip()
-            except:
-                rating = None
+            if "Rating" in extract:
+                try:
+                    rating = soup.find("span", class_="ceNzKf").get("aria-label")
+                    rating = rating.replace("stars", "").strip()
+                except:
+                    rating = None
 
             # Extract total reviews
-            try:
-                totalReviews = list(soup.find("div", class_="F7nice").children)
-                totalReviews = totalReviews[1].get_text(strip=True)
-            except:
-                totalReviews = None
+            if "Total Reviews" in extract:
+                try:
+                    totalReviews = list(soup.find("div", class_="F7nice").children)
+                    totalReviews = totalReviews[1].get_text(strip=True)
+                except:
+                    totalReviews = None
 
             # Extract name
             try:
@@ -74,68 +112,75 @@ class Parser(Base):
                 name = None
 
             # Extract address - FIXED METHOD
-            try:
-                address_button = soup.find("button", {"data-item-id": "address"})
-                if address_button:
-                    address_div = address_button.find("div", class_="rogA2c")
-                    if address_div:
-                        address = address_div.get_text(strip=True)
-            except:
-                pass
+            if "Address" in extract:
+                try:
+                    address_button = soup.find("button", {"data-item-id": "address"})
+                    if address_button:
+                        address_div = address_button.find("div", class_="rogA2c")
+                        if address_div:
+                            address = address_div.get_text(strip=True)
+                except:
+                    pass
 
             # Extract phone - FIXED METHOD
-            try:
-                # Look for button with data-item-id starting with "phone:"
-                phone_buttons = soup.find_all("button", class_="CsEnBe")
-                for btn in phone_buttons:
-                    data_item_id = btn.get("data-item-id", "")
-                    if data_item_id.startswith("phone:"):
-                        phone_div = btn.find("div", class_="rogA2c")
-                        if phone_div:
-                            phone = phone_div.get_text(strip=True)
-                            break
-            except:
-                pass
+            if "Phone" in extract:
+                try:
+                    # Look for button with data-item-id starting with "phone:"
+                    phone_buttons = soup.find_all("button", class_="CsEnBe")
+                    for btn in phone_buttons:
+                        data_item_id = btn.get("data-item-id", "")
+                        if data_item_id.startswith("phone:"):
+                            phone_div = btn.find("div", class_="rogA2c")
+                            if phone_div:
+                                phone = phone_div.get_text(strip=True)
+                                break
+                except:
+                    pass
 
             # Extract website URL - FIXED METHOD
-            try:
-                # Look for link with data-item-id="authority"
-                website_link = soup.find("a", {"data-item-id": "authority"})
-                if website_link:
-                    websiteUrl = website_link.get("href")
-            except Exception as e:
-                Communicator.show_message(f"Website extraction error: {str(e)}")
-                websiteUrl = None
+            if "Website" in extract:
+                try:
+                    # Look for link with data-item-id="authority"
+                    website_link = soup.find("a", {"data-item-id": "authority"})
+                    if website_link:
+                        websiteUrl = website_link.get("href")
+                except Exception as e:
+                    Communicator.show_message(f"Website extraction error: {str(e)}")
+                    websiteUrl = None
 
             # Extract Email
-            try:
-                if websiteUrl:
-                    email = self.find_mail(websiteUrl)
-            except Exception as e:
-                Communicator.show_message(f"Email extraction error: {str(e)}")
-                email = None
+            if "email" in extract:
+                try:
+                    if websiteUrl and self.budget.should_lookup_email(self.places_left):
+                        email = self.find_mail(websiteUrl)
+                except Exception as e:
+                    Communicator.show_message(f"Email extraction error: {str(e)}")
+                    email = None
 
             # Extract booking link
-            try:
-                bookingTag = soup.find(
-                    "a", {"aria-label": lambda x: x and "Open booking link" in x}
-                )
-                if bookingTag:
-                    bookingLink = bookingTag.get("href")
-            except:
-                bookingLink = None
+            if "Booking Links" in extract:
+                try:
+                    bookingTag = soup.find(
+                        "a", {"aria-label": lambda x: x and "Open booking link" in x}
+                    )
+                    if bookingTag:
+                        bookingLink = bookingTag.get("href")
+                except:
+                    bookingLink = None
 
             # Extract hours of operation
-            try:
-                hours = soup.find("div", class_="t39EBf").get_text(strip=True)
-            except:
-                hours = None
+            if "Hours" in extract:
+                try:
+                    hours = soup.find("div", class_="t39EBf").get_text(strip=True)
+                except:
+                    hours = None
 
             # Extract category
-            try:
-                category = soup.find("button", class_="DkEaL").text.strip()
-            except:
-                category = None
+            if "Category" in extract:
+                try:
+                    category = soup.find("button", class_="DkEaL").text.strip()
+                except:
+                    category = None
 
             # Extract Google Maps URL
             try:
@@ -144,36 +189,43 @@ class Parser(Base):
                 gmapsUrl = None
 
             # Extract business status
-            try:
-                businessStatus = (
-                    soup.find("span", class_="ZDu9vd")
-                    .findChildren("span", recursive=False)[0]
-                    .get_text(strip=True)
-                )
-            except:
-                businessStatus = None
+            if "Business Status" in extract:
+                try:
+                    businessStatus = (
+                        soup.find("span", class_="ZDu9vd")
+                        .findChildren("span", recursive=False)[0]
+                        .get_text(strip=True)
+                    )
+                except:
+                    businessStatus = None
 
-            data = {
-                "Category": category,
-                "Name": name,
-                "Phone": phone,
-                "Google Maps URL": gmapsUrl,
-                "Website": websiteUrl,
-                "email": email,
-                "Business Status": businessStatus,
-                "Address": address,
-                "Total Reviews": totalReviews,
-                "Booking Links": bookingLink,
-                "Rating": rating,
-                "Hours": hours,
-            }
+            data = project(
+                {
+                    "Category": category,
+                    "Name": name,
+                    "Phone": phone,
+                    "Google Maps URL": gmapsUrl,
+                    "Website": websiteUrl,
+                    "email": email,
+                    "Business Status": businessStatus,
+                    "Address": address,
+                    "Total Reviews": totalReviews,
+                    "Booking Links": bookingLink,
+                    "Rating": rating,
+                    "Hours": hours,
+                },
+                self.fields,
+            )
             
             # Debug output
             Communicator.show_message(f"Scraped: {name} | Phone: {phone} | Website: {websiteUrl}")
             
             self.finalData.append(data)
+            metrics.observe_phase("parse_place", parse_started)
+            metrics.record_place()
             
         except Exception as e:
+            metrics.FAILURES.inc(phase="parse_place")
             Communicator.show_error_message(
                 f"Error occurred while parsing a location. Error is: {str(e)}",
                 ERROR_CODES["ERR_WHILE_PARSING_DETAILS"],
@@ -181,76 +233,141 @@ class Parser(Base):
 
     # find email
     def find_mail(self, url):
+        started = time.perf_counter()
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
-            }
-            
-            # Fix: Use the actual URL, not the original variable
-            source_code = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
-            curr = source_code.url
-            original_curr = curr
-            plain_text = source_code.text
-            
-            match = re.findall(
-                r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}", plain_text
-            )
-            
-            if not match:
-                urls = [original_curr + "/contact/", original_curr + "/Contact/"]
-                for cu in urls:
-                    try:
-                        source_code = requests.get(cu, headers=headers, timeout=10)
-                        plain_text = source_code.text
-                        match = re.findall(
-                            r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}", plain_text
-                        )
-                        if match:
-                            break
-                    except:
-                        continue
-            
-            if not match:
-                match = re.findall(
-                    r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}", original_curr
-                )
-            
-            # Filter out invalid emails
-            match = [
-                email
-                for email in set(match)
-                if re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,}$", email)
-                and not email.endswith(('.png', '.jpg', '.jpeg', '.gif', '.svg'))
-            ]
-            
-            email = ", ".join(match[:3])  # Limit to first 3 emails
-            return email
-            
+            with metrics.PHASE_SECONDS.time(phase="find_mail"), span("find_mail", url=url) as trace_args:
+                email = self.fetch_mail(url)
+                trace_args["pages"] = self.email_finder.pages_fetched
+                return email
+        finally:
+            seconds = time.perf_counter() - started
+            self.place_email_seconds += seconds
+            self.budget.observe("email", seconds)
+
+    def fetch_mail(self, url):
+        try:
+            return ", ".join(self.email_finder.find(url))
         except Exception as e:
             Communicator.show_message(f"Error in find_mail: {e}")
         return ""
 
-    def main(self, allResultsLinks):
+    def main_from_records(self, records):
+        """Complete records decoded from captured network responses and save them"""
         Communicator.show_message(
-            "Scrolling is done. Now going to scrape each location"
+            f"Got {len(records)} locations from network capture, looking up emails"
         )
-        print(f"DEBUG: Parser.main() called with {len(allResultsLinks)} links")
-        Communicator.show_message(f"DEBUG: Parser received {len(allResultsLinks)} links to process")
         try:
-            for idx, resultLink in enumerate(allResultsLinks):
-                if Common.close_thread_is_set():
-                    self.driver.quit()
-                    return
+            for idx, record in enumerate(records):
+                if self.cancelled():
+                    Communicator.show_message(
+                        f"Job cancelled, saving the {len(self.finalData)} places completed so far"
+                    )
+                    break
                 
-                Communicator.show_message(f"Scraping location {idx + 1} of {len(allResultsLinks)}")
-                self.openingurl(url=resultLink)
-                sleep(2)  # Give page time to load
-                self.parse()
+                if self.budget.expired():
+                    self.budget.stop("deadline", places_skipped=len(records) - idx)
+                    Communicator.show_message(
+                        f"Time budget used up, saving the {len(self.finalData)} places completed so far"
+                    )
+                    break
                 
-        except Exception as e:
-            Communicator.show_message(
-                f"Error occurred while parsing the locations. Error: {str(e)}"
-            )
+                if (
+                    "email" in self.extract
+                    and record.get("Website")
+                    and not record.get("email")
+                    and self.budget.should_lookup_email(0)
+                ):
+                    try:
+                        record["email"] = self.find_mail(record["Website"])
+                    except Exception as e:
+                        Communicator.show_message(f"Email extraction error: {str(e)}")
+                
+                self.finalData.append(project(record, self.fields))
+                metrics.record_place()
         finally:
-            self.init_data_saver()
-            self.data_saver.save(datalist=self.finalData)
\ No newline at end of file
+            if self.save_results:
+                self.init_data_saver()
+                self.data_saver.save(datalist=self.finalData, fields=self.fields)
+
+    def check_memory(self, idx, total):
+        """Restart the driver before the next place when the memory watchdog asks for it"""
+        reason = self.watchdog.check()
+        if reason is None:
+            return
+        
+        stats = self.watchdog.stats()
+        Communicator.show_message(
+            f"Restarting the browser ({reason}: {stats['places_on_driver']} places, "
+            f"Chrome using {stats['chrome_memory_mb']} MB) before location {idx + 1} of {total}"
+        )
+        with span("driver_recycle", reason=reason):
+            self.driver = self.restart_driver()
+        self.watchdog.recycled(self.driver, reason)
+
+    def main(self, allResultsLinks):
+        Communicator.show_message(
+            "Scrolling is done. Now going to scrape each location"
+        )
+        logger.debug("Parser.main() called with %s links", len(allResultsLinks))
+        with span("parser.main", places=len(allResultsLinks)):
+            try:
+                for idx, resultLink in enumerate(allResultsLinks):
+                    if Common.close_thread_is_set():
+                        self.driver.quit()
+                        PROXY_POOL.release_driver(self.driver)
+                        return
+                
+                    if self.cancelled():
+                        Communicator.show_message(
+                            f"Job cancelled, saving the {len(self.finalData)} places parsed so far"
+                        )
+                        break
+                
+                    if self.budget.expired():
+                        self.budget.stop("deadline", places_skipped=len(allResultsLinks) - idx)
+                        Communicator.show_message(
+                            f"Time budget used up, saving the {len(self.finalData)} places parsed so far"
+                        )
+                        break
+                
+                    if self.watchdog is not None and idx > 0:
+                        self.check_memory(idx, len(allResultsLinks))
+                
+                    Communicator.show_message(f"Scraping location {idx + 1} of {len(allResultsLinks)}")
+                    self.places_left = len(allResultsLinks) - idx - 1
+                    self.place_email_seconds = 0
+                    place_started = time.perf_counter()
+                    with span("place", index=idx + 1, url=resultLink):
+                        try:
+                            with metrics.PHASE_SECONDS.time(phase="open_place"), span("navigate"):
+                                self.openingurl(url=resultLink)
+                        except NavigationError as e:
+                            # A browser that is gone cannot open the next places either, nor may
+                            # they be opened once the daily budget is used up
+                            if e.reason in ("browser_gone", "daily_budget"):
+                                raise
+                            metrics.FAILURES.inc(phase="open_place")
+                            logger.warning("Skipping place %s (%s): %s", resultLink, e.reason, e)
+                            Communicator.show_message(f"Skipping location {idx + 1}: {str(e)}")
+                            continue
+                        if self.cancelled():
+                            continue
+                        if self.watchdog is not None:
+                            self.watchdog.place_opened()
+                        self.parse()
+                    self.budget.observe("place", time.perf_counter() - place_started - self.place_email_seconds)
+                
+            except Exception as e:
+                if self.cancelled():
+                    # The browser of a cancelled job is closed under the current place
+                    Communicator.show_message(
+                        f"Job cancelled, saving the {len(self.finalData)} places parsed so far"
+                    )
+                else:
+                    Communicator.show_message(
+                        f"Error occurred while parsing the locations. Error: {str(e)}"
+                    )
+            finally:
+                if self.save_results:
+                    self.init_data_saver()
+                    self.data_saver.save(datalist=self.finalData, fields=self.fields)
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""
+Selector probing without implicit waits.
+
+Drivers run with an implicit wait of 0, so a find_element miss fails at once
+instead of blocking for Base.timeout. Fallback chains of selectors are
+evaluated by probe() in a single execute_script call that returns the first
+selector matching an element, together with its index in the list.
+wait_for_any() repeats the probe until one matches, for the few places that
+need to wait for the page.
+"""
+
+import time
+from collections import namedtuple
+from selenium.common.exceptions import WebDriverException
+from scraper.log import get_logger
+
+logger = get_logger(__name__)
+
+ProbeMatch = namedtuple("ProbeMatch", "index selector element")
+
+# Invalid selectors (e.g. jQuery's :contains()) are skipped instead of failing the whole probe
+PROBE_SCRIPT = """
+const selectors = arguments[0];
+const requireVisible = arguments[1];
+const minHtmlLength = arguments[2];
+for (let i = 0; i < selectors.length; i++) {
+    let element = null;
+    try {
+        element = document.querySelector(selectors[i]);
+    } catch (e) {
+        continue;
+    }
+    if (!element) continue;
+    if (requireVisible && !(element.offsetWidth || element.offsetHeight || element.getClientRects().length)) continue;
+    if (minHtmlLength && element.outerHTML.length < minHtmlLength) continue;
+    return [i, element];
+}
+return null;
+"""
+
+# Containers of the search result list, most specific first
+RESULT_CONTAINER_SELECTORS = [
+    "[role='feed']",
+    ".m6QErb",
+    "div.m6QErb",
+    ".section-scrollbox",
+    "div[role='main']",
+    "[aria-label*='Results']",
+    ".section-layout",
+]
+# The scrollable part of the result list
+SCROLLABLE_SELECTORS = ["[role='feed']", ".m6QErb", ".section-scrollbox"]
+# Only on the result list, never on a place page
+RESULT_FEED_SELECTORS = ["[role='feed']"]
+# Title of a place page, when Maps opens a single place instead of the list
+PLACE_TITLE_SELECTORS = [".tAiQdd h1.DUwDvf", "h1.DUwDvf"]
+# Google's cookie consent form, shown instead of Maps in some regions
+CONSENT_SELECTORS = ["form[action*='consent']"]
+# Any page a search navigation can end up on
+SEARCH_LANDING_SELECTORS = RESULT_FEED_SELECTORS + PLACE_TITLE_SELECTORS + CONSENT_SELECTORS
+# A container shorter than this is still empty
+MIN_RESULTS_HTML = 101
+
+
+def probe(driver, selectors, visible=False, min_html_length=0):
+    """First of the CSS selectors that matches an element, as a ProbeMatch, or None. Never waits"""
+    selectors = list(selectors)
+    if not selectors:
+        return None
+    try:
+        result = driver.execute_script(PROBE_SCRIPT, selectors, visible, min_html_length)
+    except WebDriverException as e:
+        logger.debug("Selector probe failed: %s", e)
+        return None
+    if not result:
+        return None
+    index, element = result
+    return ProbeMatch(int(index), selectors[int(index)], element)
+
+
+def wait_for_any(driver, selectors, timeout, poll_interval=0.25, cancellation=None, **options):
+    """Explicit wait: probe every poll_interval seconds until a selector matches or timeout runs out"""
+    deadline = time.monotonic() + timeout
+    while True:
+        match = probe(driver, selectors, **options)
+        if match is not None or time.monotonic() >= deadline:
+            return match
+        if cancellation is not None:
+            if cancellation.wait(poll_interval):
+                return None
+        else:
+            time.sleep(poll_interval)
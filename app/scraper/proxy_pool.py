@@ -0,0 +1,212 @@
+"""
+Upstream proxies for the browsers and the email lookups.
+
+Each browser gets a proxy when it starts and keeps it for its lifetime (Chrome
+takes its proxy on the command line); whoever quits a driver hands the proxy
+back with release_driver(). New browsers get the healthiest proxy
+with the fewest browsers on it. The health score of a proxy (0 to 1) comes
+from moving averages of its latency, its error rate and the rate at which
+Google answers it with the unusual traffic page. A proxy whose score drops
+under PROXY_EJECT_SCORE is ejected: no new browser or lookup gets it, and
+pooled browsers still on it are recycled when they are given back. It is
+re-admitted with fresh statistics after PROXY_EJECT_SECONDS, a time that
+doubles with every further ejection.
+
+Without PROXIES, or when every proxy is ejected, requests go out directly.
+Chrome cannot authenticate to a proxy given on its command line, so browsers
+need proxies that allow the droplet's IP; the email lookups (requests) pass
+credentials along.
+"""
+
+import threading
+import time
+import urllib.parse
+import weakref
+from scraper import metrics
+from scraper.log import get_logger
+from scraper.rate_limit import DIRECT
+from settings import (
+    PROXIES,
+    PROXY_EJECT_SCORE,
+    PROXY_MIN_SAMPLES,
+    PROXY_EJECT_SECONDS,
+    PROXY_EJECT_MAX_SECONDS,
+    PROXY_LATENCY_TARGET,
+)
+
+logger = get_logger(__name__)
+
+# Weight of the newest sample in the moving averages
+SMOOTHING = 0.2
+
+
+class Proxy:
+    def __init__(self, url) -> None:
+        parts = urllib.parse.urlsplit(url if "://" in url else "http://" + url)
+        if not parts.hostname or not parts.port:
+            raise ValueError(f"Invalid proxy '{url}', use scheme://[user:password@]host:port")
+        self.url = urllib.parse.urlunsplit(parts)
+        # Without credentials, for Chrome's --proxy-server and for logs and metrics
+        self.server = f"{parts.scheme}://{parts.hostname}:{parts.port}"
+        self.name = f"{parts.hostname}:{parts.port}"
+        self.has_credentials = bool(parts.username)
+
+        self.assigned = 0
+        self.requests = 0
+        self.ejections = 0
+        self.ejected_until = None
+        self.reset()
+
+    def reset(self):
+        self.samples = 0
+        self.latency = None
+        self.error_rate = 0.0
+        self.block_rate = 0.0
+
+    def score(self):
+        """1 for a fast proxy without errors, down to 0. Blocks count twice, they burn the IP"""
+        latency_penalty = 0.0
+        if self.latency is not None and PROXY_LATENCY_TARGET:
+            latency_penalty = 0.5 * min(1.0, max(0.0, self.latency / PROXY_LATENCY_TARGET - 1))
+        return max(0.0, 1.0 - self.error_rate - self.block_rate - latency_penalty)
+
+    def record(self, succeeded, latency=None, blocked=False):
+        self.samples += 1
+        self.requests += 1
+        self.error_rate += SMOOTHING * ((0.0 if succeeded else 1.0) - self.error_rate)
+        self.block_rate += SMOOTHING * ((1.0 if blocked else 0.0) - self.block_rate)
+        if latency is not None:
+            self.latency = latency if self.latency is None else self.latency + SMOOTHING * (latency - self.latency)
+
+    def stats(self):
+        return {
+            "proxy": self.name,
+            "score": round(self.score(), 3),
+            "latency_seconds": round(self.latency, 3) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "block_rate": round(self.block_rate, 3),
+            "browsers": self.assigned,
+            "requests": self.requests,
+            "ejections": self.ejections,
+            "ejected_for_seconds": round(max(0.0, self.ejected_until - time.monotonic()), 1) if self.ejected_until else 0,
+        }
+
+
+class ProxyPool:
+    def __init__(
+        self,
+        urls,
+        eject_score=PROXY_EJECT_SCORE,
+        min_samples=PROXY_MIN_SAMPLES,
+        eject_seconds=PROXY_EJECT_SECONDS,
+        max_eject_seconds=PROXY_EJECT_MAX_SECONDS,
+    ) -> None:
+        self.proxies = [Proxy(url) for url in urls or []]
+        self.eject_score = eject_score
+        self.min_samples = min_samples
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self.lock = threading.Lock()
+        for proxy in self.proxies:
+            self.publish(proxy)
+
+    def publish(self, proxy):
+        metrics.PROXY_HEALTH.set(proxy.score(), proxy=proxy.name)
+        metrics.PROXY_EJECTED.set(1 if proxy.ejected_until else 0, proxy=proxy.name)
+        metrics.PROXY_BROWSERS.set(proxy.assigned, proxy=proxy.name)
+
+    def available(self, proxy, now):
+        """False while proxy is ejected, re-admits it once its ejection is over"""
+        if proxy.ejected_until is None:
+            return True
+        if now < proxy.ejected_until:
+            return False
+        proxy.ejected_until = None
+        proxy.reset()
+        self.publish(proxy)
+        logger.info("Proxy %s re-admitted after ejection %s", proxy.name, proxy.ejections)
+        return True
+
+    def acquire(self):
+        """Healthiest available proxy with the fewest browsers on it, or None to go out directly"""
+        if not self.proxies:
+            return None
+        now = time.monotonic()
+        with self.lock:
+            candidates = [proxy for proxy in self.proxies if self.available(proxy, now)]
+            if not candidates:
+                logger.warning("Every proxy is ejected, going out directly")
+                return None
+            proxy = max(candidates, key=lambda p: (round(p.score(), 1), -p.assigned))
+            proxy.assigned += 1
+            self.publish(proxy)
+            return proxy
+
+    def release(self, proxy):
+        if proxy is None:
+            return
+        with self.lock:
+            proxy.assigned = max(0, proxy.assigned - 1)
+            self.publish(proxy)
+
+    def assign(self, driver, proxy):
+        """Keep proxy for driver until release_driver(), or until the driver object goes away"""
+        driver.upstream_proxy = proxy
+        if proxy is not None:
+            # Only a backstop for drivers dropped without release_driver(): quit drivers
+            # stay referenced (scroller, cancellation callbacks...) long after they are gone
+            driver.proxy_lease = weakref.finalize(driver, self.release, proxy)
+
+    def release_driver(self, driver):
+        """Give back the proxy of a driver that was quit. Safe to call more than once"""
+        lease = getattr(driver, "proxy_lease", None)
+        if lease is not None:
+            # A finalizer runs its callback once at most
+            lease()
+
+    def record(self, proxy, succeeded, latency=None, blocked=False):
+        """Outcome of a request through proxy, ejects it when its score drops too low"""
+        if proxy is None:
+            return
+        result = "blocked" if blocked else ("ok" if succeeded else "error")
+        metrics.PROXY_REQUESTS.inc(proxy=proxy.name, result=result)
+        with self.lock:
+            proxy.record(succeeded, latency, blocked)
+            if proxy.ejected_until is None and proxy.samples >= self.min_samples and proxy.score() < self.eject_score:
+                seconds = min(self.max_eject_seconds, self.eject_seconds * 2 ** proxy.ejections)
+                proxy.ejected_until = time.monotonic() + seconds
+                proxy.ejections += 1
+                metrics.PROXY_EJECTIONS.inc(proxy=proxy.name)
+                logger.warning("Proxy %s ejected for %ss (score %.2f)", proxy.name, seconds, proxy.score())
+            self.publish(proxy)
+
+    def record_response(self, proxy, status, latency=None):
+        """Outcome of an HTTP response that came back through proxy"""
+        # 429 is the proxy's IP being throttled, other statuses are the site's own business
+        self.record(proxy, status != 429, latency, blocked=status == 429)
+
+    def is_ejected(self, proxy):
+        return proxy is not None and proxy.ejected_until is not None
+
+    def stats(self):
+        now = time.monotonic()
+        with self.lock:
+            # Proxies whose ejection is over show as re-admitted
+            for proxy in self.proxies:
+                self.available(proxy, now)
+            return [proxy.stats() for proxy in self.proxies]
+
+
+def proxy_of(driver):
+    """Proxy a driver was started with, None when it goes out directly"""
+    return getattr(driver, "upstream_proxy", None)
+
+
+def egress_of(driver):
+    """Egress identity of a driver's requests, for the rate limiter"""
+    proxy = proxy_of(driver)
+    return proxy.name if proxy is not None else DIRECT
+
+
+# Shared by all browsers and email lookups of the process
+PROXY_POOL = ProxyPool(PROXIES)
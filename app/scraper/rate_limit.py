@@ -0,0 +1,282 @@
+"""
+Politeness towards Google shared by all jobs.
+
+Every Maps navigation and feed scroll takes a token from the bucket of the
+egress identity it goes out through ("direct" without a proxy). A bucket holds
+up to GOOGLE_RATE_BURST tokens and refills at GOOGLE_RATE_PER_MINUTE, or at the
+rate GOOGLE_EGRESS_RATES sets for the identity, so concurrent jobs share one
+request rate instead of each firing as fast as its thread allows. Requests of
+the current UTC day are counted, and once GOOGLE_DAILY_BUDGET is used up new
+requests fail with DailyBudgetExceeded. The budget is checked and the request
+counted in one step of the store, so concurrent workers cannot overshoot it.
+
+The buckets live in a store chosen with RATE_LIMIT_STORE_URL, like the job
+store: memory:// limits this process only, sqlite:///<path> and
+redis://<host>/<db> share the limit between the worker processes.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from scraper import metrics
+from scraper.retry import NavigationError
+from settings import (
+    RATE_LIMIT_STORE_URL,
+    GOOGLE_RATE_PER_MINUTE,
+    GOOGLE_RATE_BURST,
+    GOOGLE_EGRESS_RATES,
+    GOOGLE_DAILY_BUDGET,
+)
+
+DIRECT = "direct"
+
+
+class DailyBudgetExceeded(NavigationError):
+    def __init__(self, budget) -> None:
+        super().__init__(f"The daily budget of {budget} Google requests is used up", "daily_budget", retryable=False)
+
+
+def today():
+    return time.strftime("%Y-%m-%d", time.gmtime())
+
+
+class MemoryRateStore:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.buckets = {}  # key -> (tokens, updated_at)
+        self.days = {}
+
+    def take(self, key, rate, burst, cost=1):
+        """Take cost tokens. Returns 0 when they were taken, else the seconds until they will be there"""
+        now = time.time()
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0 if tokens >= cost else (cost - tokens) / rate
+            self.buckets[key] = (tokens - cost if wait == 0 else tokens, now)
+            return wait
+
+    def count(self, day, budget=None, amount=1):
+        """Add amount to the requests of day, returns the new total. None, and nothing added, when it would exceed budget"""
+        with self.lock:
+            used = self.days.get(day, 0)
+            if budget is not None and used + amount > budget:
+                return None
+            # Only today's counter is kept
+            self.days = {day: used + amount}
+            return self.days[day]
+
+    def used(self, day):
+        with self.lock:
+            return self.days.get(day, 0)
+
+
+class SQLiteRateStore:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL);
+        CREATE TABLE IF NOT EXISTS daily_requests (day TEXT PRIMARY KEY, used INTEGER NOT NULL);
+    """
+
+    def __init__(self, path) -> None:
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.local = threading.local()
+        self.connection().executescript(self.SCHEMA)
+
+    def connection(self):
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA busy_timeout=10000")
+            self.local.db = db
+        return db
+
+    def take(self, key, rate, burst, cost=1):
+        db = self.connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = db.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row is not None else (burst, now)
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0 if tokens >= cost else (cost - tokens) / rate
+            db.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                (key, tokens - cost if wait == 0 else tokens, now),
+            )
+            db.execute("COMMIT")
+            return wait
+        except:
+            db.execute("ROLLBACK")
+            raise
+
+    def count(self, day, budget=None, amount=1):
+        db = self.connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM daily_requests WHERE day != ?", (day,))
+            # Checked in the same transaction, so concurrent workers cannot both take the last request
+            row = db.execute("SELECT used FROM daily_requests WHERE day = ?", (day,)).fetchone()
+            if budget is not None and (row[0] if row is not None else 0) + amount > budget:
+                db.execute("COMMIT")
+                return None
+            db.execute(
+                "INSERT INTO daily_requests (day, used) VALUES (?, ?) ON CONFLICT(day) DO UPDATE SET used = used + ?",
+                (day, amount, amount),
+            )
+            used = db.execute("SELECT used FROM daily_requests WHERE day = ?", (day,)).fetchone()[0]
+            db.execute("COMMIT")
+            return used
+        except:
+            db.execute("ROLLBACK")
+            raise
+
+    def used(self, day):
+        row = self.connection().execute("SELECT used FROM daily_requests WHERE day = ?", (day,)).fetchone()
+        return row[0] if row is not None else 0
+
+
+class RedisRateStore:
+    PREFIX = "gms:rate:"
+    # Refill and take in one atomic step. Returns the wait as a string, Redis would truncate a number
+    TAKE_SCRIPT = """
+        local rate, burst, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+        local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or burst)
+        local updated = tonumber(redis.call('HGET', KEYS[1], 'updated_at') or now)
+        tokens = math.min(burst, tokens + (now - updated) * rate)
+        local wait = 0
+        if tokens >= cost then tokens = tokens - cost else wait = (cost - tokens) / rate end
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+        redis.call('EXPIRE', KEYS[1], 86400)
+        return tostring(wait)
+    """
+    # Check the daily budget and count in one atomic step. A budget below 0 is no budget
+    COUNT_SCRIPT = """
+        local budget, amount = tonumber(ARGV[1]), tonumber(ARGV[2])
+        local used = tonumber(redis.call('GET', KEYS[1]) or 0)
+        if budget >= 0 and used + amount > budget then return -1 end
+        used = redis.call('INCRBY', KEYS[1], amount)
+        redis.call('EXPIRE', KEYS[1], 2 * 86400)
+        return used
+    """
+
+    def __init__(self, url) -> None:
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("RATE_LIMIT_STORE_URL points to Redis but the redis package is not installed (pip install redis)")
+        self.redis = redis.Redis.from_url(url)
+        self.take_script = self.redis.register_script(self.TAKE_SCRIPT)
+        self.count_script = self.redis.register_script(self.COUNT_SCRIPT)
+
+    def take(self, key, rate, burst, cost=1):
+        return float(self.take_script(keys=[self.PREFIX + "bucket:" + key], args=[rate, burst, cost, time.time()]))
+
+    def count(self, day, budget=None, amount=1):
+        used = int(self.count_script(keys=[self.PREFIX + "day:" + day], args=[-1 if budget is None else budget, amount]))
+        return None if used < 0 else used
+
+    def used(self, day):
+        return int(self.redis.get(self.PREFIX + "day:" + day) or 0)
+
+
+def open_rate_store(url=RATE_LIMIT_STORE_URL):
+    if url.startswith("sqlite:///"):
+        return SQLiteRateStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisRateStore(url)
+    if url.startswith("memory://"):
+        return MemoryRateStore()
+    raise ValueError(f"Unsupported RATE_LIMIT_STORE_URL '{url}', use sqlite:///<path>, redis://<host>/<db> or memory://")
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        store,
+        per_minute=GOOGLE_RATE_PER_MINUTE,
+        burst=GOOGLE_RATE_BURST,
+        egress_rates=GOOGLE_EGRESS_RATES,
+        daily_budget=GOOGLE_DAILY_BUDGET,
+    ) -> None:
+        """egress_rates: {identity: (requests per minute, burst)} overriding the default rate"""
+        rates = list((egress_rates or {}).items())
+        if per_minute is not None:
+            rates.append(("every other egress", (per_minute, burst)))
+        for egress, (rate_per_minute, rate_burst) in rates:
+            if not (rate_per_minute > 0 and rate_burst >= 1):
+                raise ValueError(
+                    f"Google rate of {rate_per_minute} per minute with a burst of {rate_burst} for {egress} is invalid, "
+                    "it needs more than 0 requests per minute and a burst of at least 1"
+                )
+        self.store = store
+        self.per_minute = per_minute
+        self.burst = burst
+        self.egress_rates = dict(egress_rates or {})
+        self.daily_budget = daily_budget
+
+    def rate(self, egress):
+        """Requests per second and burst of an egress identity"""
+        per_minute, burst = self.egress_rates.get(egress, (self.per_minute, self.burst))
+        return per_minute / 60.0, burst
+
+    def acquire(self, egress=DIRECT, cancellation=None, kind="navigation"):
+        """
+        Wait for the turn of a Google request going out through egress. Returns False
+        when the job was cancelled while waiting. Raises DailyBudgetExceeded.
+        """
+        self.check_budget()
+        if self.per_minute is None and egress not in self.egress_rates:
+            return self.count()
+
+        rate, burst = self.rate(egress)
+        started = time.monotonic()
+        while True:
+            if cancellation is not None and cancellation.is_cancelled():
+                return False
+            wait = self.store.take(egress, rate, burst)
+            if wait == 0:
+                break
+            # Wake up regularly to notice a cancellation
+            wait = min(wait, 1.0)
+            if cancellation is not None:
+                cancellation.wait(wait)
+            else:
+                time.sleep(wait)
+
+        metrics.RATE_LIMIT_WAIT.observe(time.monotonic() - started, egress=egress, kind=kind)
+        return self.count()
+
+    def check_budget(self):
+        """Fail before waiting for a token when the budget is already used up"""
+        if self.daily_budget is not None and self.store.used(today()) >= self.daily_budget:
+            self.budget_exceeded()
+
+    def count(self):
+        """Count a request against the daily budget, raises DailyBudgetExceeded when it is used up"""
+        if self.store.count(today(), self.daily_budget) is None:
+            self.budget_exceeded()
+        metrics.GOOGLE_REQUESTS.inc()
+        return True
+
+    def budget_exceeded(self):
+        metrics.RETRY_GIVEUPS.inc(operation="daily_budget")
+        raise DailyBudgetExceeded(self.daily_budget)
+
+    def stats(self):
+        used = self.store.used(today())
+        return {
+            "requests_today": used,
+            "daily_budget": self.daily_budget,
+            "budget_left": None if self.daily_budget is None else max(0, self.daily_budget - used),
+            "per_minute": self.per_minute,
+            "egress_rates": {egress: list(rate) for egress, rate in self.egress_rates.items()},
+        }
+
+
+# Shared by every job of the process, and by the processes sharing RATE_LIMIT_STORE_URL
+GOOGLE_RATE_LIMITER = RateLimiter(open_rate_store())
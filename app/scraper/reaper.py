@@ -0,0 +1,119 @@
+"""
+Expiry of finished jobs and old files.
+
+One daemon thread keeps a heap of (due time, key) entries and runs the expiry
+callback of each entry when it is due, instead of one sleeping thread per job.
+Scheduling a key again replaces its previous entry. Recurring sweeps delete
+files older than their retention from a directory (job traces, output files)
+and expire old entries of the job store.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from scraper import metrics
+from scraper.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class Reaper:
+    def __init__(self, name="reaper") -> None:
+        self.name = name
+        self.heap = []
+        self.entries = {}  # (kind, key) -> sequence number of its live heap entry
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def start(self):
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name=self.name, daemon=True)
+                self.thread.start()
+
+    def schedule(self, kind, key, ttl, callback):
+        """Run callback() in ttl seconds, replacing a pending entry of the same kind and key"""
+        self.start()
+        with self.condition:
+            number = next(self.sequence)
+            self.entries[(kind, key)] = number
+            heapq.heappush(self.heap, (time.monotonic() + ttl, number, kind, key, callback))
+            metrics.REAPER_PENDING.set(len(self.entries))
+            self.condition.notify()
+
+    def cancel(self, kind, key):
+        with self.condition:
+            self.entries.pop((kind, key), None)
+            metrics.REAPER_PENDING.set(len(self.entries))
+
+    def every(self, kind, interval, callback):
+        """Run callback() every interval seconds, the first time after one interval"""
+
+        def run_and_reschedule():
+            try:
+                callback()
+            finally:
+                self.schedule(kind, "sweep", interval, run_and_reschedule)
+
+        self.schedule(kind, "sweep", interval, run_and_reschedule)
+
+    def due(self):
+        """Pop the next entry once it is due, skipping replaced and cancelled ones"""
+        with self.condition:
+            while True:
+                if not self.heap:
+                    self.condition.wait()
+                    continue
+                due, number, kind, key, callback = self.heap[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self.condition.wait(wait)
+                    continue
+                heapq.heappop(self.heap)
+                if self.entries.get((kind, key)) != number:
+                    continue
+                del self.entries[(kind, key)]
+                metrics.REAPER_PENDING.set(len(self.entries))
+                return kind, key, callback
+
+    def run(self):
+        while True:
+            kind, key, callback = self.due()
+            try:
+                callback()
+                if key != "sweep":
+                    metrics.EVICTIONS.inc(kind=kind)
+            except Exception as e:
+                logger.warning("Reaper could not expire %s %s: %s", kind, key, e)
+
+    def pending(self):
+        with self.condition:
+            counts = {}
+            for kind, _ in self.entries:
+                counts[kind] = counts.get(kind, 0) + 1
+            return counts
+
+
+def remove_old_files(directory, retention, kind, extensions=None):
+    """Delete the files of directory last modified more than retention seconds ago"""
+    if retention is None or not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - retention
+    removed = 0
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if extensions and not name.endswith(tuple(extensions)):
+            continue
+        try:
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError as e:
+            logger.warning("Could not remove expired file %s: %s", path, e)
+    if removed:
+        metrics.EVICTIONS.inc(removed, kind=kind)
+        logger.info("Removed %s expired file(s) from %s", removed, directory)
+    return removed
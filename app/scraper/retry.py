@@ -0,0 +1,228 @@
+"""
+Retries of browser navigations and a circuit breaker shared by all jobs.
+
+A failed navigation is classified first: network errors, timeouts and
+Google's "unusual traffic" page are retried with exponential backoff and
+jitter, up to a maximum number of attempts. Errors that another attempt cannot
+fix (a closed browser, an invalid URL) are raised at once.
+
+Retryable failures of every job feed one circuit breaker. When most recent
+navigations failed, the breaker opens and new navigations wait until it lets a
+single probe through (half open); the breaker closes again once a probe
+succeeds. This stops every worker from hammering Google while it refuses us.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from scraper import metrics
+from scraper.log import get_logger
+from settings import (
+    NAVIGATION_MAX_ATTEMPTS,
+    NAVIGATION_BACKOFF_BASE,
+    NAVIGATION_BACKOFF_MAX,
+    BREAKER_WINDOW,
+    BREAKER_MIN_CALLS,
+    BREAKER_FAILURE_RATE,
+    BREAKER_OPEN_SECONDS,
+)
+
+logger = get_logger(__name__)
+
+# Parts of WebDriver error messages, by classification
+RETRYABLE_ERRORS = {
+    "network": (
+        "ERR_INTERNET_DISCONNECTED",
+        "ERR_NAME_NOT_RESOLVED",
+        "ERR_CONNECTION",
+        "ERR_NETWORK_CHANGED",
+        "ERR_TIMED_OUT",
+        "ERR_PROXY_CONNECTION_FAILED",
+        "ERR_TUNNEL_CONNECTION_FAILED",
+        "ERR_EMPTY_RESPONSE",
+        "ERR_SSL_PROTOCOL_ERROR",
+    ),
+    "timeout": ("timeout", "Timed out receiving message from renderer"),
+    "blocked": ("unusual traffic",),
+}
+# Errors of a browser that is gone, no later navigation of the driver can succeed either
+BROWSER_GONE_ERRORS = (
+    "invalid session id",
+    "no such window",
+    "chrome not reachable",
+    "session deleted",
+    "disconnected: not connected to DevTools",
+)
+FATAL_ERRORS = BROWSER_GONE_ERRORS + ("invalid argument",)
+
+# Google answers automated traffic with a captcha page under this path
+BLOCKED_URL_MARKER = "/sorry/"
+
+
+class NavigationError(Exception):
+    def __init__(self, message, reason=None, retryable=False) -> None:
+        super().__init__(message)
+        self.reason = reason
+        self.retryable = retryable
+
+
+class BlockedError(Exception):
+    """Google redirected the navigation to its unusual traffic page"""
+
+
+def browser_gone(error):
+    """True when error says the browser itself is closed or unreachable"""
+    message = str(error).lower()
+    return any(part.lower() in message for part in BROWSER_GONE_ERRORS)
+
+
+def classify(error):
+    """Retry reason of an error ("network", "timeout", "blocked"), or None when it is not worth retrying"""
+    if isinstance(error, BlockedError):
+        return "blocked"
+
+    message = str(error)
+    if any(part.lower() in message.lower() for part in FATAL_ERRORS):
+        return None
+    for reason, parts in RETRYABLE_ERRORS.items():
+        if any(part.lower() in message.lower() for part in parts):
+            return reason
+    # Unknown WebDriver errors were always retried, keep doing that within the attempt limit
+    return "other"
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts=NAVIGATION_MAX_ATTEMPTS,
+        base_delay=NAVIGATION_BACKOFF_BASE,
+        max_delay=NAVIGATION_BACKOFF_MAX,
+        multiplier=2.0,
+        jitter=0.5,
+    ) -> None:
+        """jitter: share of each delay that is randomised, so jobs failing together do not retry together"""
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+
+    def delay(self, attempt):
+        """Seconds to wait after the given failed attempt (1 for the first)"""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return delay * (1 - self.jitter) + random.uniform(0, delay * self.jitter)
+
+    def should_retry(self, attempt):
+        return attempt < self.max_attempts
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        name,
+        window=BREAKER_WINDOW,
+        min_calls=BREAKER_MIN_CALLS,
+        failure_rate=BREAKER_FAILURE_RATE,
+        open_seconds=BREAKER_OPEN_SECONDS,
+    ) -> None:
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+
+        self.condition = threading.Condition()
+        self.outcomes = deque()  # (time, succeeded) of the calls of the last window seconds
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.trips = 0
+        metrics.BREAKER_STATE.set(0, breaker=name)
+
+    def set_state(self, state):
+        self.state = state
+        metrics.BREAKER_STATE.set(self.STATE_VALUES[state], breaker=self.name)
+        self.condition.notify_all()
+
+    def acquire(self, cancellation=None):
+        """
+        Wait until a call may go through. Returns "call", "probe" for the single call
+        let through while half open, or None when the job was cancelled while waiting.
+        """
+        with self.condition:
+            while True:
+                if cancellation is not None and cancellation.is_cancelled():
+                    return None
+                if self.state == self.CLOSED:
+                    return "call"
+
+                if self.state == self.OPEN:
+                    remaining = self.opened_at + self.open_seconds - time.monotonic()
+                    if remaining <= 0:
+                        self.set_state(self.HALF_OPEN)
+                        continue
+                    self.condition.wait(min(remaining, 1.0))
+                    continue
+
+                # Half open: one probe at a time, the others wait for its outcome
+                if not self.probing:
+                    self.probing = True
+                    return "probe"
+                self.condition.wait(1.0)
+
+    def release(self, permit):
+        """End a call without an outcome, e.g. one that failed for reasons of its own"""
+        if permit == "probe":
+            with self.condition:
+                self.probing = False
+                self.condition.notify_all()
+
+    def record(self, succeeded, permit="call"):
+        now = time.monotonic()
+        with self.condition:
+            if permit == "probe":
+                self.probing = False
+                if succeeded:
+                    self.outcomes.clear()
+                    self.set_state(self.CLOSED)
+                    logger.info("Circuit breaker %s closed", self.name)
+                else:
+                    self.trip(now)
+                return
+
+            self.outcomes.append((now, succeeded))
+            while self.outcomes and self.outcomes[0][0] < now - self.window:
+                self.outcomes.popleft()
+
+            if self.state == self.CLOSED and not succeeded and len(self.outcomes) >= self.min_calls:
+                failures = sum(1 for _, ok in self.outcomes if not ok)
+                if failures / len(self.outcomes) >= self.failure_rate:
+                    self.trip(now)
+
+    def trip(self, now):
+        self.opened_at = now
+        self.trips += 1
+        metrics.BREAKER_TRIPS.inc(breaker=self.name)
+        self.set_state(self.OPEN)
+        logger.warning("Circuit breaker %s opened, pausing for %ss", self.name, self.open_seconds)
+
+    def stats(self):
+        with self.condition:
+            failures = sum(1 for _, ok in self.outcomes if not ok)
+            return {
+                "state": self.state,
+                "trips": self.trips,
+                "recent_calls": len(self.outcomes),
+                "recent_failures": failures,
+            }
+
+
+NAVIGATION_POLICY = RetryPolicy()
+# Shared by every job of the process
+NAVIGATION_BREAKER = CircuitBreaker("navigation")
@@ -0,0 +1,204 @@
+"""
+Adaptive pacing of the results feed scrolling.
+
+Instead of sleeping a fixed time after every scroll, the feed is polled until
+new result cards show up or the loading spinner goes away. When a scroll brings
+nothing new the next wait is doubled (up to SCROLL_MAX_WAIT), and scrolling
+stops as soon as the end of the list marker is shown or growth stalled
+SCROLL_MAX_STALLS times in a row.
+
+Each iteration is a single WebDriver round trip: SCROLL_STEP_SCRIPT finds the
+feed, scrolls it, waits in the page for growth and returns the feed state with
+the place links it has not returned before.
+"""
+
+import time
+from settings import (
+    SCROLL_POLL_INTERVAL,
+    SCROLL_MIN_WAIT,
+    SCROLL_MAX_WAIT,
+    SCROLL_MAX_STALLS,
+    SCROLL_MAX_ITERATIONS,
+)
+
+# Card count, loading spinner and end of list marker of the feed in a single round trip
+FEED_STATE_SCRIPT = """
+var feed = arguments[0];
+var last = feed.lastElementChild;
+var lastText = last ? (last.textContent || "").toLowerCase() : "";
+return {
+    cards: feed.querySelectorAll("a.hfpxzc").length,
+    spinner: !!feed.querySelector(".lXJj5c"),
+    end: !!feed.querySelector(".PbZDve, .HlvSq") || lastText.indexOf("reached the end") !== -1
+};
+"""
+
+# One scroll iteration, run with execute_async_script. Arguments: feed selectors,
+# card count before the scroll, growth wait, poll interval and feed wait (ms).
+# Calls back with null when no feed shows up within the feed wait.
+SCROLL_STEP_SCRIPT = """
+var selectors = arguments[0], cardsBefore = arguments[1], waitMs = arguments[2];
+var pollMs = arguments[3], feedWaitMs = arguments[4];
+var done = arguments[arguments.length - 1];
+
+function findFeed() {
+    for (var i = 0; i < selectors.length; i++) {
+        try {
+            var element = document.querySelector(selectors[i]);
+            if (element) return element;
+        } catch (e) {}
+    }
+    return null;
+}
+
+function feedState(feed) {
+    var last = feed.lastElementChild;
+    var lastText = last ? (last.textContent || "").toLowerCase() : "";
+    return {
+        cards: feed.querySelectorAll("a.hfpxzc").length,
+        spinner: !!feed.querySelector(".lXJj5c"),
+        end: !!feed.querySelector(".PbZDve, .HlvSq") || lastText.indexOf("reached the end") !== -1,
+        height: feed.scrollHeight
+    };
+}
+
+function newLinks(feed) {
+    // Links already returned for this feed element are kept on the element
+    var seen = feed.__gmsSeenLinks || (feed.__gmsSeenLinks = {});
+    var anchors = feed.querySelectorAll("a.hfpxzc");
+    if (!anchors.length) anchors = feed.querySelectorAll("a[href*='/maps/place/']");
+    var links = [];
+    for (var i = 0; i < anchors.length; i++) {
+        var href = anchors[i].href;
+        if (href && !seen[href]) {
+            seen[href] = true;
+            links.push(href);
+        }
+    }
+    return links;
+}
+
+var feedDeadline = Date.now() + feedWaitMs;
+(function locate() {
+    var feed = findFeed();
+    if (!feed) {
+        if (Date.now() >= feedDeadline) return done(null);
+        return setTimeout(locate, pollMs);
+    }
+
+    feed.scrollTo(0, feed.scrollHeight);
+    var started = Date.now(), deadline = started + waitMs, spinnerSeen = false;
+    (function poll() {
+        var state = feedState(feed);
+        var grown = state.cards > cardsBefore || state.end;
+        if (!grown && state.spinner) {
+            spinnerSeen = true;
+        } else if (!grown && spinnerSeen) {
+            // The spinner went away, whatever it loaded is in the feed now
+            grown = true;
+        }
+        if (grown || Date.now() >= deadline) {
+            state.waited = (Date.now() - started) / 1000;
+            state.links = newLinks(feed);
+            return done(state);
+        }
+        setTimeout(poll, pollMs);
+    })();
+})();
+"""
+
+
+class ScrollPacer:
+    def __init__(
+        self,
+        driver,
+        poll_interval=SCROLL_POLL_INTERVAL,
+        min_wait=SCROLL_MIN_WAIT,
+        max_wait=SCROLL_MAX_WAIT,
+        max_stalls=SCROLL_MAX_STALLS,
+        max_iterations=SCROLL_MAX_ITERATIONS,
+    ) -> None:
+        self.driver = driver
+        self.poll_interval = poll_interval
+        self.min_wait = min_wait
+        self.max_wait = max_wait
+        self.max_stalls = max_stalls
+        self.max_iterations = max_iterations
+
+        self.wait = min_wait
+        self.iterations = 0
+        self.stalls = 0
+        self.waited = 0.0
+        self.round_trips = 0
+        self.script_timeout = None
+        self.stop_reason = None
+        self.started = time.perf_counter()
+
+    def feed_state(self, element):
+        self.round_trips += 1
+        try:
+            state = self.driver.execute_script(FEED_STATE_SCRIPT, element)
+        except Exception:
+            state = None
+        return state or {"cards": 0, "spinner": False, "end": False}
+
+    def step(self, selectors, cards_before, feed_wait):
+        """
+        Scroll the feed and wait for it to grow in a single round trip. Returns the
+        feed state (cards, spinner, end, height, links not returned before), or
+        None when none of selectors matched a feed within feed_wait seconds.
+        """
+
+        # The script must be allowed to run for its whole wait
+        timeout = max(self.wait + feed_wait + 5, 30)
+        if self.script_timeout is None or self.script_timeout < timeout:
+            self.driver.set_script_timeout(timeout)
+            self.script_timeout = timeout
+            self.round_trips += 1
+
+        self.round_trips += 1
+        state = self.driver.execute_async_script(
+            SCROLL_STEP_SCRIPT,
+            list(selectors),
+            cards_before,
+            int(self.wait * 1000),
+            int(self.poll_interval * 1000),
+            int(feed_wait * 1000),
+        )
+        if state:
+            self.waited += state.get("waited", 0)
+        return state
+
+    def record(self, new_links, state):
+        """Update the pacing after an iteration that added new_links links"""
+
+        self.iterations += 1
+        if new_links > 0:
+            self.stalls = 0
+            self.wait = self.min_wait
+        else:
+            self.stalls += 1
+            self.wait = min(self.wait * 2, self.max_wait)
+
+        if state.get("end"):
+            self.stop_reason = "end_of_list"
+        elif self.stalls >= self.max_stalls:
+            self.stop_reason = "stalled"
+        elif self.iterations >= self.max_iterations:
+            self.stop_reason = "max_iterations"
+
+    def should_continue(self):
+        return self.stop_reason is None
+
+    def stop(self, reason):
+        if self.stop_reason is None:
+            self.stop_reason = reason
+
+    def stats(self):
+        return {
+            "iterations": self.iterations,
+            "duration_seconds": round(time.perf_counter() - self.started, 2),
+            "waited_seconds": round(self.waited, 2),
+            "round_trips": self.round_trips,
+            "stop_reason": self.stop_reason,
+        }
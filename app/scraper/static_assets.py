@@ -0,0 +1,156 @@
+"""
+Static web UI of the Flask apps.
+
+The UI lives in static/<app>/ as an HTML shell (index.html) and its assets.
+At start up every asset gets a content hash in its name (app.css becomes
+app.3f2a9c1b0d4e.css) and a gzip copy, all kept in memory. The shell links the
+fingerprinted names, so assets are served with a one year immutable cache
+lifetime and a new deploy changes their URLs. The shell itself is revalidated
+on every visit with its ETag and answered with 304 when unchanged.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from scraper.log import get_logger
+from settings import STATIC_ASSET_MAX_AGE
+
+logger = get_logger(__name__)
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+SHELL = "index.html"
+ASSET_URL = "/assets/"
+
+# Smaller files gain nothing from compression
+MIN_GZIP_SIZE = 512
+
+
+class Asset:
+    def __init__(self, name, body, mimetype) -> None:
+        self.name = name
+        self.body = body
+        self.mimetype = mimetype
+        self.digest = hashlib.sha256(body).hexdigest()
+        self.etag = f'"{self.digest[:16]}"'
+        # The compressed representation needs its own validator
+        self.gzip_etag = f'"{self.digest[:16]}-gzip"'
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0) if len(body) >= MIN_GZIP_SIZE else None
+        if self.gzipped is not None and len(self.gzipped) >= len(body):
+            self.gzipped = None
+
+    @property
+    def fingerprinted_name(self):
+        stem, extension = os.path.splitext(self.name)
+        return f"{stem}.{self.digest[:12]}{extension}"
+
+
+class AssetManifest:
+    def __init__(self, app_name, static_dir=STATIC_DIR, max_age=STATIC_ASSET_MAX_AGE) -> None:
+        self.directory = os.path.join(static_dir, app_name)
+        self.max_age = max_age
+        self.assets = {}
+        self.shell = None
+        self.build()
+
+    def build(self):
+        """Fingerprint and compress the assets, then the shell that links them"""
+        assets = {}
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if name == SHELL or not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                asset = Asset(name, f.read(), mimetypes.guess_type(name)[0] or "application/octet-stream")
+            assets[asset.fingerprinted_name] = asset
+
+        urls = {asset.name: ASSET_URL + fingerprinted for fingerprinted, asset in assets.items()}
+        with open(os.path.join(self.directory, SHELL), encoding="utf-8") as f:
+            html = f.read()
+        html = re.sub(
+            re.escape(ASSET_URL) + r"([\w.-]+)",
+            lambda match: urls.get(match.group(1), match.group(0)),
+            html,
+        )
+
+        self.assets = assets
+        self.shell = Asset(SHELL, html.encode("utf-8"), "text/html")
+        logger.debug("Built %s UI assets from %s", len(assets), self.directory)
+
+    def stats(self):
+        return {
+            asset.name: {
+                "url": ASSET_URL + fingerprinted,
+                "bytes": len(asset.body),
+                "gzip_bytes": len(asset.gzipped) if asset.gzipped is not None else None,
+            }
+            for fingerprinted, asset in self.assets.items()
+        }
+
+
+def accepts_gzip(headers):
+    return "gzip" in headers.get("Accept-Encoding", "").lower()
+
+
+def etag_matches(headers, etag):
+    """If-None-Match handling, weak validators compare equal"""
+    header = headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [value.strip() for value in header.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+def asset_response(response_class, asset, request_headers, cache_control):
+    """Response for an asset: 304 when the client has it, gzip when it accepts it"""
+    compressed = asset.gzipped is not None and accepts_gzip(request_headers)
+    headers = {
+        "ETag": asset.gzip_etag if compressed else asset.etag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request_headers, headers["ETag"]):
+        return response_class(status=304, headers=headers)
+
+    body = asset.body
+    if compressed:
+        body = asset.gzipped
+        headers["Content-Encoding"] = "gzip"
+
+    charset = "; charset=utf-8" if asset.mimetype.startswith("text/") or asset.mimetype.endswith("javascript") else ""
+    return response_class(body, headers=headers, content_type=asset.mimetype + charset)
+
+
+def register_ui(app, app_name):
+    """Serve the UI of static/<app_name>/ from / and /assets/<fingerprinted name>"""
+    from flask import abort, request, Response
+
+    manifest = AssetManifest(app_name)
+
+    def index():
+        """Main web interface, revalidated on every visit"""
+        return asset_response(Response, manifest.shell, request.headers, "no-cache")
+
+    def asset(filename):
+        asset = manifest.assets.get(filename)
+        if asset is None:
+            abort(404)
+        return asset_response(
+            Response, asset, request.headers, f"public, max-age={manifest.max_age}, immutable"
+        )
+
+    app.add_url_rule("/", "index", index)
+    app.add_url_rule(ASSET_URL + "<filename>", "asset", asset)
+    return manifest
+
+
+if __name__ == "__main__":
+    # Size report of the built UIs: python -m scraper.static_assets, from the app directory
+    for app_name in sorted(os.listdir(STATIC_DIR)):
+        manifest = AssetManifest(app_name)
+        print(f"\n{app_name}: shell {len(manifest.shell.body)} bytes, {len(manifest.shell.gzipped or b'')} gzipped")
+        for name, info in manifest.stats().items():
+            print(f"  {info['url']:<32} {info['bytes']:>7} bytes {info['gzip_bytes'] or '-':>7} gzipped")
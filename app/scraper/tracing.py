@@ -0,0 +1,120 @@
+"""
+Lightweight tracing of scraping jobs.
+
+A Tracer records nested spans (scroll, one span per place with navigation,
+readiness wait, extraction and HTTP fetch children, saving...) and writes them
+as a Chrome trace JSON file that opens in chrome://tracing or https://ui.perfetto.dev.
+
+The active tracer is set once per job and the scraper modules record into it
+through the module level span() helper. It is bound to the job's context (a
+ContextVar), so concurrent jobs each record into their own tracer; work handed
+to pool threads must go through submit_in_context() to keep it. When no tracer
+is active span() does nothing.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Tracer:
+    def __init__(self, name) -> None:
+        self.name = name
+        self.pid = os.getpid()
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.events = []
+        self.thread_names = {}
+        self.lock = threading.Lock()
+
+    def now_us(self):
+        return (time.perf_counter() - self.started) * 1_000_000
+
+    @contextmanager
+    def span(self, name, **args):
+        thread = threading.current_thread()
+        start = self.now_us()
+        error = None
+        try:
+            yield args
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": round(start, 1),
+                "dur": round(self.now_us() - start, 1),
+                "pid": self.pid,
+                "tid": thread.ident,
+                "args": {key: str(value) for key, value in args.items()},
+            }
+            if error is not None:
+                event["args"]["error"] = error
+            with self.lock:
+                self.events.append(event)
+                self.thread_names.setdefault(thread.ident, thread.name)
+
+    def to_chrome_trace(self):
+        with self.lock:
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": self.name}}
+        ] + [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in thread_names.items()
+        ]
+        return {
+            "traceEvents": metadata + sorted(events, key=lambda e: e["ts"]),
+            "displayTimeUnit": "ms",
+            "otherData": {"job": self.name, "started_at": self.started_at},
+        }
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        return path
+
+
+class Tracing:
+    __tracer = contextvars.ContextVar("tracer", default=None)
+
+    @classmethod
+    def set_tracer(cls, tracer):
+        """Make tracer the active one of the current context. Returns the token for reset_tracer()"""
+        return cls.__tracer.set(tracer)
+
+    @classmethod
+    def reset_tracer(cls, token):
+        cls.__tracer.reset(token)
+
+    @classmethod
+    def get_tracer(cls):
+        return cls.__tracer.get()
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """executor.submit() running fn in a copy of the caller's context, so its spans reach the job's tracer"""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+@contextmanager
+def _no_span():
+    yield {}
+
+
+def span(name, **args):
+    """Span on the active tracer, or a no-op context manager when tracing is off"""
+    tracer = Tracing.get_tracer()
+    if tracer is None:
+        return _no_span()
+    return tracer.span(name, **args)
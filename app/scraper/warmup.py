@@ -0,0 +1,56 @@
+"""
+Background loading of the scraping stack for the web apps.
+
+The web apps import the scraper (selenium, undetected_chromedriver, bs4,
+requests, pandas...) only when a job needs it, so workers boot and answer
+health checks quickly. warm_up() loads those modules in a background thread
+right after start up, so the first job usually finds them loaded already.
+"""
+
+import importlib
+import sys
+import threading
+import time
+from scraper.log import get_logger
+
+logger = get_logger(__name__)
+
+SCRAPER_MODULES = (
+    "scraper.improved_scraper",
+    "scraper.grid",
+    "scraper.batch",
+    "pandas",
+)
+
+_state = {"started": False, "seconds": None, "errors": {}}
+_lock = threading.Lock()
+
+
+def load_modules(modules=SCRAPER_MODULES):
+    started = time.perf_counter()
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            _state["errors"][name] = str(e)
+            logger.warning("Warm-up could not import %s: %s", name, e)
+    _state["seconds"] = round(time.perf_counter() - started, 2)
+    logger.info("Warm-up loaded the scraping modules in %ss", _state["seconds"])
+
+
+def warm_up(modules=SCRAPER_MODULES):
+    """Start loading the scraping modules in a daemon thread, once per process"""
+    with _lock:
+        if _state["started"]:
+            return
+        _state["started"] = True
+
+    threading.Thread(target=load_modules, args=(modules,), name="import-warmup", daemon=True).start()
+
+
+def status(modules=SCRAPER_MODULES):
+    return {
+        "loaded": all(name in sys.modules for name in modules),
+        "seconds": _state["seconds"],
+        "errors": dict(_state["errors"]),
+    }
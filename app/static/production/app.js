@@ -0,0 +1,413 @@
+class GoogleMapsScraper {
+    constructor() {
+        this.form = document.getElementById('scraperForm');
+        this.startButton = document.getElementById('startButton');
+        this.progressSection = document.getElementById('progressSection');
+        this.resultsSection = document.getElementById('resultsSection');
+        this.progressFill = document.getElementById('progressFill');
+        this.statusText = document.getElementById('statusText');
+        this.downloadExcel = document.getElementById('downloadExcel');
+        this.downloadCsv = document.getElementById('downloadCsv');
+        this.downloadJson = document.getElementById('downloadJson');
+        this.extractedData = null;
+
+        this.init();
+    }
+
+    init() {
+        this.form.addEventListener('submit', this.handleSubmit.bind(this));
+        this.loadFieldCosts();
+    }
+
+    async loadFieldCosts() {
+        // Show the measured cost of the email lookup when the server has one
+        try {
+            const response = await fetch('/fields');
+            const result = await response.json();
+            result.fields.forEach(field => {
+                const label = document.querySelector(`.field-cost[data-field="${field.name}"]`);
+                if (label && field.measured_seconds_per_place !== undefined) {
+                    label.textContent = `(visits each website, about ${field.measured_seconds_per_place} s per place)`;
+                }
+            });
+        } catch (error) {
+            console.log('Could not load field costs', error);
+        }
+    }
+
+    async handleSubmit(e) {
+        e.preventDefault();
+
+        const formData = new FormData(this.form);
+        const data = {
+            search_query: formData.get('search_query'),
+            output_format: 'excel',
+            healdessmode: formData.has('headless') ? 1 : 0
+        };
+        // Cheap fields are always included, the slower ones only when ticked
+        data.fields = ['Category', 'Name', 'Phone', 'Google Maps URL', 'Website',
+                       'Business Status', 'Address', 'Total Reviews', 'Rating']
+            .concat(formData.getAll('extra_fields'));
+        if (formData.get('max_results')) {
+            data.max_results = parseInt(formData.get('max_results'), 10);
+        }
+        if (formData.get('deadline_minutes')) {
+            data.deadline = parseFloat(formData.get('deadline_minutes')) * 60;
+        }
+
+        this.startScraping(data);
+    }
+
+    async startScraping(data) {
+        // Disable form and show progress
+        this.startButton.disabled = true;
+        this.startButton.textContent = 'Scraping...';
+        this.progressSection.style.display = 'block';
+        this.resultsSection.style.display = 'none';
+
+        try {
+            // Start the scraping process
+            const response = await fetch('/scrape', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify(data)
+            });
+
+            if (!response.ok) {
+                throw new Error('Failed to start scraping');
+            }
+
+            const result = await response.json();
+            console.log(result);
+
+            if (result.status === 'started') {
+                this.statusText.textContent = 'Scraping in progress...';
+                this.currentJobId = result.job_id; // Store job ID for session tracking
+                console.log('Started scraping job:', this.currentJobId);
+                this.pollStatus();
+            } else {
+                this.statusText.textContent = 'Error starting scraping';
+                this.startButton.disabled = false;
+                this.startButton.textContent = 'START SCRAPING';
+            }
+
+        } catch (error) {
+            console.error('Error:', error);
+            this.statusText.textContent = 'Error starting scraping';
+            this.startButton.disabled = false;
+            this.startButton.textContent = 'START SCRAPING';
+        }
+    }
+
+    async pollStatus() {
+        const pollInterval = setInterval(async () => {
+            try {
+                // Use session-specific status endpoint if we have a job ID
+                const statusUrl = this.currentJobId ? `/status/${this.currentJobId}` : '/status';
+                console.log('Polling status for:', statusUrl);
+                const response = await fetch(statusUrl);
+                const data = await response.json();
+
+                this.statusText.textContent = data.status;
+
+                // Update progress bar based on status
+                if (data.status === 'running') {
+                    this.progressFill.style.width = '70%';
+                } else if (data.status === 'completed') {
+                    this.progressFill.style.width = '100%';
+                }
+
+                // Update live extraction messages
+                if (data.messages && data.messages.length > 0) {
+                    this.showLiveExtraction(data.messages);
+                }
+
+                if (data.status === 'completed') {
+                    this.showResults(data);
+                    clearInterval(pollInterval);
+                } else if (data.status === 'error') {
+                    this.statusText.textContent = 'Error occurred during scraping';
+                    this.startButton.disabled = false;
+                    this.startButton.textContent = 'START SCRAPING';
+                    clearInterval(pollInterval);
+                }
+
+            } catch (error) {
+                console.error('Status polling error:', error);
+            }
+        }, 3000);
+    }
+
+    showLiveExtraction(messages) {
+        const container = document.getElementById('liveExtractionContainer');
+        const box = document.getElementById('liveExtractionBox');
+
+        // Show the container
+        container.style.display = 'block';
+
+        // Update the live extraction box
+        box.innerHTML = messages.map(msg => {
+            let className = 'message';
+            if (msg.includes('ERROR')) className += ' error';
+            else if (msg.includes('completed') || msg.includes('success')) className += ' success';
+            else className += ' info';
+
+            return `<div class="${className}">${msg}</div>`;
+        }).join('');
+
+        box.scrollTop = box.scrollHeight;
+    }
+
+    async showResults(data) {
+        this.progressSection.style.display = 'none';
+        this.resultsSection.style.display = 'block';
+
+        // Reset button state
+        this.startButton.disabled = false;
+        this.startButton.textContent = 'START SCRAPING';
+
+        // Update results text
+        const resultsText = document.querySelector('#resultsText');
+        resultsText.textContent = 'Your scraping is complete! Download your results below.';
+
+        // ALWAYS fetch the latest files from /files endpoint to ensure we get the most recent file
+        console.log('Scraping completed, fetching latest files...');
+        await this.fetchLatestFiles();
+
+        // Also refresh history if history tab exists
+        if (window.tabManager) {
+            window.tabManager.loadHistory(true);
+        }
+    }
+
+    async fetchLatestFiles() {
+        try {
+            console.log('Fetching latest files from /files endpoint...');
+            const response = await fetch('/files');
+            const data = await response.json();
+            console.log('Latest files response:', data);
+
+            const files = data.files || [];
+            const filesWithDetails = data.files_with_details || [];
+
+            if (files.length > 0) {
+                // Files are already sorted by modification time (most recent first) from the server
+                console.log('Latest files (sorted by server):', files);
+                console.log('Files with details:', filesWithDetails);
+
+                // Show the most recent file of each type
+                const recentXlsx = files.find(f => f.endsWith('.xlsx'));
+                const recentCsv = files.find(f => f.endsWith('.csv'));
+                const recentJson = files.find(f => f.endsWith('.json'));
+
+                console.log('Most recent files:', { recentXlsx, recentCsv, recentJson });
+
+                // Show file details if available
+                if (recentXlsx && filesWithDetails.length > 0) {
+                    const xlsxDetails = filesWithDetails.find(f => f.filename === recentXlsx);
+                    if (xlsxDetails) {
+                        const modTime = new Date(xlsxDetails.mod_time * 1000);
+                        console.log(`Latest Excel file: ${recentXlsx} (created: ${modTime.toLocaleString()})`);
+                    }
+                }
+
+                if (recentXlsx) {
+                    this.downloadExcel.href = `/download/${encodeURIComponent(recentXlsx)}`;
+                    this.downloadExcel.textContent = `📊 Download ${recentXlsx}`;
+                    this.downloadExcel.style.display = 'inline-block';
+                    console.log('✅ Set Excel download link to LATEST file:', recentXlsx);
+                }
+                if (recentCsv) {
+                    this.downloadCsv.href = `/download/${encodeURIComponent(recentCsv)}`;
+                    this.downloadCsv.textContent = `📄 Download ${recentCsv}`;
+                    this.downloadCsv.style.display = 'inline-block';
+                    console.log('✅ Set CSV download link to LATEST file:', recentCsv);
+                }
+                if (recentJson) {
+                    this.downloadJson.href = `/download/${encodeURIComponent(recentJson)}`;
+                    this.downloadJson.textContent = `📋 Download ${recentJson}`;
+                    this.downloadJson.style.display = 'inline-block';
+                    console.log('✅ Set JSON download link to LATEST file:', recentJson);
+                }
+            } else {
+                console.log('❌ No files found in /files endpoint');
+                this.downloadExcel.textContent = 'No files available';
+                this.downloadExcel.style.display = 'none';
+                this.downloadCsv.style.display = 'none';
+                this.downloadJson.style.display = 'none';
+            }
+        } catch (error) {
+            console.error('❌ Error fetching latest files:', error);
+            // Fallback to old method
+            this.fetchAvailableFiles();
+        }
+    }
+
+    async fetchAvailableFiles() {
+        try {
+            console.log('Fetching available files from /files endpoint...');
+            const response = await fetch('/files');
+            const data = await response.json();
+            console.log('Files response:', data);
+
+            const files = data.files || [];
+            if (files.length > 0) {
+                // Files are already sorted by modification time (most recent first) from the server
+                console.log('Files already sorted by server:', files);
+                console.log('Files with details:', data.files_with_details);
+
+                // Show the most recent file of each type
+                const recentXlsx = files.find(f => f.endsWith('.xlsx'));
+                const recentCsv = files.find(f => f.endsWith('.csv'));
+                const recentJson = files.find(f => f.endsWith('.json'));
+
+                console.log('Most recent files:', { recentXlsx, recentCsv, recentJson });
+
+                if (recentXlsx) {
+                    this.downloadExcel.href = `/download/${encodeURIComponent(recentXlsx)}`;
+                    this.downloadExcel.textContent = `📊 Download ${recentXlsx}`;
+                    this.downloadExcel.style.display = 'inline-block';
+                    console.log('Set Excel download link to:', recentXlsx);
+                }
+                if (recentCsv) {
+                    this.downloadCsv.href = `/download/${encodeURIComponent(recentCsv)}`;
+                    this.downloadCsv.textContent = `📄 Download ${recentCsv}`;
+                    this.downloadCsv.style.display = 'inline-block';
+                    console.log('Set CSV download link to:', recentCsv);
+                }
+                if (recentJson) {
+                    this.downloadJson.href = `/download/${encodeURIComponent(recentJson)}`;
+                    this.downloadJson.textContent = `📋 Download ${recentJson}`;
+                    this.downloadJson.style.display = 'inline-block';
+                    console.log('Set JSON download link to:', recentJson);
+                }
+            } else {
+                console.log('No files found in /files endpoint');
+                this.downloadExcel.textContent = 'No files available';
+                this.downloadExcel.style.display = 'none';
+                this.downloadCsv.style.display = 'none';
+                this.downloadJson.style.display = 'none';
+            }
+        } catch (error) {
+            console.error('Error fetching files:', error);
+        }
+    }
+}
+
+// Tab Management
+class TabManager {
+    constructor() {
+        this.init();
+    }
+
+    init() {
+        // Add click listeners to tabs
+        document.querySelectorAll('.tab').forEach(tab => {
+            tab.addEventListener('click', (e) => {
+                const tabName = e.currentTarget.getAttribute('data-tab');
+                this.switchTab(tabName);
+            });
+        });
+
+        // Load history when history tab is first clicked
+        document.querySelector('[data-tab="history"]').addEventListener('click', () => {
+            this.loadHistory();
+        });
+
+        // Refresh history button
+        document.getElementById('refreshHistory').addEventListener('click', () => {
+            this.loadHistory(true);
+        });
+    }
+
+    switchTab(tabName) {
+        // Remove active class from all tabs and content
+        document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
+        document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
+
+        // Add active class to selected tab and content
+        document.querySelector(`[data-tab="${tabName}"]`).classList.add('active');
+        document.getElementById(`${tabName}-tab`).classList.add('active');
+    }
+
+    async loadHistory(forceRefresh = false) {
+        const historyLoading = document.getElementById('historyLoading');
+        const historyContent = document.getElementById('historyContent');
+        const noHistory = document.getElementById('noHistory');
+        const historyList = document.getElementById('historyList');
+
+        // Show loading state
+        historyLoading.style.display = 'block';
+        historyContent.style.display = 'none';
+        noHistory.style.display = 'none';
+
+        try {
+            console.log('Loading history...');
+            const response = await fetch('/files');
+            const data = await response.json();
+            console.log('History data:', data);
+
+            const files = data.files || [];
+            const filesWithDetails = data.files_with_details || [];
+
+            if (files.length === 0) {
+                historyLoading.style.display = 'none';
+                noHistory.style.display = 'block';
+                return;
+            }
+
+            // Create history items
+            historyList.innerHTML = '';
+
+            files.forEach((filename, index) => {
+                const fileDetails = filesWithDetails.find(f => f.filename === filename);
+                const modTime = fileDetails ? new Date(fileDetails.mod_time * 1000) : new Date();
+                const fileSize = this.getFileSize(filename);
+
+                const historyItem = document.createElement('div');
+                historyItem.className = 'history-item';
+
+                // Extract search query from filename
+                const searchQuery = filename.replace(' - GMS output', '').replace(/\s*\(\d+\)\.xlsx$/, '').replace(/\.xlsx$/, '');
+
+                historyItem.innerHTML = `
+                    <div class="history-info">
+                        <div class="history-filename">${filename}</div>
+                        <div class="history-details">
+                            <span><i class="fas fa-search"></i> ${searchQuery}</span>
+                            <span><i class="fas fa-clock"></i> ${modTime.toLocaleString()}</span>
+                            <span><i class="fas fa-file-excel"></i> Excel</span>
+                        </div>
+                    </div>
+                    <a href="/download/${encodeURIComponent(filename)}" class="history-download">
+                        <i class="fas fa-download"></i> Download
+                    </a>
+                `;
+
+                historyList.appendChild(historyItem);
+            });
+
+            historyLoading.style.display = 'none';
+            historyContent.style.display = 'block';
+
+        } catch (error) {
+            console.error('Error loading history:', error);
+            historyLoading.style.display = 'none';
+            noHistory.style.display = 'block';
+        }
+    }
+
+    getFileSize(filename) {
+        // This would require a separate API call to get file sizes
+        // For now, return a placeholder
+        return 'Unknown size';
+    }
+}
+
+// Initialize everything when page loads
+document.addEventListener('DOMContentLoaded', () => {
+    window.scraperInstance = new GoogleMapsScraper();
+    window.tabManager = new TabManager();
+});
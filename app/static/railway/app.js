@@ -0,0 +1,111 @@
+const form = document.getElementById('scrapeForm');
+const submitBtn = document.getElementById('submitBtn');
+const status = document.getElementById('status');
+const messages = document.getElementById('messages');
+const downloadSection = document.getElementById('downloadSection');
+const downloadLink = document.getElementById('downloadLink');
+
+let currentJobId = null;
+let pollInterval = null;
+
+form.addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const formData = new FormData(form);
+    const data = {
+        search_query: formData.get('search_query'),
+        output_format: formData.get('output_format'),
+        healdessmode: 1  // Always headless on Railway (note: typo in original code)
+    };
+
+    submitBtn.disabled = true;
+    status.textContent = 'Starting...';
+    status.className = 'status running';
+    downloadSection.style.display = 'none';
+
+    try {
+        const response = await fetch('/scrape', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(data)
+        });
+
+        const result = await response.json();
+        console.log(result);
+
+        if (result.status === 'started') {
+            currentJobId = result.job_id;
+            status.textContent = 'Scraping in progress...';
+            status.className = 'status running';
+            pollStatus();
+        } else {
+            status.textContent = 'Error starting scraping';
+            status.className = 'status error';
+            submitBtn.disabled = false;
+        }
+
+    } catch (error) {
+        console.error('Error:', error);
+        status.textContent = 'Error starting scraping';
+        status.className = 'status error';
+        submitBtn.disabled = false;
+    }
+});
+
+function pollStatus() {
+    if (pollInterval) clearInterval(pollInterval);
+
+    pollInterval = setInterval(async () => {
+        try {
+            const response = await fetch('/status');
+            const data = await response.json();
+
+            status.textContent = data.status;
+            status.className = `status ${data.status}`;
+
+            // Update messages
+            messages.innerHTML = data.messages.map(msg => {
+                let className = 'message';
+                if (msg.includes('ERROR')) className += ' error';
+                else if (msg.includes('completed') || msg.includes('success')) className += ' success';
+                else className += ' info';
+
+                return `<div class="${className}">${msg}</div>`;
+            }).join('');
+
+            messages.scrollTop = messages.scrollHeight;
+
+            if (data.status === 'completed') {
+                status.textContent = 'Completed! Download your results below.';
+                status.className = 'status completed';
+                submitBtn.disabled = false;
+                downloadSection.style.display = 'block';
+
+                // Set download link - use the most recent file
+                const availableFiles = data.available_files || [];
+                if (availableFiles.length > 0) {
+                    const latestFile = availableFiles[availableFiles.length - 1];
+                    downloadLink.href = `/download/${latestFile}`;
+                    downloadLink.textContent = `Download ${latestFile}`;
+                } else if (data.output_file) {
+                    downloadLink.href = `/download/${data.output_file}`;
+                    downloadLink.textContent = `Download ${data.output_file}`;
+                }
+
+                clearInterval(pollInterval);
+            } else if (data.status === 'error') {
+                status.textContent = 'Error occurred during scraping';
+                status.className = 'status error';
+                submitBtn.disabled = false;
+                clearInterval(pollInterval);
+            }
+
+        } catch (error) {
+            console.error('Status polling error:', error);
+            status.textContent = 'Connection error';
+            status.className = 'status error';
+            submitBtn.disabled = false;
+            clearInterval(pollInterval);
+        }
+    }, 3000);
+}
@@ -0,0 +1,208 @@
+"""
+Proxy pool scoring, ejection and release against local stub proxies
+(benchmarks/stub_proxy.py), without Chrome or a real upstream proxy.
+
+Run from the app directory:
+    python -m pytest -q tests
+"""
+
+import gc
+import importlib.util
+import os
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from benchmarks.stub_proxy import StubProxy
+from scraper import driver_pool
+from scraper.driver_pool import DriverPool
+from scraper.proxy_pool import ProxyPool, proxy_of
+
+EMAIL = "hello@example.org"
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """A place website: no email on the home page, one on /contact"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/missing"):
+            return self.send_error(404)
+        if self.path.startswith("/contact"):
+            body = f"<html><body>Write to {EMAIL}</body></html>"
+        else:
+            body = '<html><body><a href="/contact">Contact</a></body></html>'
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeDriver:
+    """Stands in for a Chrome driver, only quit() is used by the pools"""
+
+    def __init__(self) -> None:
+        self.quit_calls = 0
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+def fetch(pool, proxy, url):
+    """GET url through proxy and score the outcome with the pool, like EmailFinder.fetch does"""
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({"http": proxy.url}))
+    started = time.perf_counter()
+    try:
+        with opener.open(url, timeout=5) as response:
+            response.read()
+        pool.record_response(proxy, response.status, time.perf_counter() - started)
+        return True
+    except urllib.error.HTTPError as e:
+        pool.record_response(proxy, e.code, time.perf_counter() - started)
+        return False
+    except (urllib.error.URLError, ConnectionError, OSError):
+        pool.record(proxy, False)
+        return False
+
+
+class ProxyPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.site = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+        self.site.daemon_threads = True
+        threading.Thread(target=self.site.serve_forever, daemon=True).start()
+        self.site_url = f"http://127.0.0.1:{self.site.server_address[1]}"
+        self.stubs = []
+
+    def tearDown(self):
+        for stub in self.stubs:
+            stub.stop()
+        self.site.shutdown()
+        self.site.server_close()
+
+    def stub(self, **options):
+        stub = StubProxy(**options).start()
+        self.stubs.append(stub)
+        return stub
+
+    def test_requests_go_through_the_stub_proxy(self):
+        stub = self.stub()
+        pool = ProxyPool([stub.url])
+        proxy = pool.acquire()
+
+        self.assertTrue(fetch(pool, proxy, self.site_url + "/"))
+        self.assertEqual(stub.config.stats.get("forwarded"), 1)
+        self.assertEqual(pool.stats()[0]["requests"], 1)
+        self.assertEqual(pool.stats()[0]["score"], 1.0)
+
+    def test_failing_proxy_is_ejected_then_readmitted(self):
+        good, bad = self.stub(), self.stub(error_rate=1.0)
+        pool = ProxyPool([good.url, bad.url], min_samples=3, eject_seconds=0.3)
+        good_proxy, bad_proxy = pool.proxies
+
+        for _ in range(5):
+            fetch(pool, good_proxy, self.site_url + "/")
+            fetch(pool, bad_proxy, self.site_url + "/")
+
+        self.assertFalse(pool.is_ejected(good_proxy))
+        self.assertTrue(pool.is_ejected(bad_proxy))
+        self.assertEqual(bad_proxy.ejections, 1)
+        # No new browser gets the ejected proxy
+        self.assertEqual({pool.acquire().name for _ in range(3)}, {good_proxy.name})
+
+        time.sleep(0.35)
+        stats = {entry["proxy"]: entry for entry in pool.stats()}
+        self.assertEqual(stats[bad_proxy.name]["ejected_for_seconds"], 0)
+        self.assertEqual(stats[bad_proxy.name]["score"], 1.0)
+        # Re-admitted with fresh statistics and no browser on it, so it is picked next
+        self.assertIs(pool.acquire(), bad_proxy)
+
+    def test_blocks_eject_faster_than_errors(self):
+        blocking = self.stub(block_rate=1.0)
+        pool = ProxyPool([blocking.url], min_samples=2, eject_seconds=60)
+        proxy = pool.proxies[0]
+
+        fetch(pool, proxy, self.site_url + "/")
+        fetch(pool, proxy, self.site_url + "/")
+
+        self.assertEqual(blocking.config.stats.get("blocked"), 2)
+        self.assertTrue(pool.is_ejected(proxy))
+        # Every proxy ejected: traffic goes out directly
+        self.assertIsNone(pool.acquire())
+
+    def test_site_errors_do_not_count_against_the_proxy(self):
+        stub = self.stub()
+        pool = ProxyPool([stub.url], min_samples=2)
+        proxy = pool.proxies[0]
+
+        for _ in range(3):
+            self.assertFalse(fetch(pool, proxy, self.site_url + "/missing"))
+
+        self.assertFalse(pool.is_ejected(proxy))
+        self.assertEqual(pool.stats()[0]["score"], 1.0)
+
+    def test_release_driver_gives_the_proxy_back_once(self):
+        pool = ProxyPool(["http://127.0.0.1:9", "http://127.0.0.1:10"])
+        first, second = FakeDriver(), FakeDriver()
+        pool.assign(first, pool.acquire())
+        pool.assign(second, pool.acquire())
+        proxy = proxy_of(first)
+        self.assertEqual(proxy.assigned, 1)
+
+        pool.release_driver(first)
+        pool.release_driver(first)
+        del first
+        gc.collect()
+        self.assertEqual(proxy.assigned, 0)
+        # The other proxy is still in use, the released one is preferred
+        self.assertIs(pool.acquire(), proxy)
+
+    def test_driver_pool_recycles_browsers_on_ejected_proxies(self):
+        stub = self.stub()
+        pool = ProxyPool([stub.url, "http://127.0.0.1:9"])
+        healthy, ejected = FakeDriver(), FakeDriver()
+        pool.assign(healthy, pool.acquire())
+        pool.assign(ejected, pool.acquire())
+        proxy_of(ejected).ejected_until = time.monotonic() + 60
+
+        with mock.patch.object(driver_pool, "PROXY_POOL", pool):
+            drivers = DriverPool(FakeDriver, 2, drivers=[healthy, ejected])
+            drivers.release(drivers.acquire())
+            drivers.release(drivers.acquire())
+
+            self.assertEqual(ejected.quit_calls, 1)
+            self.assertEqual(proxy_of(ejected).assigned, 0)
+            self.assertEqual(healthy.quit_calls, 0)
+            self.assertEqual(proxy_of(healthy).assigned, 1)
+
+            drivers.close_all()
+            self.assertEqual(healthy.quit_calls, 1)
+            self.assertEqual(proxy_of(healthy).assigned, 0)
+
+    @unittest.skipUnless(
+        importlib.util.find_spec("requests") and importlib.util.find_spec("bs4"),
+        "the email finder needs requests and beautifulsoup4",
+    )
+    def test_email_lookup_goes_through_one_proxy(self):
+        from scraper.email_finder import DomainPoliteness, EmailFinder
+
+        stub = self.stub()
+        pool = ProxyPool([stub.url])
+        finder = EmailFinder(politeness=DomainPoliteness(delay=0), proxies=pool)
+        with mock.patch.dict(os.environ, {"NO_PROXY": "", "no_proxy": ""}):
+            emails = finder.find(self.site_url + "/")
+
+        self.assertEqual(emails, [EMAIL])
+        self.assertEqual(stub.config.stats.get("forwarded"), 2)
+        self.assertEqual(pool.stats()[0]["requests"], 2)
+        self.assertEqual(pool.proxies[0].assigned, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()